@@ -1,11 +1,43 @@
-import psutil
+import os
+
+HWMON_PATH = "/sys/class/hwmon"
+
+
+def read_package_temps(hwmon_path=HWMON_PATH):
+    """Return [(label, celsius)] for the coretemp "Package id" sensors.
+
+    Reads hwmon sysfs directly instead of psutil.sensors_temperatures(), which
+    opens every sensor file of every chip just to find these few.
+    """
+    temps = []
+    for chip in sorted(os.listdir(hwmon_path)):
+        chip_dir = os.path.join(hwmon_path, chip)
+        try:
+            with open(os.path.join(chip_dir, "name")) as f:
+                if f.read().strip() != "coretemp":
+                    continue
+            entries = os.listdir(chip_dir)
+        except OSError:
+            continue
+        for entry in sorted(entries):
+            if not (entry.startswith("temp") and entry.endswith("_label")):
+                continue
+            try:
+                with open(os.path.join(chip_dir, entry)) as f:
+                    label = f.read().strip()
+                if not label.startswith("Package id"):
+                    continue
+                with open(os.path.join(chip_dir, entry[:-len("_label")] + "_input")) as f:
+                    temps.append((label, int(f.read()) / 1000))
+            except (OSError, ValueError):
+                continue
+    return temps
+
 
 def check_cpu_temp():
-    temps = psutil.sensors_temperatures()
-    if 'coretemp' in temps:
-        for entry in temps['coretemp']:
-            if entry.label.startswith("Package id"):
-                print(f"CPU Temp: {entry.current}°C")
+    for label, current in read_package_temps():
+        print(f"CPU Temp: {current}°C")
 
-check_cpu_temp()
 
+if __name__ == "__main__":
+    check_cpu_temp()
@@ -4,18 +4,20 @@ import logging
 import subprocess
 from datetime import datetime
 
+from loopstats import LoopStats
+
 # Configuration
 SERVICE_NAME = "falcon-sensor"  # Adjust if different on your system
 RAM_THRESHOLD = 80  # in percentage
 CHECK_INTERVAL = 60  # seconds between checks
 LOG_FILE = "/var/log/falconsensor_monitor.log"  # Make sure script has permission to write here
 
-# Setup logging
-logging.basicConfig(
-    filename=LOG_FILE,
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
+def setup_logging():
+    logging.basicConfig(
+        filename=LOG_FILE,
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s"
+    )
 
 def get_falconsensor_pid():
     """Return PID of the falcon-sensor process (if running)."""
@@ -41,21 +43,29 @@ def restart_service():
 
 def monitor():
     logging.info("Started FalconSensor RAM monitor.")
+    # kill -USR1 dumps per-stage timings, kill -USR2 profiles a few cycles
+    stats = LoopStats("falconsensor_monitor")
+    stats.install_signals()
     while True:
-        pid = get_falconsensor_pid()
-        if pid:
-            try:
-                usage = get_process_ram_usage(pid)
-                logging.debug(f"FalconSensor RAM usage: {usage:.2f}%")
-                if usage > RAM_THRESHOLD:
-                    logging.warning(f"High RAM usage detected: {usage:.2f}%. Restarting service.")
-                    restart_service()
-            except (psutil.NoSuchProcess, psutil.AccessDenied) as e:
-                logging.error(f"Error accessing FalconSensor process: {e}")
-        else:
-            logging.warning("FalconSensor process not found.")
+        with stats.cycle():
+            with stats.stage("scan"):
+                pid = get_falconsensor_pid()
+            if pid:
+                try:
+                    with stats.stage("measure"):
+                        usage = get_process_ram_usage(pid)
+                    logging.debug(f"FalconSensor RAM usage: {usage:.2f}%")
+                    if usage > RAM_THRESHOLD:
+                        logging.warning(f"High RAM usage detected: {usage:.2f}%. Restarting service.")
+                        with stats.stage("restart"):
+                            restart_service()
+                except (psutil.NoSuchProcess, psutil.AccessDenied) as e:
+                    logging.error(f"Error accessing FalconSensor process: {e}")
+            else:
+                logging.warning("FalconSensor process not found.")
         time.sleep(CHECK_INTERVAL)
 
 if __name__ == "__main__":
+    setup_logging()
     monitor()
 
@@ -12,30 +12,199 @@ Features:
 - Blobbo companion that evolves (and gets worse)
 - ASCII art title and sound-effect stubs
 - Plenty of places to drop your own rooms, enemies, and endings
+- Pluggable I/O and decision policies, so runs can be played by bots
+  (chaos_sim.py plays millions of them headless for balancing)
+- Typewriter text on a frame clock: press any key to skip, --speed to taste
+- Content packs (JSON, JSONL or TOML) with weighted, conditional entries: --pack
+- Written as coroutines: chaos_server.py hosts thousands of players over telnet
 """
 
+import os
+import json
+import math
 import random
 import sys
 import time
+import asyncio
+import argparse
+from array import array
+
+try:  # key-to-skip: msvcrt on Windows, termios everywhere else
+    import msvcrt
+except ImportError:
+    msvcrt = None
+try:
+    import select
+    import termios
+    import tty
+except ImportError:
+    termios = None
+try:
+    import tomllib  # Python 3.11+, only needed for .toml packs
+except ImportError:
+    tomllib = None
 
 # ---------------------------
 # Utility / Presentation
 # ---------------------------
+FRAME_TIME = 1 / 30   # typewriter text goes out once per frame, not once per character
+TEXT_SPEED = 1.0      # multiplies every text delay; 0 prints each message in one go
+
+class KeyWatcher:
+    """Non-blocking "was a key pressed?" for the terminal; never fires when stdin isn't one."""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdin
+        self.saved = None
+
+    def __enter__(self):
+        if termios and not msvcrt and self.stream.isatty():
+            fd = self.stream.fileno()
+            self.saved = termios.tcgetattr(fd)
+            tty.setcbreak(fd)  # keys arrive unbuffered and unechoed
+        return self
+
+    def __exit__(self, *exc):
+        if self.saved is not None:
+            termios.tcsetattr(self.stream.fileno(), termios.TCSADRAIN, self.saved)
+            self.saved = None
+
+    def pressed(self):
+        """True if a key came in since the last call (the keys are swallowed)."""
+        if msvcrt:
+            hit = False
+            while msvcrt.kbhit():
+                msvcrt.getwch()
+                hit = True
+            return hit
+        if self.saved is None:
+            return False
+        fd = self.stream.fileno()
+        if select.select([fd], [], [], 0)[0]:
+            os.read(fd, 1024)
+            return True
+        return False
+
+class TextRenderer:
+    """Typewriter text: whatever is due goes out in one write per frame, a keypress
+    finishes the message, and render_async() does the same without blocking a loop."""
+
+    def __init__(self, out=None, speed=TEXT_SPEED, frame=FRAME_TIME):
+        self.out = out
+        self.speed = speed
+        self.frame = frame
+
+    def frames(self, text, delay):
+        """Yield (chunk, seconds to the next frame); the last chunk carries the newline."""
+        delay *= self.speed
+        if delay <= 0:
+            yield text + "\n", 0
+            return
+        start = time.monotonic()
+        written = 0
+        tick = 1
+        while True:
+            # at least one character: we only wake once the next one is due
+            due = max(written + 1, int((time.monotonic() - start) / delay) + 1)
+            if due >= len(text):
+                yield text[written:] + "\n", 0
+                return
+            chunk, written = text[written:due], due
+            # slow text skips the frames that would have nothing new to show
+            tick = max(tick, math.ceil(written * delay / self.frame - 1e-9))
+            yield chunk, max(0.0, start + tick * self.frame - time.monotonic())
+            tick += 1
+
+    def render(self, text, delay=0.02):
+        out = self.out or sys.stdout
+        if delay * self.speed <= 0:
+            out.write(text + "\n")
+            out.flush()
+            return
+        written = 0
+        with KeyWatcher() as keys:
+            for chunk, wait in self.frames(text, delay):
+                out.write(chunk)
+                out.flush()
+                written += len(chunk)
+                if not wait:
+                    continue
+                if keys.pressed():
+                    out.write(text[written:] + "\n")
+                    out.flush()
+                    return
+                time.sleep(wait)
+
+    async def render_async(self, text, delay=0.02, skip=None):
+        """render() for asyncio. skip is an optional asyncio.Event standing in for the
+        keypress: set it from whatever task reads input and the message finishes at once."""
+        out = self.out or sys.stdout
+        written = 0
+        for chunk, wait in self.frames(text, delay):
+            out.write(chunk)
+            out.flush()
+            written += len(chunk)
+            if not wait:
+                continue
+            if skip is None:
+                await asyncio.sleep(wait)
+                continue
+            try:
+                await asyncio.wait_for(skip.wait(), wait)
+            except asyncio.TimeoutError:
+                continue
+            skip.clear()
+            out.write(text[written:] + "\n")
+            out.flush()
+            return
+
+RENDERER = TextRenderer()
+
 def slow_print(text, delay=0.02):
-    """Optional flourished printing (can be turned off by setting delay=0)."""
-    for ch in text:
-        sys.stdout.write(ch)
-        sys.stdout.flush()
-        if delay:
-            time.sleep(delay)
-    print()
+    """Optional flourished printing (can be turned off by setting delay=0, or RENDERER.speed = 0)."""
+    RENDERER.render(text, delay)
 
 def play_sound(effect_name):
     """Stub for 'sound effects' — replace with audio calls if desired."""
     print(f"*sound effect: {effect_name}*")
 
-def ascii_title():
-    print(r"""
+# The game is written as coroutines so one process can host many players (see
+# chaos_server.py); an io's methods are awaited. ConsoleIO and NullIO never
+# actually suspend, so play_one_run() can drive a run without an event loop.
+class ConsoleIO:
+    """Terminal I/O: flourished text, plain lines, sound stubs and typed answers."""
+
+    async def say(self, text, delay=0.02):
+        slow_print(text, delay)
+
+    async def show(self, text):
+        print(text)
+
+    async def sound(self, effect_name):
+        play_sound(effect_name)
+
+    async def ask(self, prompt):
+        return input(prompt)
+
+class NullIO:
+    """Swallows all output, for headless runs."""
+
+    async def say(self, text, delay=0.02):
+        pass
+
+    async def show(self, text):
+        pass
+
+    async def sound(self, effect_name):
+        pass
+
+    async def ask(self, prompt):
+        return ""
+
+CONSOLE = ConsoleIO()
+
+async def ascii_title(io=CONSOLE):
+    await io.show(r"""
    ____ _   _    _    ____   ___   ____  
   / ___| | | |  / \  |  _ \ / _ \ / ___| 
  | |   | |_| | / _ \ | | | | | | | |     
@@ -43,7 +212,74 @@ def ascii_title():
   \____|_| |_/_/   \_\____/ \___/ \____| 
         CHAOS DUNGEON – PYTHON EDITION
     """)
-    print("Welcome to the engine. Tip: press Ctrl+C to quit at any time.\n")
+    await io.show("Welcome to the engine. Tip: press Ctrl+C to quit at any time.\n")
+
+# ---------------------------
+# Decision policies
+# ---------------------------
+# Every choice in a run goes through a policy. Each method is a coroutine that gets
+# the prompt a human would see plus the state it is about, and returns what a human
+# would type.
+class Policy:
+    """Bot base class: takes door 1, always enters the next room, always fights."""
+    name = "fight"
+
+    async def door(self, prompt, rng):
+        return "1"
+
+    async def advice(self, prompt, rng):
+        return ""
+
+    async def enter_room(self, prompt, player, blobbo, steps, rng):
+        return "y"
+
+    async def encounter(self, prompt, player, blobbo, enemy, rng):
+        return "f"
+
+    async def boss(self, prompt, player, blobbo, wyrm_hp, rng):
+        return "a"
+
+class HumanPolicy(Policy):
+    """Asks the person at the other end of io."""
+    name = "human"
+
+    def __init__(self, io):
+        self.io = io
+
+    async def door(self, prompt, rng):
+        return (await self.io.ask(prompt)).strip()
+
+    async def advice(self, prompt, rng):
+        return await self.io.ask(prompt)
+
+    async def enter_room(self, prompt, player, blobbo, steps, rng):
+        return (await self.io.ask(prompt)).lower().strip()
+
+    async def encounter(self, prompt, player, blobbo, enemy, rng):
+        return (await self.io.ask(prompt)).lower().strip()
+
+    async def boss(self, prompt, player, blobbo, wyrm_hp, rng):
+        return (await self.io.ask(prompt)).lower().strip()
+
+class BurritoFirst(Policy):
+    """Fights its way through and saves the burrito to put the Wyrm to sleep."""
+    name = "burrito"
+
+    async def boss(self, prompt, player, blobbo, wyrm_hp, rng):
+        return "b" if "half-eaten burrito" in player["inventory"] else "a"
+
+class BlobboSpam(Policy):
+    """Lets Blobbo do everything."""
+    name = "blobbo"
+
+    async def encounter(self, prompt, player, blobbo, enemy, rng):
+        return "b"
+
+    async def boss(self, prompt, player, blobbo, wyrm_hp, rng):
+        return "c"
+
+POLICIES = {p.name: p for p in (Policy, BurritoFirst, BlobboSpam)}
+HUMAN = HumanPolicy(CONSOLE)
 
 # ---------------------------
 # Game Data (customize me)
@@ -81,6 +317,31 @@ SILLY_ENEMIES = [
     {"name": "Disgruntled Lobster", "health": 12, "attack": 3},
 ]
 
+ROOM_REACTIONS = [
+    "Blobbo gasps dramatically.",
+    "Blobbo boos loudly.",
+    "Blobbo tries to fight the air.",
+    "Blobbo whispers, 'This place has bad vibes.'",
+    "Blobbo starts humming ominously.",
+    "Blobbo hides behind your ankle."
+]
+
+ITEMS = ["rubber chicken", "sock of ambiguity", "mystery key"]
+
+DOOR_ONE = [
+    "A raccoon in a wizard robe challenges you to rock-paper-scissors.",
+    "A time-traveling potato appears and demands tax documents.",
+    "A chicken riding a Roomba zooms past, screaming 'THE PROPHECY!'",
+    "You fall into a pit of marshmallows. They are sentient. They judge you."
+]
+
+DOOR_TWO = [
+    "A disco-ball golem asks if you know how to dance the forbidden tango.",
+    "A goblin gives you a motivational speech about personal growth.",
+    "A swarm of bees forms into the shape of a middle finger.",
+    "You meet a ghost who's mad because someone ate his leftovers."
+]
+
 ENDINGS = [
     ("You walk away from the dungeon, burrito crumbs trailing behind you.", "neutral"),
     ("You were defeated by something profoundly stupid.", "bad"),
@@ -88,11 +349,296 @@ ENDINGS = [
     ("Blobbo evolved into an eldritch soup god and politely asked you to leave.", "weird")
 ]
 
+# ending reason -> message
+ENDING_MESSAGES = {
+    "retreat": ENDINGS[0][0],
+    "dead": ENDINGS[1][0],
+    "wyrm_asleep": ENDINGS[2][0],
+    "blobbo_stare_win": ENDINGS[3][0],
+    "diplomacy_success": "You and the Wyrm open a small noodle bistro together. Business is okay.",
+    "wyrm_defeated": "You defeated the Wyrm through sheer nonsense and questionable bravery. The court of carbs is baffled."
+}
+
+# Balance numbers (chaos_odds.py reads these, so its exact odds follow any change)
+ENCOUNTER_CHANCE = 0.35   # per room
+ITEM_CHANCE = 0.25        # per room
+BOSS_MIN_ROOMS = 4        # rooms before the Wyrm can force the finale...
+BOSS_CHANCE = 0.25        # ...with this chance per room
+ITEM_HEAL = 3
+CONFUSED_DAMAGE = 1       # typing nonsense hurts
+WYRM_HP = 30
+WYRM_TAIL_DAMAGE = 3      # after every action that doesn't end the boss fight
+NO_BURRITO_DAMAGE = 2
+STARE_FAIL_DAMAGE = 4
+DIPLOMACY_CHANCE = 0.5
+DIPLOMACY_FAIL_DAMAGE = 6
+
+# ---------------------------
+# Content packs
+# ---------------------------
+# Everything random the dungeon says or spawns is drawn from a Content: the lists
+# above, plus any packs. A pack maps a kind to a list of entries (JSON or TOML),
+# or is JSONL with one entry per line and its kind in a "kind" field:
+#
+#   {"rooms": ["a plain room.", {"text": "a room of angry clocks.", "weight": 3}],
+#    "enemies": [{"name": "Tax Goblin", "health": 9, "attack": 3, "when": {"min_form": 2}}],
+#    "endings": [{"key": "dead", "text": "The dungeon files you under 'misc'."}]}
+#
+#   {"kind": "rooms", "text": "a corridor of polite skeletons.", "weight": 0.5}
+#
+# Plain strings are short for {"text": ...}. "weight" (default 1) sets how often an
+# entry comes up, and "when" limits it to situations (see CONDITIONS). Endings are
+# picked among the entries whose "key" is the ending's reason. The intro has no
+# situation yet, so intro entries with a "when" never come up.
+CONTENT_KINDS = ("rooms", "room_reactions", "enemies", "items", "door_one", "door_two",
+                 "companion_dialogue", "blobbo_advice", "endings")
+REQUIRED_FIELDS = {"enemies": ("name", "health", "attack"), "endings": ("key", "text")}  # the rest need "text"
+ENTRY_CACHE_MAX = 4096  # parsed JSONL entries kept around
+
+CONDITIONS = {
+    "min_hp": lambda ctx, v: ctx["hp"] >= v,
+    "max_hp": lambda ctx, v: ctx["hp"] <= v,
+    "min_form": lambda ctx, v: ctx["form"] >= v,
+    "max_form": lambda ctx, v: ctx["form"] <= v,
+    "min_rooms": lambda ctx, v: ctx["rooms"] >= v,
+    "max_rooms": lambda ctx, v: ctx["rooms"] <= v,
+    "has_item": lambda ctx, v: v in ctx["inventory"],
+    "lacks_item": lambda ctx, v: v not in ctx["inventory"],
+}
+
+def situation(player, blobbo, key=None):
+    """The context that "when" conditions (and ending keys) are checked against."""
+    return {"hp": player["health"], "form": blobbo["form"], "rooms": player["rooms"],
+            "inventory": player["inventory"], "key": key}
+
+def builtin_content():
+    """The module's lists as entries, per kind."""
+    return {
+        "rooms": ROOMS,
+        "room_reactions": ROOM_REACTIONS,
+        "enemies": SILLY_ENEMIES,
+        "items": ITEMS,
+        "door_one": DOOR_ONE,
+        "door_two": DOOR_TWO,
+        "companion_dialogue": COMPANION_DIALOGUE,
+        "blobbo_advice": BLOBBO_ADVICE,
+        "endings": [{"key": key, "text": text} for key, text in ENDING_MESSAGES.items()],
+    }
+
+def alias_table(weights):
+    """Vose's alias method: (prob, alias) arrays for O(1) weighted picks with alias_pick()."""
+    n = len(weights)
+    total = sum(weights)
+    scaled = [w * n / total for w in weights]
+    prob = array("d", [1.0]) * n
+    alias = array("I", [0]) * n
+    small = [i for i, p in enumerate(scaled) if p < 1]
+    large = [i for i, p in enumerate(scaled) if p >= 1]
+    while small and large:
+        s, l = small.pop(), large.pop()
+        prob[s], alias[s] = scaled[s], l
+        scaled[l] += scaled[s] - 1
+        (small if scaled[l] < 1 else large).append(l)
+    return prob, alias  # whatever is left over has prob 1 (up to rounding)
+
+def alias_pick(prob, alias, rng):
+    i = int(rng.random() * len(prob))
+    return i if rng.random() < prob[i] else alias[i]
+
+class _JsonlSource:
+    """A JSONL pack read lazily: only byte offsets are kept, entries are parsed when drawn."""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+        self.offsets = array("q")
+        self.cache = {}
+
+    def scan(self):
+        """Yield each entry once, recording where it starts."""
+        self.file.seek(0)
+        offset = 0
+        for line in self.file:
+            if line.strip():
+                self.offsets.append(offset)
+                entry = json.loads(line)
+                yield _normalize(entry, entry.get("kind") if isinstance(entry, dict) else None, self.path)
+            offset += len(line)
+
+    def get(self, i):
+        entry = self.cache.get(i)
+        if entry is None:
+            if len(self.cache) >= ENTRY_CACHE_MAX:
+                self.cache.clear()
+            self.file.seek(self.offsets[i])
+            entry = self.cache[i] = json.loads(self.file.readline())
+        return entry
+
+class _MemorySource:
+    def __init__(self):
+        self.entries = []
+
+    def get(self, i):
+        return self.entries[i]
+
+def _normalize(entry, kind, origin):
+    """entry as a dict, checked for what the engine will read from it (ValueError if it won't do)."""
+    if kind not in CONTENT_KINDS:
+        raise ValueError(f"{origin}: unknown content kind {kind!r} (known: {', '.join(CONTENT_KINDS)})")
+    if isinstance(entry, str):
+        entry = {"text": entry}
+    if not isinstance(entry, dict):
+        raise ValueError(f"{origin}: {kind} entry must be a string or an object, not {entry!r}")
+    missing = [name for name in REQUIRED_FIELDS.get(kind, ("text",)) if name not in entry]
+    if missing:
+        raise ValueError(f"{origin}: {kind} entry {entry!r} is missing {', '.join(missing)}")
+    weight = entry.get("weight", 1)
+    if isinstance(weight, bool) or not isinstance(weight, (int, float)) or not math.isfinite(weight):
+        raise ValueError(f"{origin}: {kind} entry has a non-numeric weight {weight!r}")
+    when = entry.get("when") or {}
+    if not isinstance(when, dict):
+        raise ValueError(f"{origin}: \"when\" must map conditions to values, not {when!r}")
+    for name in when:
+        if name not in CONDITIONS:
+            raise ValueError(f"{origin}: unknown condition {name!r} (known: {', '.join(CONDITIONS)})")
+    return entry
+
+def _load_pack(path):
+    """{kind: [entries]} from a JSON or TOML pack."""
+    if path.endswith(".toml"):
+        if tomllib is None:
+            raise ValueError(f"{path}: TOML packs need Python 3.11+ (tomllib)")
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+class _Pool:
+    """Entries of one kind (and ending key) with the same "when": where each lives, and their weights."""
+
+    def __init__(self, when):
+        self.when = when
+        self.source = array("H")  # index into Content.sources
+        self.index = array("I")   # entry index within that source
+        self.weights = array("d")
+        self.total = 0.0
+        self.prob = self.alias = None  # alias table, built on the first draw
+        self.entries = None            # the entries themselves, when none are in a JSONL pack
+        self.uniform = False           # in memory with all weights equal: no alias table needed
+
+    def add(self, source, index, weight):
+        self.source.append(source)
+        self.index.append(index)
+        self.weights.append(weight)
+        self.total += weight
+
+class Content:
+    """Weighted, conditional content from the built-in lists and any packs.
+
+    Packs are read on load() (or the first pick). JSONL packs keep only offsets and
+    weights in memory. Entries are grouped by their "when", so a pick checks each
+    distinct condition once, then draws from the fitting groups with alias tables.
+    """
+
+    def __init__(self, packs=(), builtin=True):
+        self.packs = list(packs)
+        self.builtin = builtin
+        self.sources = None
+        self.pools = None  # {kind: {ending key or None: [_Pool per distinct "when"]}}
+
+    def load(self):
+        self.sources, self.pools = [], {}
+        tables = [("built-in content", builtin_content())] if self.builtin else []
+        for path in self.packs:
+            if path.endswith(".jsonl"):
+                source = _JsonlSource(path)
+                self.sources.append(source)
+                for i, entry in enumerate(source.scan()):
+                    self._add(entry["kind"], entry, len(self.sources) - 1, i)
+            else:
+                tables.append((path, _load_pack(path)))
+        for origin, table in tables:
+            memory = _MemorySource()
+            self.sources.append(memory)
+            for kind, entries in table.items():
+                for entry in entries:
+                    entry = _normalize(entry, kind, origin)
+                    self._add(kind, entry, len(self.sources) - 1, len(memory.entries))
+                    memory.entries.append(entry)
+        for kind in self.pools:
+            for key, groups in self.pools[kind].items():
+                pools = self.pools[kind][key] = list(groups.values())
+                for pool in pools:
+                    if all(isinstance(self.sources[s], _MemorySource) for s in set(pool.source)):
+                        pool.entries = [self.entry(pool, k) for k in range(len(pool.weights))]
+                        pool.uniform = min(pool.weights) == max(pool.weights)
+        return self
+
+    def _add(self, kind, entry, source, index):
+        weight = entry.get("weight", 1)
+        if weight <= 0:
+            return
+        when = entry.get("when") or None
+        groups = self.pools.setdefault(kind, {}).setdefault(entry.get("key"), {})
+        group = json.dumps(when, sort_keys=True)
+        pool = groups.get(group)
+        if pool is None:
+            pool = groups[group] = _Pool(when)
+        pool.add(source, index, weight)
+
+    def entry(self, pool, k):
+        return self.sources[pool.source[k]].get(pool.index[k])
+
+    @staticmethod
+    def fits(when, ctx):
+        if not when:
+            return True
+        try:
+            return all(CONDITIONS[name](ctx, value) for name, value in when.items())
+        except (KeyError, TypeError):  # no situation, or not the part this condition needs
+            return False
+
+    def pick(self, kind, rng=random, ctx=None):
+        """A weighted random entry of `kind` that fits ctx (see situation()), or None."""
+        if self.pools is None:
+            self.load()
+        pools = self.pools.get(kind, {}).get(ctx and ctx["key"])
+        if not pools:
+            return None
+        if len(pools) == 1 and pools[0].when is None:
+            pool = pools[0]
+        else:
+            fitting = [p for p in pools if self.fits(p.when, ctx)]
+            if not fitting:
+                return None
+            x = rng.random() * sum(p.total for p in fitting)
+            for pool in fitting:
+                x -= pool.total
+                if x < 0:
+                    break
+        if pool.uniform:
+            return pool.entries[int(rng.random() * len(pool.entries))]
+        if pool.prob is None:
+            pool.prob, pool.alias = alias_table(pool.weights)
+        k = alias_pick(pool.prob, pool.alias, rng)
+        return pool.entries[k] if pool.entries else self.entry(pool, k)
+
+    def text(self, kind, rng=random, ctx=None, default=""):
+        entry = self.pick(kind, rng, ctx)
+        return default if entry is None else entry["text"]
+
+CONTENT = Content()
+
+def load_packs(packs, builtin=True):
+    """Switch the dungeon to the built-in content plus these packs (read now, so errors show up front)."""
+    global CONTENT
+    CONTENT = Content(packs, builtin).load()
+
 # ---------------------------
 # Engine Core: Entities
 # ---------------------------
 def create_player():
-    return {"health": 20, "attack": 5, "name": "You", "inventory": ["half-eaten burrito"]}
+    return {"health": 20, "attack": 5, "name": "You", "inventory": ["half-eaten burrito"], "rooms": 0}
 
 def create_blobbo():
     # form = 1 (baby blobbo) -> higher numbers = worse & stronger
@@ -101,271 +647,258 @@ def create_blobbo():
 # ---------------------------
 # Blobbo evolution system
 # ---------------------------
-def blobbo_evolve(blobbo):
+async def blobbo_evolve(blobbo, io=CONSOLE):
     blobbo["form"] += 1
     form = blobbo["form"]
 
     if form == 2:
-        slow_print("\nBlobbo begins vibrating violently...")
-        slow_print("Blobbo evolved into **Blobbo Supreme**, now 20% more unhinged.")
+        await io.say("\nBlobbo begins vibrating violently...")
+        await io.say("Blobbo evolved into **Blobbo Supreme**, now 20% more unhinged.")
         blobbo["attack"] = 4
 
     elif form == 3:
-        slow_print("\nBlobbo is glowing. This seems bad.")
-        slow_print("Blobbo evolved into **Mega Blobbo**, radiating chaotic energy.")
+        await io.say("\nBlobbo is glowing. This seems bad.")
+        await io.say("Blobbo evolved into **Mega Blobbo**, radiating chaotic energy.")
         blobbo["attack"] = 6
 
     elif form >= 4:
-        slow_print("\nOh no. Blobbo is levitating.")
-        slow_print("Blobbo evolved into **Eldritch Blobbo**, whispering forbidden soup recipes.")
+        await io.say("\nOh no. Blobbo is levitating.")
+        await io.say("Blobbo evolved into **Eldritch Blobbo**, whispering forbidden soup recipes.")
         blobbo["attack"] = 8
 
+def stare_chance(form):
+    """Chance Blobbo wins the staring contest against the Wyrm."""
+    return 0.4 + 0.15 * (form - 1)
+
 # ---------------------------
 # Encounters: battle and events
 # ---------------------------
-def silly_enemy_encounter(player, blobbo):
-    enemy = random.choice([dict(e) for e in SILLY_ENEMIES])  # copy to avoid mutation
-    slow_print(f"\nA wild {enemy['name']} appears! (HP: {enemy['health']}, ATK: {enemy['attack']})", 0.01)
-    play_sound("enemy_appearance")
+async def silly_enemy_encounter(player, blobbo, io=CONSOLE, policy=HUMAN, rng=random):
+    entry = CONTENT.pick("enemies", rng, situation(player, blobbo)) or rng.choice(SILLY_ENEMIES)
+    enemy = dict(entry)  # copy to avoid mutation
+    await io.say(f"\nA wild {enemy['name']} appears! (HP: {enemy['health']}, ATK: {enemy['attack']})", 0.01)
+    await io.sound("enemy_appearance")
 
     while enemy["health"] > 0 and player["health"] > 0:
-        print(f"\nYour HP: {player['health']}   Blobbo(form {blobbo['form']}) ATK: {blobbo['attack']}")
-        action = input("Fight (f) / Blobbo tries (b) / Use item (i) : ").lower().strip()
+        await io.show(f"\nYour HP: {player['health']}   Blobbo(form {blobbo['form']}) ATK: {blobbo['attack']}")
+        action = await policy.encounter("Fight (f) / Blobbo tries (b) / Use item (i) : ", player, blobbo, enemy, rng)
 
         if action == "f":
             enemy["health"] -= player["attack"]
-            slow_print(f"You bonk the {enemy['name']} for {player['attack']} damage! It has {max(enemy['health'],0)} HP left.")
+            await io.say(f"You bonk the {enemy['name']} for {player['attack']} damage! It has {max(enemy['health'],0)} HP left.")
         elif action == "b":
             enemy["health"] -= blobbo["attack"]
-            slow_print(f"Blobbo flops into the {enemy['name']} and deals {blobbo['attack']} damage.")
+            await io.say(f"Blobbo flops into the {enemy['name']} and deals {blobbo['attack']} damage.")
         elif action == "i":
             if player["inventory"]:
                 item = player["inventory"].pop(0)
-                slow_print(f"You use {item}. It… mostly helps your dignity. +3 HP")
-                player["health"] += 3
+                await io.say(f"You use {item}. It… mostly helps your dignity. +3 HP")
+                player["health"] += ITEM_HEAL
             else:
-                slow_print("You have nothing useful. Blobbo suggests staring dramatically.")
+                await io.say("You have nothing useful. Blobbo suggests staring dramatically.")
         else:
-            slow_print("Confused actions lead to chaotic outcomes: you trip over a thought and lose 1 HP.")
-            player["health"] -= 1
+            await io.say("Confused actions lead to chaotic outcomes: you trip over a thought and lose 1 HP.")
+            player["health"] -= CONFUSED_DAMAGE
 
         # Enemy strikes back if alive
         if enemy["health"] > 0:
             player["health"] -= enemy["attack"]
-            slow_print(f"The {enemy['name']} hits back for {enemy['attack']} damage! You now have {max(player['health'],0)} HP.")
+            await io.say(f"The {enemy['name']} hits back for {enemy['attack']} damage! You now have {max(player['health'],0)} HP.")
 
     if player["health"] <= 0:
-        slow_print("\nYou collapse dramatically. The dungeon is mildly inconvenienced.")
-        play_sound("player_death")
+        await io.say("\nYou collapse dramatically. The dungeon is mildly inconvenienced.")
+        await io.sound("player_death")
         return False  # player died
 
-    slow_print(f"\nYou defeated the {enemy['name']}! Blobbo cheers awkwardly.")
-    play_sound("enemy_defeat")
+    await io.say(f"\nYou defeated the {enemy['name']}! Blobbo cheers awkwardly.")
+    await io.sound("enemy_defeat")
     # Blobbo evolves after victory
-    blobbo_evolve(blobbo)
+    await blobbo_evolve(blobbo, io)
     return True
 
 # ---------------------------
 # Random rooms generator
 # ---------------------------
-def random_room_sequence(player, blobbo):
-    slow_print("\nBlobbo: 'Welp, time to wander deeper! What’s the worst that could happen?'")
+async def random_room_sequence(player, blobbo, io=CONSOLE, policy=HUMAN, rng=random):
+    await io.say("\nBlobbo: 'Welp, time to wander deeper! What’s the worst that could happen?'")
     steps = 0
     while True:
-        enter = input("\nEnter the next room? (y/n): ").lower().strip()
+        enter = await policy.enter_room("\nEnter the next room? (y/n): ", player, blobbo, steps, rng)
         if enter != "y":
-            slow_print("\nBlobbo: 'Retreat? Cowardice is a valid strategy. I respect it.'")
+            await io.say("\nBlobbo: 'Retreat? Cowardice is a valid strategy. I respect it.'")
             return "retreat"  # returns reason to trigger next stage (e.g. boss)
 
         steps += 1
-        slow_print("\nYou step forward and the dungeon shifts around you...")
-        slow_print("You enter: " + random.choice(ROOMS))
-        print(random.choice([
-            "Blobbo gasps dramatically.",
-            "Blobbo boos loudly.",
-            "Blobbo tries to fight the air.",
-            "Blobbo whispers, 'This place has bad vibes.'",
-            "Blobbo starts humming ominously.",
-            "Blobbo hides behind your ankle."
-        ]))
+        player["rooms"] = steps
+        ctx = situation(player, blobbo)
+        await io.say("\nYou step forward and the dungeon shifts around you...")
+        await io.say("You enter: " + CONTENT.text("rooms", rng, ctx))
+        await io.show(CONTENT.text("room_reactions", rng, ctx))
 
         # Random chance of enemy encounter
-        if random.random() < 0.35:  # 35% chance
-            survived = silly_enemy_encounter(player, blobbo)
+        if rng.random() < ENCOUNTER_CHANCE:
+            survived = await silly_enemy_encounter(player, blobbo, io, policy, rng)
             if not survived:
                 return "dead"
         # Random chance of bizarre item find
-        if random.random() < 0.25:
-            item = random.choice(["rubber chicken", "sock of ambiguity", "mystery key"])
+        if rng.random() < ITEM_CHANCE:
+            item = CONTENT.text("items", rng, situation(player, blobbo), default="mystery key")
             player["inventory"].append(item)
-            slow_print(f"You found a {item}! Blobbo judges it immediately.")
+            await io.say(f"You found a {item}! Blobbo judges it immediately.")
 
         # After a bunch of rooms there's a chance dungeon clamps shut and forces finale
-        if steps >= 4 and random.random() < 0.25:
-            slow_print("\nThe dungeon hums… something in the depths has noticed you.")
+        if steps >= BOSS_MIN_ROOMS and rng.random() < BOSS_CHANCE:
+            await io.say("\nThe dungeon hums… something in the depths has noticed you.")
             return "force_boss"
 
 # ---------------------------
 # Boss battle: The Great Noodle Wyrm
 # ---------------------------
-def noodle_wyrm_battle(player, blobbo):
-    slow_print("\nThe dungeon rumbles... The walls peel away like wet stickers.")
-    slow_print("Blobbo: 'Uh oh. I think we triggered the finale.'")
-    slow_print("\nA gigantic swirling vortex of spaghetti rises before you!")
-    slow_print("It screeches: 'I AM THE GREAT NOODLE WYRM, DEVOURER OF CARBS!'")
-    play_sound("boss_theme")
-
-    wyrm_hp = 30
+async def noodle_wyrm_battle(player, blobbo, io=CONSOLE, policy=HUMAN, rng=random):
+    await io.say("\nThe dungeon rumbles... The walls peel away like wet stickers.")
+    await io.say("Blobbo: 'Uh oh. I think we triggered the finale.'")
+    await io.say("\nA gigantic swirling vortex of spaghetti rises before you!")
+    await io.say("It screeches: 'I AM THE GREAT NOODLE WYRM, DEVOURER OF CARBS!'")
+    await io.sound("boss_theme")
+
+    wyrm_hp = WYRM_HP
     while wyrm_hp > 0 and player["health"] > 0:
-        action = input("\nDo you (a) attack, (b) throw your burrito, (c) let Blobbo handle it, (d) try diplomacy? ").lower().strip()
+        action = await policy.boss("\nDo you (a) attack, (b) throw your burrito, (c) let Blobbo handle it, (d) try diplomacy? ",
+                             player, blobbo, wyrm_hp, rng)
         if action == "a":
             damage = player["attack"]
             wyrm_hp -= damage
-            slow_print(f"You punch noodles for {damage} damage. Wyrm HP: {max(wyrm_hp,0)}")
-            play_sound("punch_noodles")
+            await io.say(f"You punch noodles for {damage} damage. Wyrm HP: {max(wyrm_hp,0)}")
+            await io.sound("punch_noodles")
         elif action == "b":
             if "half-eaten burrito" in player["inventory"]:
                 player["inventory"].remove("half-eaten burrito")
-                slow_print("You hurl your half-eaten burrito with the force of a thousand regrets.")
-                slow_print("The Noodle Wyrm devours it… then instantly falls asleep.")
-                play_sound("snore")
+                await io.say("You hurl your half-eaten burrito with the force of a thousand regrets.")
+                await io.say("The Noodle Wyrm devours it… then instantly falls asleep.")
+                await io.sound("snore")
                 return "wyrm_asleep"
             else:
-                slow_print("You have no burrito. Blobbo sniffs the air sadly.")
-                player["health"] -= 2
+                await io.say("You have no burrito. Blobbo sniffs the air sadly.")
+                player["health"] -= NO_BURRITO_DAMAGE
         elif action == "c":
-            slow_print("Blobbo steps forward confidently.")
-            slow_print("Blobbo: 'Stand back. I was born for this… I think.'")
-            slow_print("Blobbo challenges the Wyrm to a staring contest.")
+            await io.say("Blobbo steps forward confidently.")
+            await io.say("Blobbo: 'Stand back. I was born for this… I think.'")
+            await io.say("Blobbo challenges the Wyrm to a staring contest.")
             # Blobbo has a probabilistic effect based on form
-            chance = 0.4 + 0.15 * (blobbo["form"] - 1)
-            if random.random() < chance:
-                slow_print("The Wyrm loses. Instantly. Noodles wilt everywhere.")
-                play_sound("victory_barf")
+            if rng.random() < stare_chance(blobbo["form"]):
+                await io.say("The Wyrm loses. Instantly. Noodles wilt everywhere.")
+                await io.sound("victory_barf")
                 return "blobbo_stare_win"
             else:
-                slow_print("The Wyrm blinks and flails. You take 4 damage.")
-                player["health"] -= 4
+                await io.say("The Wyrm blinks and flails. You take 4 damage.")
+                player["health"] -= STARE_FAIL_DAMAGE
         elif action == "d":
-            slow_print("You try diplomacy. You wax philosophical about carbohydrates.")
-            if random.random() < 0.5:
-                slow_print("The Wyrm seems moved. 'No more eating today,' it says, and wanders off.")
+            await io.say("You try diplomacy. You wax philosophical about carbohydrates.")
+            if rng.random() < DIPLOMACY_CHANCE:
+                await io.say("The Wyrm seems moved. 'No more eating today,' it says, and wanders off.")
                 return "diplomacy_success"
             else:
-                slow_print("The Wyrm is unimpressed and slaps you with al dente fury.")
-                player["health"] -= 6
+                await io.say("The Wyrm is unimpressed and slaps you with al dente fury.")
+                player["health"] -= DIPLOMACY_FAIL_DAMAGE
         else:
-            slow_print("Confusion. You slip on a noodle and lose 1 HP.")
-            player["health"] -= 1
+            await io.say("Confusion. You slip on a noodle and lose 1 HP.")
+            player["health"] -= CONFUSED_DAMAGE
 
         # Wyrm attacks occasionally
         if wyrm_hp > 0:
-            slow_print("The Wyrm lunges and smacks you with a saucy tail.")
-            player["health"] -= 3
-            slow_print(f"You have {max(player['health'],0)} HP left.")
+            await io.say("The Wyrm lunges and smacks you with a saucy tail.")
+            player["health"] -= WYRM_TAIL_DAMAGE
+            await io.say(f"You have {max(player['health'],0)} HP left.")
 
     if player["health"] <= 0:
-        slow_print("\nYou have been reduced to a puddle of regret and parmesan.")
+        await io.say("\nYou have been reduced to a puddle of regret and parmesan.")
         return "dead"
 
-    slow_print("\nThe Noodle Wyrm retreats in confusion. You win by baffling it.")
+    await io.say("\nThe Noodle Wyrm retreats in confusion. You win by baffling it.")
     return "wyrm_defeated"
 
 # ---------------------------
 # Endings & Replay
 # ---------------------------
-def ending_screen(reason_key):
-    # Map reason string to an ending message
-    mapping = {
-        "retreat": ENDINGS[0][0],
-        "dead": ENDINGS[1][0],
-        "wyrm_asleep": ENDINGS[2][0],
-        "blobbo_stare_win": ENDINGS[3][0],
-        "diplomacy_success": "You and the Wyrm open a small noodle bistro together. Business is okay.",
-        "wyrm_defeated": "You defeated the Wyrm through sheer nonsense and questionable bravery. The court of carbs is baffled."
-    }
-    message = mapping.get(reason_key, "You escaped in an oddly unsatisfying manner.")
-    slow_print("\n===== CHAOS DUNGEON ENDING =====")
-    slow_print(message)
-    slow_print("Blobbo: 'Wow. Choices were made.'")
-    slow_print("===============================\n")
+async def ending_screen(reason_key, io=CONSOLE, rng=random, ctx=None):
+    # Pick among the ending messages for this reason (ctx: situation() at the end)
+    ctx = dict(ctx or {}, key=reason_key)
+    message = CONTENT.text("endings", rng, ctx, default="You escaped in an oddly unsatisfying manner.")
+    await io.say("\n===== CHAOS DUNGEON ENDING =====")
+    await io.say(message)
+    await io.say("Blobbo: 'Wow. Choices were made.'")
+    await io.say("===============================\n")
 
 # ---------------------------
 # Intro & Companion
 # ---------------------------
-def game_intro():
-    ascii_title()
-    slow_print("You wake up wearing mismatched socks and holding a mysterious half-eaten burrito.\n")
-    slow_print("Two doors wobble in front of you like they're trying to vibe to music only they can hear.\n")
-    choice = input("Do you pick door (1) or door (2)? ").strip()
-    if choice == "1":
-        slow_print(random.choice([
-            "A raccoon in a wizard robe challenges you to rock-paper-scissors.",
-            "A time-traveling potato appears and demands tax documents.",
-            "A chicken riding a Roomba zooms past, screaming 'THE PROPHECY!'",
-            "You fall into a pit of marshmallows. They are sentient. They judge you."
-        ]))
-    else:
-        slow_print(random.choice([
-            "A disco-ball golem asks if you know how to dance the forbidden tango.",
-            "A goblin gives you a motivational speech about personal growth.",
-            "A swarm of bees forms into the shape of a middle finger.",
-            "You meet a ghost who's mad because someone ate his leftovers."
-        ]))
-
-    slow_print("\nAs the weirdness settles, a small blob creature oozes out of your burrito.")
-    slow_print(random.choice(COMPANION_DIALOGUE))
-    slow_print("\nBlobbo tries to climb onto your shoulder but falls off immediately for no reason.")
-    input("\nBlobbo stares at you intensely. Press ENTER to receive unwanted advice...")
-    slow_print(random.choice(BLOBBO_ADVICE))
+async def game_intro(io=CONSOLE, policy=HUMAN, rng=random):
+    await ascii_title(io)
+    await io.say("You wake up wearing mismatched socks and holding a mysterious half-eaten burrito.\n")
+    await io.say("Two doors wobble in front of you like they're trying to vibe to music only they can hear.\n")
+    choice = await policy.door("Do you pick door (1) or door (2)? ", rng)
+    await io.say(CONTENT.text("door_one" if choice == "1" else "door_two", rng))
+
+    await io.say("\nAs the weirdness settles, a small blob creature oozes out of your burrito.")
+    await io.say(CONTENT.text("companion_dialogue", rng))
+    await io.say("\nBlobbo tries to climb onto your shoulder but falls off immediately for no reason.")
+    await policy.advice("\nBlobbo stares at you intensely. Press ENTER to receive unwanted advice...", rng)
+    await io.say(CONTENT.text("blobbo_advice", rng))
 
 # ---------------------------
 # Main game flow (ties engine together)
 # ---------------------------
-def play_one_run():
+def run_sync(coro):
+    """Run a game coroutine whose io and policy never suspend (ConsoleIO, NullIO, bots)."""
+    try:
+        coro.send(None)
+    except StopIteration as done:
+        return done.value
+    coro.close()
+    raise RuntimeError("the game waited on its io; run it in an event loop instead")
+
+def play_one_run(io=CONSOLE, policy=HUMAN, rng=random):
+    """Play one run; returns (ending key, whether the Wyrm was reached, final HP)."""
+    return run_sync(play_one_run_async(io, policy, rng))
+
+async def play_one_run_async(io=CONSOLE, policy=HUMAN, rng=random):
+    """play_one_run() as a coroutine, for io that really waits (one task per player)."""
     player = create_player()
     blobbo = create_blobbo()
 
     # initial state
-    game_intro()
+    await game_intro(io, policy, rng)
 
     # Give the player's inventory the burrito (we keep it simple)
     if "half-eaten burrito" not in player["inventory"]:
         player["inventory"].insert(0, "half-eaten burrito")
 
     # Random rooms / wandering
-    result = random_room_sequence(player, blobbo)
+    result = await random_room_sequence(player, blobbo, io, policy, rng)
     if result == "dead":
-        ending_screen("dead")
-        return
+        await ending_screen("dead", io, rng, situation(player, blobbo))
+        return "dead", False, player["health"]
 
     # If the player retreated or dungeon forced boss, go to boss
-    slow_print("\nThe dungeon pulls you toward a final confrontation…")
-    boss_result = noodle_wyrm_battle(player, blobbo)
-
-    # Final handling / endings
-    if boss_result == "dead":
-        ending_screen("dead")
-    elif boss_result == "wyrm_asleep":
-        ending_screen("wyrm_asleep")
-    elif boss_result == "blobbo_stare_win":
-        ending_screen("blobbo_stare_win")
-    elif boss_result == "diplomacy_success":
-        ending_screen("diplomacy_success")
-    elif boss_result == "wyrm_defeated":
-        ending_screen("wyrm_defeated")
-    else:
-        ending_screen("retreat")
+    await io.say("\nThe dungeon pulls you toward a final confrontation…")
+    boss_result = await noodle_wyrm_battle(player, blobbo, io, policy, rng)
+
+    # Final handling / endings (every boss result has its own ending)
+    await ending_screen(boss_result, io, rng, situation(player, blobbo))
+    return boss_result, True, player["health"]
 
 # ---------------------------
 # Reusable Engine Hooks (for you)
 # ---------------------------
-# If you want to use this file as an engine in other scripts, call `play_one_run()`.
+# If you want to use this file as an engine in other scripts, call `play_one_run()`
+# (pass NullIO(), a Policy and a random.Random to play it without a human), or
+# await `play_one_run_async()` with an io of your own (chaos_server.py does).
 # You can override data by importing and changing ROOM, ENEMY, etc., or extend functions:
 # - Add new rooms to ROOMS
 # - Add enemies to SILLY_ENEMIES
+# - Or leave the code alone and write a content pack (see Content packs; --pack)
 # - Modify blobbo_evolve() to change evolution behavior
-# - Replace play_sound() with real audio playing implementation
+# - Replace play_sound() (or ConsoleIO.sound) with real audio playing implementation
 
 # ---------------------------
 # CLI / Replay loop
@@ -384,4 +917,17 @@ def main():
         slow_print("\n\nSession ended. Blobbo politely waves its appendage. Goodbye!")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chaos Dungeon")
+    parser.add_argument("--speed", type=float, default=TEXT_SPEED,
+                        help="text delay multiplier (0.5 = twice as fast, 0 = instant)")
+    parser.add_argument("--pack", action="append", default=[],
+                        help="content pack (.json, .jsonl or .toml) to add; repeatable")
+    parser.add_argument("--no-builtin", action="store_true",
+                        help="use only the packs' content, not the built-in lists")
+    args = parser.parse_args()
+    RENDERER.speed = args.speed
+    try:
+        load_packs(args.pack, builtin=not args.no_builtin)
+    except (OSError, ValueError) as exc:
+        parser.error(f"bad content pack: {exc}")
     main()
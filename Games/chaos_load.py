@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+chaos_load.py — load-test chaos_server.py with thousands of bot players
+
+    python chaos_server.py --speed 0 --stats 5 &
+    python chaos_load.py --sessions 2000 --rate 500 --think 0.5
+    python chaos_load.py --sessions 100 --games 3 --think 0 --seed 1
+
+Each bot is a coroutine with its own connection: it reads up to the server's IAC GA
+(end of prompt), answers the prompt like a random player would, and times how long
+the server takes from receiving the answer's line to finishing the next prompt.
+The report gives that per-message latency as percentiles, plus connect times and
+overall throughput. --think adds a random pause (0 to 2x) before each answer, so
+sessions overlap the way real players' do instead of hammering the server.
+"""
+
+import sys
+import time
+import random
+import asyncio
+import argparse
+
+from chaos_server import GA, PORT, raise_fd_limit
+
+# prompt text -> possible answers (first match wins)
+ANSWERS = (
+    ("door (1) or door (2)", ("1", "2")),
+    ("Press ENTER", ("",)),
+    ("Enter the next room", ("y",) * 6 + ("n",)),
+    ("Fight (f)", ("f", "f", "b", "i")),
+    ("(a) attack", ("a", "b", "c", "d")),
+)
+
+
+class Stats:
+    def __init__(self):
+        self.latency = []   # seconds from answer sent to the next prompt complete
+        self.connect = []
+        self.games = 0
+        self.done = 0
+        self.failed = 0
+        self.errors = {}
+        self.active = 0
+        self.peak = 0
+
+
+def answer(prompt, rng):
+    for text, choices in ANSWERS:
+        if text in prompt:
+            return rng.choice(choices)
+    return ""
+
+
+async def player(args, stats, rng):
+    started = time.perf_counter()
+    try:
+        reader, writer = await asyncio.open_connection(args.host, args.port)
+    except OSError as exc:
+        stats.failed += 1
+        stats.errors[type(exc).__name__] = stats.errors.get(type(exc).__name__, 0) + 1
+        return
+    stats.connect.append(time.perf_counter() - started)
+    stats.active += 1
+    stats.peak = max(stats.peak, stats.active)
+    games = 0
+    sent = None
+    try:
+        while True:
+            try:
+                data = await reader.readuntil(GA)
+            except asyncio.IncompleteReadError:
+                break  # the server said goodbye
+            if sent is not None:
+                stats.latency.append(time.perf_counter() - sent)
+            prompt = data[:-len(GA)].decode("utf-8", "replace").rsplit("\n", 1)[-1]
+            if "Play again" in prompt:
+                games += 1
+                stats.games += 1
+                reply = "y" if games < args.games else "n"
+            else:
+                reply = answer(prompt, rng)
+            if args.think:
+                await asyncio.sleep(rng.uniform(0, 2 * args.think))
+            writer.write(reply.encode() + b"\r\n")
+            sent = time.perf_counter()
+            await writer.drain()
+        stats.done += 1
+    except (OSError, asyncio.LimitOverrunError) as exc:
+        stats.failed += 1
+        stats.errors[type(exc).__name__] = stats.errors.get(type(exc).__name__, 0) + 1
+    finally:
+        stats.active -= 1
+        writer.close()
+
+
+def percentiles(values, label):
+    if not values:
+        return f"  {label:<10} (none)"
+    values.sort()
+    n = len(values)
+    at = lambda q: values[min(n - 1, int(q * n))] * 1000
+    return (f"  {label:<10} n {n:<9,} mean {sum(values) / n * 1000:7.2f}  p50 {at(0.5):7.2f}  p90 {at(0.9):7.2f}  "
+            f"p99 {at(0.99):7.2f}  p99.9 {at(0.999):7.2f}  max {values[-1] * 1000:7.2f} ms")
+
+
+async def run(args):
+    stats = Stats()
+    rng = random.Random(args.seed)
+    tasks = []
+    started = time.perf_counter()
+    for i in range(args.sessions):
+        tasks.append(asyncio.create_task(player(args, stats, random.Random(rng.random()))))
+        if args.rate:
+            await asyncio.sleep(1 / args.rate)
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+
+    print(f"{args.sessions} sessions in {elapsed:.1f}s: {stats.done} finished, {stats.failed} failed"
+          + (f" ({', '.join(f'{k} x{v}' for k, v in stats.errors.items())})" if stats.errors else "")
+          + f", peak {stats.peak} connected at once")
+    print(f"{stats.games} games, {len(stats.latency):,} messages ({len(stats.latency) / elapsed:,.0f}/s)")
+    print(percentiles(stats.latency, "message"))
+    print(percentiles(stats.connect, "connect"))
+    return 1 if stats.failed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test chaos_server.py with bot players")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--sessions", type=int, default=1000, help="bot players in total")
+    parser.add_argument("--rate", type=float, default=500, help="new connections per second (0 = all at once)")
+    parser.add_argument("--games", type=int, default=1, help="games each bot plays before leaving")
+    parser.add_argument("--think", type=float, default=0.5, help="mean seconds a bot waits before answering")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+    raise_fd_limit()
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
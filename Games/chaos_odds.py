@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+"""
+chaos_odds.py — exact ending probabilities for Chaos Dungeon, per policy and optimal
+
+    python chaos_odds.py                      # every bot policy, plus the best possible play
+    python chaos_odds.py --goal wyrm_asleep   # optimise for one ending instead of survival
+    python chaos_odds.py --check 100000       # compare against Monte Carlo runs
+
+A run is a Markov decision process. Room states are (HP, burrito, other items,
+Blobbo form, rooms entered); boss states are (HP, burrito, form, Wyrm HP).
+Encounters are deterministic once the enemy is drawn, so an encounter is just
+the set of (HP, burrito, items) it can end in. Boss fights are memoized
+recursion (HP only goes down). Room states are solved one Blobbo form at a
+time: an empty room that leads straight back is solved for, and only healing
+loops at Blobbo's final form need value iteration. A policy takes tens of
+milliseconds, best play a few hundred.
+
+The state is compact but exact where it matters: rooms entered only matter up to
+BOSS_MIN_ROOMS, and Blobbo's form only up to the point where evolving changes
+nothing (attack and stare chance both flat). Item count and HP are capped at
+ITEM_CAP and HP_CAP; only hoarders that heal past them notice.
+
+Policies are evaluated as deterministic functions of the state (they get rng=None),
+and see at most BOSS_MIN_ROOMS rooms entered.
+"""
+
+import sys
+import time
+import random
+import argparse
+from collections import Counter
+
+from chaos_dungeon_engine import (
+    SILLY_ENEMIES, ENCOUNTER_CHANCE, ITEM_CHANCE, BOSS_MIN_ROOMS, BOSS_CHANCE, ITEM_HEAL,
+    CONFUSED_DAMAGE, WYRM_HP, WYRM_TAIL_DAMAGE, NO_BURRITO_DAMAGE, STARE_FAIL_DAMAGE,
+    DIPLOMACY_CHANCE, DIPLOMACY_FAIL_DAMAGE, POLICIES, Policy, NullIO,
+    create_player, create_blobbo, blobbo_evolve, stare_chance, play_one_run, run_sync,
+)
+
+OUTCOMES = ("dead before the Wyrm", "dead", "wyrm_asleep", "blobbo_stare_win", "diplomacy_success", "wyrm_defeated")
+DEAD_EARLY, DEAD, ASLEEP, STARE, DIPLOMACY, DEFEATED = range(len(OUTCOMES))
+UNIT = [tuple(float(k == i) for k in range(len(OUTCOMES))) for i in range(len(OUTCOMES))]
+NOTHING = (0.0,) * len(OUTCOMES)
+
+ITEM_CAP = 6
+HP_CAP = 40
+TOLERANCE = 1e-12
+MAX_SWEEPS = 10_000
+
+BURRITO = "half-eaten burrito"
+
+
+def _mix(terms):
+    """[(probability, distribution)] -> distribution."""
+    out = [0.0] * len(OUTCOMES)
+    for p, dist in terms:
+        if p:
+            for k, v in enumerate(dist):
+                out[k] += p * v
+    return tuple(out)
+
+
+def blobbo_forms():
+    """Blobbo's attack per form (index 0 unused), up to the first form that never changes again."""
+    blobbo, io = create_blobbo(), NullIO()
+    attack = [None, blobbo["attack"]]
+    while len(attack) < 50:
+        form = blobbo["form"]
+        run_sync(blobbo_evolve(blobbo, io))
+        if blobbo["attack"] == attack[form] and min(1.0, stare_chance(form + 1)) == min(1.0, stare_chance(form)):
+            break
+        attack.append(blobbo["attack"])
+    return attack
+
+
+class Solver:
+    """Ending distribution of a run under `policy`, or under the best play for `goal` when policy is None.
+
+    goal weights each ending (default: 1 for every ending you survive).
+    """
+
+    def __init__(self, policy=None, goal=None):
+        self.policy = policy
+        self.goal = goal or tuple(0.0 if k in (DEAD_EARLY, DEAD) else 1.0 for k in range(len(OUTCOMES)))
+        player = create_player()
+        self.start_hp, self.player_atk = player["health"], player["attack"]
+        self.blobbo_atk = blobbo_forms()
+        self.form_cap = len(self.blobbo_atk) - 1
+        self.boss_memo = {}
+        self.fight_memo = {}
+        self.values = {}  # room state -> distribution of endings from there
+        self.after_memo = {}
+        self.solved_forms = set()
+        self.start = (self.start_hp, True, 0, 1, 0)
+
+    def score(self, dist):
+        return sum(w * p for w, p in zip(self.goal, dist))
+
+    def _best(self, options):
+        """(action, distribution) with the highest score."""
+        return max(options, key=lambda o: self.score(o[1]))
+
+    # the state as the engine's dicts, for asking a policy
+    def _player(self, hp, burrito, items):
+        return {"health": hp, "attack": self.player_atk, "name": "You",
+                "inventory": [BURRITO] * burrito + ["mystery key"] * items}
+
+    def _blobbo(self, form):
+        return {"name": "Blobbo", "form": form, "attack": self.blobbo_atk[form]}
+
+    # -----------------------------
+    # Boss fight
+    # -----------------------------
+    def boss(self, hp, burrito, form, wyrm=WYRM_HP):
+        key = (hp, burrito, form, wyrm)
+        dist = self.boss_memo.get(key)
+        if dist is None:
+            if self.policy is None:
+                _, dist = self._best((a, self.boss_action(hp, burrito, form, wyrm, a)) for a in "abcd")
+            else:
+                action = run_sync(self.policy.boss("", self._player(hp, burrito, 0), self._blobbo(form), wyrm, None))
+                dist = self.boss_action(hp, burrito, form, wyrm, action)
+            self.boss_memo[key] = dist
+        return dist
+
+    def boss_action(self, hp, burrito, form, wyrm, action):
+        def after(hp, wyrm, burrito):
+            if wyrm > 0:
+                hp -= WYRM_TAIL_DAMAGE
+            if hp <= 0:
+                return UNIT[DEAD]
+            if wyrm <= 0:
+                return UNIT[DEFEATED]
+            return self.boss(hp, burrito, form, wyrm)
+
+        if action == "a":
+            return after(hp, wyrm - self.player_atk, burrito)
+        if action == "b":
+            return UNIT[ASLEEP] if burrito else after(hp - NO_BURRITO_DAMAGE, wyrm, burrito)
+        if action == "c":
+            p = min(1.0, max(0.0, stare_chance(form)))
+            return _mix([(p, UNIT[STARE]), (1 - p, after(hp - STARE_FAIL_DAMAGE, wyrm, burrito) if p < 1 else NOTHING)])
+        if action == "d":
+            return _mix([(DIPLOMACY_CHANCE, UNIT[DIPLOMACY]),
+                         (1 - DIPLOMACY_CHANCE, after(hp - DIPLOMACY_FAIL_DAMAGE, wyrm, burrito))])
+        return after(hp - CONFUSED_DAMAGE, wyrm, burrito)
+
+    # -----------------------------
+    # Encounters
+    # -----------------------------
+    def fight_step(self, hp, burrito, items, form, enemy, enemy_hp, action):
+        """One round; returns (hp, burrito, items, enemy hp)."""
+        if action == "f":
+            enemy_hp -= self.player_atk
+        elif action == "b":
+            enemy_hp -= self.blobbo_atk[form]
+        elif action == "i":
+            if burrito:  # the burrito is always first in the inventory
+                burrito, hp = False, min(hp + ITEM_HEAL, HP_CAP)
+            elif items:
+                items, hp = items - 1, min(hp + ITEM_HEAL, HP_CAP)
+        else:
+            hp -= CONFUSED_DAMAGE
+        if enemy_hp > 0:
+            hp -= SILLY_ENEMIES[enemy]["attack"]
+        return hp, burrito, items, enemy_hp
+
+    def fight_actions(self, hp, burrito, items, form, enemy, enemy_hp):
+        if self.policy is None:
+            # using an item with none left only lets the enemy hit: never better than fighting
+            return "fbi" if burrito or items else "fb"
+        foe = dict(SILLY_ENEMIES[enemy], health=enemy_hp)
+        return (run_sync(self.policy.encounter("", self._player(hp, burrito, items), self._blobbo(form), foe, None)),)
+
+    def fight(self, hp, burrito, items, form, enemy, enemy_hp=None):
+        """Every (hp, burrito, items) the fight can end in (None: died), as a frozenset."""
+        if enemy_hp is None:
+            enemy_hp = SILLY_ENEMIES[enemy]["health"]
+        key = (hp, burrito, items, form, enemy, enemy_hp)
+        ends = self.fight_memo.get(key)
+        if ends is None:
+            ends = set()
+            for action in self.fight_actions(hp, burrito, items, form, enemy, enemy_hp):
+                h, b, i, e = self.fight_step(hp, burrito, items, form, enemy, enemy_hp, action)
+                if h <= 0:
+                    ends.add(None)
+                elif e <= 0:
+                    ends.add((h, b, i))
+                else:
+                    ends |= self.fight(h, b, i, form, enemy, e)
+            if self.policy is None:
+                # more HP, more items or still having the burrito never hurts, so best play
+                # only needs the ends nothing else beats on all three (and dies only if it must)
+                alive = [end for end in ends if end is not None]
+                if alive:
+                    ends = {end for end in alive
+                            if not any(o != end and o[0] >= end[0] and o[1] >= end[1] and o[2] >= end[2] for o in alive)}
+            ends = self.fight_memo[key] = frozenset(ends)
+        return ends
+
+    # -----------------------------
+    # Rooms
+    # -----------------------------
+    def after_room(self, hp, burrito, items, form, steps, me=None):
+        """(ending distribution, chance of coming straight back to room state me) once a
+        room's fight (if any) is over: maybe an item, then maybe the finale."""
+        key = (hp, burrito, items, form, steps)
+        cached = self.after_memo.get(key)
+        if cached is not None:
+            return cached
+        terms, back = [], 0.0
+        for found, p in ((True, ITEM_CHANCE), (False, 1 - ITEM_CHANCE)):
+            state = (hp, burrito, min(items + found, ITEM_CAP), form, steps)
+            if steps >= BOSS_MIN_ROOMS:
+                terms.append((p * BOSS_CHANCE, self.boss(hp, burrito, form)))
+                p *= 1 - BOSS_CHANCE
+            if state == me:
+                back += p
+            else:
+                terms.append((p, self.values.get(state, NOTHING)))
+        result = _mix(terms), back
+        if form in self.solved_forms:  # everything it depends on is final
+            self.after_memo[key] = result
+        return result
+
+    def outcome(self, end, form, steps, me=None):
+        if end is None:
+            return UNIT[DEAD_EARLY], 0.0
+        return self.after_room(*end, min(form + 1, self.form_cap), steps, me)
+
+    def enter(self, state):
+        """Ending distribution for entering the next room from room state `state`.
+
+        Paths straight back to `state` (an empty room, say) are solved for rather than
+        iterated: V = rest + back * V.
+        """
+        hp, burrito, items, form, steps = state
+        steps = min(steps + 1, BOSS_MIN_ROOMS)
+        p_enemy = ENCOUNTER_CHANCE / len(SILLY_ENEMIES)
+        dist, back = self.after_room(hp, burrito, items, form, steps, state)
+        terms = [(1 - ENCOUNTER_CHANCE, dist)]
+        back *= 1 - ENCOUNTER_CHANCE
+        here = self.score(self.values.get(state, NOTHING))
+        for enemy in range(len(SILLY_ENEMIES)):
+            options = [self.outcome(end, form, steps, state) for end in self.fight(hp, burrito, items, form, enemy)]
+            dist, b = max(options, key=lambda o: self.score(o[0]) + o[1] * here)
+            terms.append((p_enemy, dist))
+            back += p_enemy * b
+        if back >= 1:
+            return NOTHING  # wanders forever
+        return tuple(v / (1 - back) for v in _mix(terms))
+
+    def wants_to_enter(self, hp, burrito, items, form, steps):
+        return run_sync(self.policy.enter_room("", self._player(hp, burrito, items), self._blobbo(form), steps, None)) == "y"
+
+    def room(self, state):
+        """(choice, distribution) at a room prompt, from the current value estimates."""
+        hp, burrito, items, form, steps = state
+        if self.policy is None:
+            return self._best((("y", self.enter(state)), ("n", self.boss(hp, burrito, form))))
+        if self.wants_to_enter(*state):
+            return "y", self.enter(state)
+        return "n", self.boss(hp, burrito, form)
+
+    def successors(self, state):
+        hp, burrito, items, form, steps = state
+        if self.policy is not None and not self.wants_to_enter(*state):
+            return
+        steps = min(steps + 1, BOSS_MIN_ROOMS)
+        ends = {(hp, burrito, items, form)}
+        for enemy in range(len(SILLY_ENEMIES)):
+            ends.update(end + (min(form + 1, self.form_cap),)
+                        for end in self.fight(hp, burrito, items, form, enemy) if end is not None)
+        for hp, burrito, items, form in ends:
+            yield hp, burrito, items, form, steps
+            yield hp, burrito, min(items + 1, ITEM_CAP), form, steps
+
+    def solve(self):
+        """Ending distribution from the start of a run; fills self.values and self.choices."""
+        # every room state the run can reach
+        seen = {self.start}
+        todo = [self.start]
+        while todo:
+            for nxt in self.successors(todo.pop()):
+                if nxt not in seen:
+                    seen.add(nxt)
+                    todo.append(nxt)
+        # One Blobbo form at a time, most evolved first: a won fight always leads to the
+        # next form, and within a form an empty room only leads further in or to more items.
+        # So every form below the last is exact in one pass over this order; at the last
+        # form, healing in fights can loop, and that layer is iterated until it settles.
+        self.choices = {}
+        for form in range(self.form_cap, 0, -1):
+            layer = sorted((s for s in seen if s[3] == form), key=lambda s: (-s[4], -s[2], s[0], s[1]))
+            for _ in range(MAX_SWEEPS):
+                delta = 0.0
+                for state in layer:
+                    choice, dist = self.room(state)
+                    old = self.values.get(state, NOTHING)
+                    # best play converges in score; ties between choices can keep swapping endings
+                    if self.policy is None:
+                        delta = max(delta, abs(self.score(dist) - self.score(old)))
+                    else:
+                        delta = max(delta, max(abs(a - b) for a, b in zip(dist, old)))
+                    self.values[state] = dist
+                    self.choices[state] = choice
+                if delta < TOLERANCE or form < self.form_cap:
+                    break
+            self.solved_forms.add(form)
+        return self.values[self.start]
+
+
+class SolvedPolicy(Policy):
+    """Plays the choices of an optimal Solver (for checking the solver by simulation)."""
+    name = "optimal"
+
+    def __init__(self, solver):
+        self.solver = solver
+        self.steps = 0
+
+    async def enter_room(self, prompt, player, blobbo, steps, rng):
+        self.steps = min(steps, BOSS_MIN_ROOMS)
+        burrito, items = self._items(player)
+        state = (min(player["health"], HP_CAP), burrito, items, min(blobbo["form"], self.solver.form_cap), self.steps)
+        return self.solver.choices[state]
+
+    def _items(self, player):
+        inventory = player["inventory"]
+        return BURRITO in inventory, min(len(inventory) - (BURRITO in inventory), ITEM_CAP)
+
+    async def encounter(self, prompt, player, blobbo, enemy, rng):
+        s = self.solver
+        burrito, items = self._items(player)
+        form = min(blobbo["form"], s.form_cap)
+        steps = min(self.steps + 1, BOSS_MIN_ROOMS)
+        foe = next(k for k, e in enumerate(SILLY_ENEMIES) if e["name"] == enemy["name"])
+        hp = min(player["health"], HP_CAP)
+
+        def value(action):
+            h, b, i, e = s.fight_step(hp, burrito, items, form, foe, enemy["health"], action)
+            if h <= 0:
+                ends = {None}
+            elif e <= 0:
+                ends = {(h, b, i)}
+            else:
+                ends = s.fight(h, b, i, form, foe, e)
+            return max(s.score(s.outcome(end, form, steps)[0]) for end in ends)
+
+        return max(s.fight_actions(hp, burrito, items, form, foe, enemy["health"]), key=value)
+
+    async def boss(self, prompt, player, blobbo, wyrm_hp, rng):
+        s = self.solver
+        burrito = BURRITO in player["inventory"]
+        form = min(blobbo["form"], s.form_cap)
+        hp = min(player["health"], HP_CAP)
+        return max("abcd", key=lambda a: s.score(s.boss_action(hp, burrito, form, wyrm_hp, a)))
+
+
+def simulate(policy, runs, seed=0):
+    """Monte Carlo ending frequencies, labelled like OUTCOMES."""
+    io = NullIO()
+    counts = Counter()
+    for s in range(seed, seed + runs):
+        ending, boss, _ = play_one_run(io, policy, random.Random(s))
+        counts[ending if boss else OUTCOMES[DEAD_EARLY]] += 1
+    return tuple(counts[o] / runs for o in OUTCOMES)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exact Chaos Dungeon ending odds")
+    parser.add_argument("--goal", choices=("survive",) + OUTCOMES[2:], default="survive",
+                        help="what the optimal policy maximises")
+    parser.add_argument("--check", type=int, metavar="RUNS", help="also simulate RUNS runs per policy")
+    args = parser.parse_args()
+
+    goal = None if args.goal == "survive" else tuple(float(o == args.goal) for o in OUTCOMES)
+    print(f"{'policy':<8} {'ms':>7}  " + "  ".join(f"{o[:12]:>12}" for o in OUTCOMES))
+    worst = 0.0
+    for name in sorted(POLICIES) + ["optimal"]:
+        started = time.perf_counter()
+        solver = Solver(None if name == "optimal" else POLICIES[name](), goal)
+        dist = solver.solve()
+        elapsed = (time.perf_counter() - started) * 1000
+        print(f"{name:<8} {elapsed:>7.1f}  " + "  ".join(f"{p:>12.4%}" for p in dist))
+        if args.check:
+            policy = SolvedPolicy(solver) if name == "optimal" else POLICIES[name]()
+            sim = simulate(policy, args.check)
+            print(f"{'  sim':<8} {'':>7}  " + "  ".join(f"{p:>12.4%}" for p in sim))
+            # best play can mix endings any way among equally good choices; only its
+            # chance of reaching the goal is fixed
+            pairs = [(solver.score(dist), solver.score(sim))] if name == "optimal" else zip(dist, sim)
+            # in standard errors of a binomial frequency
+            for a, b in pairs:
+                worst = max(worst, abs(a - b) / max((max(a * (1 - a), 0.0) / args.check) ** 0.5, 1e-9))
+    if args.check:
+        print(f"largest gap between exact and simulated: {worst:.1f} standard errors")
+        return 0 if worst < 5 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
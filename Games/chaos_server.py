@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+chaos_server.py — host Chaos Dungeon for many players at once over telnet
+
+    python chaos_server.py                      # then: telnet localhost 2323
+    python chaos_server.py --port 4000 --speed 0 --pack packs/goblins.jsonl
+    python chaos_load.py --sessions 2000        # load test (see chaos_load.py)
+
+Every connection is one coroutine running chaos_dungeon_engine.play_one_run_async()
+with its own SessionIO, HumanPolicy and random.Random; nothing about a session
+lives in globals, so a single process on one core serves thousands of players.
+
+The protocol is plain telnet-style lines: text goes out with CRLF line ends and
+every prompt is followed by IAC GA ("go ahead"), which telnet clients ignore and
+bots (chaos_load.py) use to know the server is waiting for an answer.
+"""
+
+import re
+import sys
+import time
+import random
+import asyncio
+import argparse
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from chaos_dungeon_engine import HumanPolicy, TextRenderer, TEXT_SPEED, play_one_run_async, load_packs
+
+PORT = 2323
+IDLE_TIMEOUT = 600.0  # seconds a session may sit at a prompt
+MAX_SESSIONS = 10_000
+STATS_EVERY = 10.0    # seconds between status lines (0 = quiet)
+
+GA = b"\xff\xf9"                                   # IAC GA: end of a prompt
+TELNET_COMMAND = re.compile(rb"\xff[\xfb-\xfe].|\xff[\xf0-\xfa]")  # negotiation noise from clients
+
+
+class SessionIO:
+    """One player's io over a socket: CRLF text out, IAC GA after prompts, lines in."""
+
+    def __init__(self, reader, writer, speed=TEXT_SPEED, idle=IDLE_TIMEOUT):
+        self.reader = reader
+        self.writer = writer
+        self.idle = idle
+        self.renderer = TextRenderer(self, speed)
+        self.answers = 0
+
+    # file-like, for the typewriter
+    def write(self, text):
+        self.writer.write(text.replace("\n", "\r\n").encode())
+
+    def flush(self):
+        pass
+
+    async def say(self, text, delay=0.02):
+        await self.renderer.render_async(text, delay)
+        await self.writer.drain()
+
+    async def show(self, text):
+        self.write(text + "\n")
+        await self.writer.drain()
+
+    async def sound(self, effect_name):
+        await self.show(f"*sound effect: {effect_name}*")
+
+    async def ask(self, prompt):
+        """The player's next line; EOFError if they hang up, TimeoutError if they wander off."""
+        self.write(prompt)
+        self.writer.write(GA)
+        await self.writer.drain()
+        try:
+            line = await asyncio.wait_for(self.reader.readline(), self.idle)
+        except ValueError:  # an over-long line
+            raise EOFError("line too long")
+        if not line:
+            raise EOFError("connection closed")
+        self.answers += 1
+        return TELNET_COMMAND.sub(b"", line).decode("utf-8", "replace").rstrip("\r\n")
+
+
+class Server:
+    """Accepts players and plays one game loop per connection."""
+
+    def __init__(self, speed=TEXT_SPEED, idle=IDLE_TIMEOUT, max_sessions=MAX_SESSIONS, seed=None):
+        self.speed = speed
+        self.idle = idle
+        self.max_sessions = max_sessions
+        self.seed = seed
+        self.active = 0
+        self.peak = 0
+        self.total = 0
+        self.finished_answers = 0
+        self.sessions = set()
+
+    async def session(self, reader, writer):
+        if self.active >= self.max_sessions:
+            writer.write(b"The dungeon is full. Blobbo suggests trying again later.\r\n")
+            writer.close()
+            return
+        self.total += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        io = SessionIO(reader, writer, self.speed, self.idle)
+        self.sessions.add(io)
+        rng = random.Random(None if self.seed is None else self.seed + self.total)
+        try:
+            await play_session(io, HumanPolicy(io), rng)
+        except asyncio.TimeoutError:
+            await self._goodbye(io, "\n\nBlobbo got bored waiting and wandered off. Goodbye!")
+        except (EOFError, ConnectionError):
+            pass
+        finally:
+            self.active -= 1
+            self.sessions.discard(io)
+            self.finished_answers += io.answers
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    @staticmethod
+    async def _goodbye(io, text):
+        try:
+            await io.show(text)
+        except ConnectionError:
+            pass
+
+    def answers(self):
+        return self.finished_answers + sum(io.answers for io in self.sessions)
+
+    async def report(self, every):
+        last, started = 0, time.monotonic()
+        while True:
+            await asyncio.sleep(every)
+            now, answers = time.monotonic(), self.answers()
+            print(f"{time.strftime('%H:%M:%S')} sessions {self.active} (peak {self.peak}, total {self.total}), "
+                  f"{(answers - last) / (now - started):,.0f} answers/s", flush=True)
+            last, started = answers, now
+
+
+async def play_session(io, policy, rng):
+    """chaos_dungeon_engine.main() for one connection: runs until the player stops."""
+    while True:
+        await play_one_run_async(io, policy, rng)
+        again = (await io.ask("\nPlay again? (y/n): ")).lower().strip()
+        if again != "y":
+            await io.say("\nThanks for playing Chaos Dungeon! Farewell, brave burrito-bearer.")
+            return
+        await io.say("\n--- RESTARTING THE CHAOS ---\n")
+
+
+def raise_fd_limit():
+    """Lift the open-files soft limit to the hard limit (each session is a socket)."""
+    if resource is None:
+        return None
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard == resource.RLIM_INFINITY or soft < hard:
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+            soft = hard
+        except (ValueError, OSError):
+            pass
+    return soft
+
+
+async def serve(args):
+    server = Server(args.speed, args.idle, args.max_sessions, args.seed)
+    listener = await asyncio.start_server(server.session, args.host, args.port, backlog=args.backlog)
+    print(f"Chaos Dungeon on {', '.join(str(s.getsockname()[:2]) for s in listener.sockets)} "
+          f"(open files limit {raise_fd_limit()})", flush=True)
+    reporter = asyncio.create_task(server.report(args.stats)) if args.stats else None  # held so it is not collected
+    async with listener:
+        await listener.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve Chaos Dungeon to many telnet players at once")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--speed", type=float, default=TEXT_SPEED,
+                        help="text delay multiplier (0 = instant; use 0 for load tests)")
+    parser.add_argument("--pack", action="append", default=[], help="content pack to add; repeatable")
+    parser.add_argument("--idle", type=float, default=IDLE_TIMEOUT, help="seconds before an idle player is dropped")
+    parser.add_argument("--max-sessions", type=int, default=MAX_SESSIONS)
+    parser.add_argument("--backlog", type=int, default=1024, help="listen backlog, for connection bursts")
+    parser.add_argument("--seed", type=int, help="seed session n with seed + n (reproducible test runs)")
+    parser.add_argument("--stats", type=float, default=STATS_EVERY, help="seconds between status lines (0 = off)")
+    args = parser.parse_args()
+    try:
+        load_packs(args.pack)
+    except (OSError, ValueError) as exc:
+        parser.error(f"bad content pack: {exc}")
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        print("\nServer stopped. Blobbo locks the door behind everyone.")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+chaos_sim.py — play Chaos Dungeon runs headless with bot policies, for balancing
+
+    python chaos_sim.py --runs 1000000
+    python chaos_sim.py --runs 200000 --policy blobbo burrito --workers 4
+    python chaos_sim.py --runs 1000 --seed 500 --workers 1
+    python chaos_sim.py --runs 100000 --pack packs/goblins.jsonl
+
+Run i uses random.Random(--seed + i), so any single run can be replayed with
+chaos_dungeon_engine.play_one_run(ConsoleIO(), POLICIES[name](), random.Random(seed)).
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+from collections import Counter
+from multiprocessing import Pool
+
+import chaos_dungeon_engine
+from chaos_dungeon_engine import play_one_run, NullIO, POLICIES
+
+CHUNK = 5000  # runs per worker task; results come back already tallied
+
+
+def run_chunk(task):
+    """Worker: play seeds [start, stop) with one policy; returns (ending Counter, final HP Counter)."""
+    name, start, stop = task
+    io, policy = NullIO(), POLICIES[name]()
+    endings = Counter()
+    hp = Counter()
+    for seed in range(start, stop):
+        ending, boss, health = play_one_run(io, policy, random.Random(seed))
+        endings[ending if boss or ending != "dead" else "dead before the Wyrm"] += 1
+        hp[max(health, 0)] += 1
+    return endings, hp
+
+
+def report(name, runs, endings, hp, elapsed):
+    print(f"\n{name}: {runs} runs in {elapsed:.2f}s ({runs / elapsed:,.0f} runs/s)")
+    for ending, n in endings.most_common():
+        print(f"  {ending:<22} {n:>9}  {n / runs:6.1%}")
+    values = sorted(hp.elements())
+    print(f"  final HP  mean {sum(values) / runs:.1f}  median {values[runs // 2]}  "
+          f"p10 {values[runs // 10]}  p90 {values[runs * 9 // 10]}  max {values[-1]}")
+    # coarse histogram, 5 HP per bucket
+    buckets = Counter()
+    for health, n in hp.items():
+        buckets[health // 5] += n
+    for b in sorted(buckets):
+        print(f"  {b * 5:>3}-{b * 5 + 4:<3} {buckets[b] / runs:6.1%} {'#' * round(40 * buckets[b] / runs)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo runs of Chaos Dungeon with bot policies")
+    parser.add_argument("--runs", type=int, default=100_000, help="runs per policy")
+    parser.add_argument("--policy", nargs="+", choices=sorted(POLICIES), default=sorted(POLICIES))
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first run")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunk", type=int, default=CHUNK, help="runs per worker task")
+    parser.add_argument("--pack", action="append", default=[], help="content pack to play with; repeatable")
+    args = parser.parse_args()
+
+    try:
+        chaos_dungeon_engine.load_packs(args.pack)  # fail here, not in every worker
+    except (OSError, ValueError) as exc:
+        parser.error(f"bad content pack: {exc}")
+    with Pool(args.workers, chaos_dungeon_engine.load_packs, (args.pack,)) as pool:
+        for name in args.policy:
+            tasks = [(name, s, min(s + args.chunk, args.seed + args.runs))
+                     for s in range(args.seed, args.seed + args.runs, args.chunk)]
+            endings = Counter()
+            hp = Counter()
+            started = time.monotonic()
+            for chunk_endings, chunk_hp in pool.imap_unordered(run_chunk, tasks):
+                endings.update(chunk_endings)
+                hp.update(chunk_hp)
+            report(name, args.runs, endings, hp, time.monotonic() - started)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
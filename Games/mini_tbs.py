@@ -1,11 +1,13 @@
 #!/usr/bin/env python3
 """
 mini_tbs.py — Mini Turn-Based Strategy prototype using Pygame
-- Single-file prototype
+- Pygame front end; rules and AI live in tbs_logic.py (tbs_sim.py runs battles headless)
 - Click to select units
 - Click a reachable tile to move; click an enemy in range to attack
 - Press SPACE to end player turn
 - Simple enemy AI moves toward nearest player and attacks if possible
+  (--ai search: time-budgeted alpha-beta from tbs_search.py, run in a worker process)
+- --record PATH keeps a replay log of the current battle (tbs_replay.py verifies and times them)
 
 Author: ChatGPT (tailored for you)
 Run: python mini_tbs.py
@@ -13,16 +15,20 @@ Run: python mini_tbs.py
 
 import pygame
 import sys
-import math
-import random
-from collections import deque
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from tbs_logic import Battle, MAP_W, MAP_H
+from tbs_search import plan_turn, TURN_BUDGET
+from tbs_replay import Recorder
 
 # -----------------------------
 # CONFIG
 # -----------------------------
 TILE_SIZE = 64
-MAP_W, MAP_H = 10, 8
-SCREEN_W, SCREEN_H = TILE_SIZE * MAP_W, TILE_SIZE * MAP_H + 100  # extra for HUD
+VIEW_W, VIEW_H = 10, 8  # tiles on screen; bigger maps scroll with the arrow keys
+HUD_H = 100
 FPS = 60
 
 # Colors
@@ -37,393 +43,332 @@ YELLOW = (220, 200, 60)
 DARK = (30, 30, 30)
 TILE_HIGHLIGHT = (120, 220, 180, 120)
 
-# -----------------------------
-# Simple Data Classes
-# -----------------------------
-class Unit:
-    def __init__(self, x, y, team, name="Soldier", hp=10, atk=4, mov=3, range_=1):
-        self.x = x
-        self.y = y
-        self.team = team  # "player" or "enemy"
-        self.name = name
-        self.max_hp = hp
-        self.hp = hp
-        self.atk = atk
-        self.mov = mov
-        self.range = range_
-        self.has_moved = False
-        self.has_acted = False
-
-    def pos(self):
-        return (self.x, self.y)
-
-    def alive(self):
-        return self.hp > 0
-
-class Tile:
-    def __init__(self, x, y, passable=True, cost=1):
-        self.x = x
-        self.y = y
-        self.passable = passable
-        self.cost = cost
+SCROLL_KEYS = {pygame.K_LEFT: (-1, 0), pygame.K_RIGHT: (1, 0), pygame.K_UP: (0, -1), pygame.K_DOWN: (0, 1)}
 
-# -----------------------------
-# Utility functions
-# -----------------------------
-def in_bounds(x, y):
-    return 0 <= x < MAP_W and 0 <= y < MAP_H
-
-def manhattan(a, b):
-    return abs(a[0] - b[0]) + abs(a[1] - b[1])
-
-# BFS to compute reachable tiles (simple movement range)
-def compute_reachable(start, game_map, units, mov):
-    sx, sy = start
-    visited = {}
-    q = deque()
-    visited[(sx, sy)] = 0
-    q.append((sx, sy))
-    occupied = {u.pos() for u in units if u.alive()}
-
-    while q:
-        x, y = q.popleft()
-        cost = visited[(x, y)]
-        for dx, dy in ((1,0),(-1,0),(0,1),(0,-1)):
-            nx, ny = x+dx, y+dy
-            if not in_bounds(nx, ny): 
-                continue
-            tile = game_map[ny][nx]
-            if not tile.passable:
-                continue
-            new_cost = cost + tile.cost
-            if new_cost > mov:
-                continue
-            # Treat occupied tiles as non-passable except the start tile
-            if (nx, ny) in occupied and (nx, ny) != start:
-                continue
-            if (nx, ny) not in visited or new_cost < visited[(nx, ny)]:
-                visited[(nx, ny)] = new_cost
-                q.append((nx, ny))
-    return set(visited.keys())
-
-# Simple path finder (BFS) returns path as list of coords from start->target inclusive
-def find_path(start, target, game_map, units):
-    sx, sy = start
-    tx, ty = target
-    occupied = {u.pos() for u in units if u.alive() and u.pos() != start}
-    q = deque()
-    q.append((sx, sy))
-    came_from = { (sx, sy): None }
-    while q:
-        x, y = q.popleft()
-        if (x, y) == (tx, ty):
-            break
-        for dx, dy in ((1,0),(-1,0),(0,1),(0,-1)):
-            nx, ny = x+dx, y+dy
-            if not in_bounds(nx, ny): continue
-            tile = game_map[ny][nx]
-            if not tile.passable: continue
-            if (nx, ny) in occupied: continue
-            if (nx, ny) not in came_from:
-                came_from[(nx, ny)] = (x, y)
-                q.append((nx, ny))
-    if (tx, ty) not in came_from:
-        return None  # no path
-    # reconstruct
-    path = []
-    cur = (tx, ty)
-    while cur is not None:
-        path.append(cur)
-        cur = came_from[cur]
-    path.reverse()
-    return path
+_planner = None
+
+def planner():
+    """One worker process for the search AI, kept across restarts."""
+    global _planner
+    if _planner is None:
+        # spawn rather than fork: the parent has an SDL window open
+        _planner = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+    return _planner
 
 # -----------------------------
 # Game class
 # -----------------------------
 class Game:
-    def __init__(self):
+    def __init__(self, seed=None, width=MAP_W, height=MAP_H, army=0, fog=True, ai="greedy", budget=TURN_BUDGET,
+                 record=None):
         pygame.init()
-        self.screen = pygame.display.set_mode((SCREEN_W, SCREEN_H))
+        self.battle_args = {"seed": seed, "width": width, "height": height, "army": army, "fog": fog}
+        self.ai = ai
+        self.budget = budget
+        self.record = record  # replay log path; each new battle overwrites it
+        self.recorder = None
+        self.pending = None  # enemy plan being computed by the search worker
+        self.view_w, self.view_h = min(VIEW_W, width), min(VIEW_H, height)
+        self.screen_w = self.view_w * TILE_SIZE
+        self.screen = pygame.display.set_mode((self.screen_w, self.view_h * TILE_SIZE + HUD_H))
         pygame.display.set_caption("Mini TBS — Blobbo Edition (Pygame prototype)")
         self.clock = pygame.time.Clock()
         self.font = pygame.font.SysFont("Consolas", 18)
         self.bigfont = pygame.font.SysFont("Consolas", 32, bold=True)
 
-        # create map: simple open map with some obstacles
-        self.map = [[Tile(x, y) for x in range(MAP_W)] for y in range(MAP_H)]
-        # randomly add some obstacles for variety
-        for _ in range(int(MAP_W * MAP_H * 0.08)):
-            rx = random.randrange(MAP_W)
-            ry = random.randrange(MAP_H)
-            self.map[ry][rx].passable = False
-
-        # units
-        self.units = []
-        # player units (left side)
-        self.units.append(Unit(1, 1, "player", name="Thorn", hp=14, atk=5, mov=4, range_=1))
-        self.units.append(Unit(1, 3, "player", name="Caterina", hp=12, atk=4, mov=5, range_=1))
-        # enemy units (right side)
-        self.units.append(Unit(MAP_W-2, 2, "enemy", name="Goblin", hp=10, atk=3, mov=3, range_=1))
-        self.units.append(Unit(MAP_W-2, 5, "enemy", name="Squire", hp=12, atk=4, mov=3, range_=1))
-
-        # turn management
-        self.turn = "player"  # or "enemy"
+        # render caches
+        self.highlight = pygame.Surface((TILE_SIZE, TILE_SIZE), pygame.SRCALPHA)
+        self.highlight.fill((120, 220, 180, 90))
+        self.fog = pygame.Surface((TILE_SIZE, TILE_SIZE), pygame.SRCALPHA)
+        self.fog.fill((0, 0, 0, 140))
+        self.labels = {}
+        instr = "Click player unit to select → click tile to move → click enemy to attack. SPACE to end turn."
+        self.instructions = self.font.render(instr, True, GRAY)
+        pygame.key.set_repeat(250, 40)
+        # nothing animates, so only input and the enemy-turn timer need to wake the loop
+        pygame.event.set_blocked(pygame.MOUSEMOTION)
+        self.running = True
+        self.new_battle()
+
+    def new_battle(self):
+        """Start (or restart with R) a battle; the window, fonts and caches are kept."""
+        pygame.time.set_timer(pygame.USEREVENT + 1, 0)
+        self.pending = None  # a plan still being searched belongs to the old battle
+        if self.recorder:
+            self.recorder.close()
+            self.recorder = None
+
+        # rules and state live in tbs_logic.Battle; this class only draws it and reads input
+        self.battle = Battle(**self.battle_args)
+        if self.record:
+            self.recorder = Recorder(self.record, self.battle)
+
+        # UI state
         self.selected_unit = None
         self.reachable = set()
         self.path_preview = []
-        self.message = "Click one of your units to select it. SPACE to end turn."
-        self.running = True
-
-    def get_unit_at(self, x, y):
-        for u in self.units:
-            if u.alive() and (u.x, u.y) == (x, y):
-                return u
-        return None
+        self.battle.message = "Click one of your units to select it. SPACE to end turn."
+        self.cam = (0, 0)  # map tile shown in the top-left corner
+        self.center_on(self.battle.team("player")[0])
+        self.reset_view()
+        self.idle = False
 
     def world_to_grid(self, px, py):
-        gx = px // TILE_SIZE
-        gy = py // TILE_SIZE
+        gx = px // TILE_SIZE + self.cam[0]
+        gy = py // TILE_SIZE + self.cam[1]
         return gx, gy
 
     def grid_to_world(self, gx, gy):
-        return gx * TILE_SIZE, gy * TILE_SIZE
+        return (gx - self.cam[0]) * TILE_SIZE, (gy - self.cam[1]) * TILE_SIZE
+
+    def visible_tiles(self):
+        cx, cy = self.cam
+        for y in range(cy, cy + self.view_h):
+            for x in range(cx, cx + self.view_w):
+                yield x, y
+
+    def scroll_to(self, cx, cy):
+        board = self.battle.board
+        cam = (max(0, min(cx, board.w - self.view_w)), max(0, min(cy, board.h - self.view_h)))
+        if cam != self.cam:
+            self.cam = cam
+            self.reset_view()
+
+    def center_on(self, unit):
+        self.scroll_to(unit.x - self.view_w // 2, unit.y - self.view_h // 2)
 
     def select_unit(self, unit):
-        if unit and unit.team == self.turn and unit.alive():
+        battle = self.battle
+        if unit and unit.team == battle.turn and unit.alive():
             self.selected_unit = unit
-            self.reachable = compute_reachable(unit.pos(), self.map, self.units, unit.mov if not unit.has_moved else 0)
+            self.reachable = battle.reachable(unit)
             self.path_preview = []
-            self.message = f"Selected {unit.name} (HP:{unit.hp} ATK:{unit.atk} MOV:{unit.mov})"
+            battle.message = f"Selected {unit.name} (HP:{unit.hp} ATK:{unit.atk} MOV:{unit.mov})"
         else:
             self.selected_unit = None
             self.reachable = set()
             self.path_preview = []
-            self.message = "No selectable unit there."
+            battle.message = "No selectable unit there."
 
     def handle_player_click(self, gx, gy):
-        if self.turn != "player":
+        battle = self.battle
+        if battle.turn != "player":
             return
-        clicked_unit = self.get_unit_at(gx, gy)
+        clicked_unit = battle.get_unit_at(gx, gy)
         if clicked_unit and clicked_unit.team == "player":
             # select/deselect
             self.select_unit(clicked_unit)
             return
 
         if not self.selected_unit:
-            self.message = "Select a unit first."
+            battle.message = "Select a unit first."
             return
 
         # If clicked on reachable tile -> attempt to move
         if (gx, gy) in self.reachable:
-            path = find_path(self.selected_unit.pos(), (gx, gy), self.map, self.units)
-            if path:
-                # Move the unit along path (instant)
-                self.selected_unit.x, self.selected_unit.y = gx, gy
-                self.selected_unit.has_moved = True
-                self.reachable = compute_reachable(self.selected_unit.pos(), self.map, self.units, 0)  # can't move again
+            if battle.move(self.selected_unit, gx, gy):
+                self.reachable = battle.reachable(self.selected_unit)  # can't move again
                 self.path_preview = []
-                self.message = f"{self.selected_unit.name} moved to {gx},{gy}."
         else:
             # If clicked on enemy in attack range -> attack
-            target = self.get_unit_at(gx, gy)
+            target = battle.get_unit_at(gx, gy)
             if target and target.team != self.selected_unit.team:
-                dist = manhattan(self.selected_unit.pos(), target.pos())
-                if dist <= self.selected_unit.range:
-                    # attack
-                    damage = self.selected_unit.atk
-                    target.hp -= damage
-                    self.selected_unit.has_acted = True
-                    self.message = f"{self.selected_unit.name} attacked {target.name} for {damage} dmg!"
-                    if target.hp <= 0:
-                        self.message += f" {target.name} falls!"
-                else:
-                    self.message = "Target out of range."
+                battle.attack(self.selected_unit, target)
             else:
-                self.message = "Can't move/attack there."
+                battle.message = "Can't move/attack there."
 
     def end_player_turn(self):
-        # reset movement/actions for enemy units before switching
-        for u in self.units:
-            u.has_moved = False
-            u.has_acted = False
-        self.turn = "enemy"
+        self.battle.end_turn()
         self.selected_unit = None
         self.reachable = set()
-        self.message = "Enemy turn..."
+        self.battle.message = "Enemy turn..."
         pygame.time.set_timer(pygame.USEREVENT + 1, 500)  # schedule enemy actions
 
-    # Very basic enemy AI: for each enemy, find nearest player, path toward them and attack if in range
     def enemy_phase(self):
-        enemies = [u for u in self.units if u.team == "enemy" and u.alive()]
-        players = [u for u in self.units if u.team == "player" and u.alive()]
-        if not enemies or not players:
-            self.turn = "player"
-            self.message = "Player turn."
+        if self.ai == "search":
+            # plan in the worker so the window keeps drawing while the enemy thinks
+            self.pending = planner().submit(plan_turn, self.battle, self.budget)
+            self.battle.message = "Enemy is thinking..."
             return
+        self.battle.ai_turn()
+        self.battle.message += " Player turn."
 
-        for e in enemies:
-            if not players:
-                break
-            # find nearest player
-            players_alive = [p for p in players if p.alive()]
-            if not players_alive:
-                break
-            target = min(players_alive, key=lambda p: manhattan(e.pos(), p.pos()))
-            # if in range, attack
-            if manhattan(e.pos(), target.pos()) <= e.range:
-                target.hp -= e.atk
-                self.message = f"{e.name} attacked {target.name} for {e.atk}!"
-                if target.hp <= 0:
-                    self.message += f" {target.name} falls!"
-            else:
-                # move toward target one step at a time up to mov
-                for _ in range(e.mov):
-                    # choose neighbor that reduces distance and is passable/unoccupied
-                    best = None
-                    bestd = manhattan(e.pos(), target.pos())
-                    for dx, dy in ((1,0),(-1,0),(0,1),(0,-1)):
-                        nx, ny = e.x + dx, e.y + dy
-                        if not in_bounds(nx, ny): continue
-                        tile = self.map[ny][nx]
-                        if not tile.passable: continue
-                        if self.get_unit_at(nx, ny) is not None: continue
-                        d = manhattan((nx, ny), target.pos())
-                        if d < bestd:
-                            bestd = d
-                            best = (nx, ny)
-                    if best:
-                        e.x, e.y = best
-                    else:
-                        break
-                # After moving, if now in range, attack
-                if target.alive() and manhattan(e.pos(), target.pos()) <= e.range:
-                    target.hp -= e.atk
-                    self.message = f"{e.name} moved and attacked {target.name} for {e.atk}!"
-                    if target.hp <= 0:
-                        self.message += f" {target.name} falls!"
-
-        # After enemy actions, switch back
-        self.turn = "player"
-        # reset player unit moved/acted flags for next player turn
-        for p in self.units:
-            if p.team == "player":
-                p.has_moved = False
-                p.has_acted = False
-        self.message += " Player turn."
-
-    def update(self, dt):
-        # cleanup dead units
-        for u in self.units:
-            if u.hp <= 0:
-                u.hp = 0
-
-    def draw(self):
-        self.screen.fill(DARK)
-        # draw grid
-        for y in range(MAP_H):
-            for x in range(MAP_W):
-                tile = self.map[y][x]
-                rect = pygame.Rect(x*TILE_SIZE, y*TILE_SIZE, TILE_SIZE, TILE_SIZE)
-                color = LIGHT_GRAY if tile.passable else (100,100,100)
-                pygame.draw.rect(self.screen, color, rect)
-                pygame.draw.rect(self.screen, BLACK, rect, 1)
-
-        # highlight reachable tiles if unit selected
-        if self.selected_unit:
-            s = self.selected_unit
-            for (gx, gy) in self.reachable:
-                rect = pygame.Rect(gx*TILE_SIZE, gy*TILE_SIZE, TILE_SIZE, TILE_SIZE)
-                surf = pygame.Surface((TILE_SIZE, TILE_SIZE), pygame.SRCALPHA)
-                surf.fill((120, 220, 180, 90))
-                self.screen.blit(surf, rect.topleft)
-
-        # draw units
-        for u in self.units:
-            if not u.alive():
-                continue
-            wx, wy = self.grid_to_world(u.x, u.y)
+    def poll_planner(self):
+        if self.pending is None or not self.pending.done():
+            return
+        plan = self.pending.result()
+        self.pending = None
+        self.battle.message = "Enemy turn..."
+        if plan is None:
+            self.battle.ai_turn()  # no player in sight: the greedy AI goes exploring
+        else:
+            self.battle.apply_plan(plan)
+        self.battle.message += " Player turn."
+
+    # -----------------------------
+    # Rendering: cached layers + dirty rects
+    # -----------------------------
+    def reset_view(self):
+        """Cache the terrain under the camera and force one full redraw (new battle or scroll)."""
+        self.terrain = pygame.Surface((self.view_w * TILE_SIZE, self.view_h * TILE_SIZE)).convert()
+        board = self.battle.board
+        for x, y in self.visible_tiles():
+            rect = pygame.Rect(*self.grid_to_world(x, y), TILE_SIZE, TILE_SIZE)
+            color = LIGHT_GRAY if board.passable(x, y) else (100,100,100)
+            pygame.draw.rect(self.terrain, color, rect)
+            pygame.draw.rect(self.terrain, BLACK, rect, 1)
+        self.tile_sigs = {}  # pos -> what was last painted over the terrain there
+        self.hud_key = None
+        self.full_redraw = True
+
+    def tile_signatures(self):
+        """(highlighted, unit look, fogged) for every on-screen tile that shows more than bare terrain."""
+        sigs = {}
+        board = self.battle.board
+        reachable = self.reachable if self.selected_unit else ()
+        seen = self.battle.visibility("player")
+        for pos in self.visible_tiles():
+            fogged = seen is not None and not seen[board.index(*pos)]
+            u = board.unit_at(*pos)
+            if u and fogged:
+                u = None  # enemies out of sight stay hidden
+            look = (u.team, u.name[0], u.hp, u.max_hp, u is self.selected_unit) if u else None
+            if look or fogged or pos in reachable:
+                sigs[pos] = (pos in reachable, look, fogged)
+        return sigs
+
+    def draw_tile(self, pos, sig):
+        wx, wy = self.grid_to_world(*pos)
+        rect = pygame.Rect(wx, wy, TILE_SIZE, TILE_SIZE)
+        self.screen.blit(self.terrain, rect, rect)
+        if sig is None:
+            return rect
+        highlighted, look, fogged = sig
+        if fogged:
+            self.screen.blit(self.fog, rect)
+        if highlighted:
+            self.screen.blit(self.highlight, rect)
+        if look:
+            team, letter, hp, max_hp, selected = look
             u_rect = pygame.Rect(wx+6, wy+6, TILE_SIZE-12, TILE_SIZE-12)
-            color = BLUE if u.team == "player" else RED
+            color = BLUE if team == "player" else RED
             pygame.draw.rect(self.screen, color, u_rect, border_radius=6)
             # health bar
-            hp_ratio = u.hp / max(1, u.max_hp)
+            hp_ratio = hp / max(1, max_hp)
             hb_rect = pygame.Rect(wx+6, wy+TILE_SIZE-14, int((TILE_SIZE-12)*hp_ratio), 8)
             pygame.draw.rect(self.screen, GREEN, hb_rect)
             # unit label
-            label = self.font.render(u.name[0], True, WHITE)
+            label = self.labels.get(letter)
+            if label is None:
+                label = self.labels[letter] = self.font.render(letter, True, WHITE)
             self.screen.blit(label, (wx+TILE_SIZE//2-6, wy+TILE_SIZE//2-12))
 
             # selection ring
-            if self.selected_unit == u:
+            if selected:
                 pygame.draw.rect(self.screen, YELLOW, u_rect, 3, border_radius=6)
-
-        # HUD area
-        hud_rect = pygame.Rect(0, MAP_H * TILE_SIZE, SCREEN_W, 100)
+        return rect
+
+    def draw_hud(self):
+        """Redraw the HUD only when its text changed; returns the dirty rect or None."""
+        su = self.selected_unit
+        stats = f"{su.name}  HP: {su.hp}/{su.max_hp}  ATK: {su.atk}  MOV: {su.mov}  RANGE: {su.range}" if su else ""
+        key = (self.battle.message, stats, self.battle.turn)
+        if key == self.hud_key:
+            return None
+        self.hud_key = key
+        top = self.view_h * TILE_SIZE
+        hud_rect = pygame.Rect(0, top, self.screen_w, HUD_H)
         pygame.draw.rect(self.screen, BLACK, hud_rect)
         # message
-        msg_surf = self.font.render(self.message, True, WHITE)
-        self.screen.blit(msg_surf, (8, MAP_H * TILE_SIZE + 8))
+        msg_surf = self.font.render(self.battle.message, True, WHITE)
+        self.screen.blit(msg_surf, (8, top + 8))
 
         # draw selected unit stats
-        if self.selected_unit:
-            su = self.selected_unit
-            stats = f"{su.name}  HP: {su.hp}/{su.max_hp}  ATK: {su.atk}  MOV: {su.mov}  RANGE: {su.range}"
+        if stats:
             s_surf = self.font.render(stats, True, WHITE)
-            self.screen.blit(s_surf, (8, MAP_H * TILE_SIZE + 36))
+            self.screen.blit(s_surf, (8, top + 36))
 
         # draw turn info
-        turn_surf = self.bigfont.render(f"Turn: {self.turn.upper()}", True, WHITE)
-        self.screen.blit(turn_surf, (SCREEN_W - 220, MAP_H * TILE_SIZE + 10))
+        turn_surf = self.bigfont.render(f"Turn: {self.battle.turn.upper()}", True, WHITE)
+        self.screen.blit(turn_surf, (self.screen_w - 220, top + 10))
 
         # draw instructions
-        instr = "Click player unit to select → click tile to move → click enemy to attack. SPACE to end turn."
-        i_surf = self.font.render(instr, True, GRAY)
-        self.screen.blit(i_surf, (8, MAP_H * TILE_SIZE + 64))
+        self.screen.blit(self.instructions, (8, top + 64))
+        return hud_rect
 
-        pygame.display.flip()
+    def draw(self):
+        """Paint what changed since the last frame; returns False if nothing did."""
+        if self.full_redraw:
+            self.screen.fill(DARK)
+            self.screen.blit(self.terrain, (0, 0))
+            self.tile_sigs = {}
+            self.hud_key = None
+        dirty = []
+        sigs = self.tile_signatures()
+        for pos in sigs.keys() | self.tile_sigs.keys():
+            sig = sigs.get(pos)
+            if sig != self.tile_sigs.get(pos):
+                dirty.append(self.draw_tile(pos, sig))
+        self.tile_sigs = sigs
+        hud_rect = self.draw_hud()
+        if hud_rect:
+            dirty.append(hud_rect)
+
+        if self.full_redraw:
+            pygame.display.flip()
+            self.full_redraw = False
+            return True
+        if dirty:
+            pygame.display.update(dirty)
+        return bool(dirty)
 
     def run(self):
-        enemy_action_pending = False
         while self.running:
-            dt = self.clock.tick(FPS) / 1000.0
-            for event in pygame.event.get():
+            self.clock.tick(FPS)
+            # Sleep in the event queue until something happens once the screen is up to date
+            events = pygame.event.get()
+            if self.idle and not events and self.pending is None:
+                events = [pygame.event.wait()] + pygame.event.get()
+            for event in events:
                 if event.type == pygame.QUIT:
                     self.running = False
                 elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                     mx, my = event.pos
-                    if my < MAP_H * TILE_SIZE:
+                    if my < self.view_h * TILE_SIZE:
                         gx, gy = self.world_to_grid(mx, my)
-                        if self.turn == "player":
+                        if self.battle.turn == "player":
                             self.handle_player_click(gx, gy)
                 elif event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_SPACE:
-                        if self.turn == "player":
+                        if self.battle.turn == "player":
                             self.end_player_turn()
                     elif event.key == pygame.K_ESCAPE:
                         self.running = False
+                    elif event.key == pygame.K_r:
+                        self.new_battle()
+                    elif event.key in SCROLL_KEYS:
+                        dx, dy = SCROLL_KEYS[event.key]
+                        self.scroll_to(self.cam[0] + dx, self.cam[1] + dy)
+                elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                    self.full_redraw = True
                 elif event.type == pygame.USEREVENT + 1:
                     # time to run enemy actions
                     pygame.time.set_timer(pygame.USEREVENT + 1, 0)
                     self.enemy_phase()
 
-            self.update(dt)
-            self.draw()
+            self.poll_planner()
 
             # check win/lose
-            player_alive = any(u.alive() and u.team == "player" for u in self.units)
-            enemy_alive = any(u.alive() and u.team == "enemy" for u in self.units)
-            if not player_alive:
-                self.message = "All players defeated. YOU LOSE. (R to restart)"
-            if not enemy_alive:
-                self.message = "All enemies defeated. YOU WIN! (R to restart)"
-
-            # quick restart keys
-            keys = pygame.key.get_pressed()
-            if keys[pygame.K_r]:
-                self.__init__()  # re-init the whole game
-            # end run loop if escape pressed handled above
+            winner = self.battle.winner()
+            if winner == "enemy":
+                self.battle.message = "All players defeated. YOU LOSE. (R to restart)"
+            elif winner == "player":
+                self.battle.message = "All enemies defeated. YOU WIN! (R to restart)"
+
+            self.idle = not self.draw()
 
+        if self.recorder:
+            self.recorder.close()
         pygame.quit()
         sys.exit()
 
@@ -431,4 +376,15 @@ class Game:
 # Run the game
 # -----------------------------
 if __name__ == "__main__":
-    Game().run()
+    parser = argparse.ArgumentParser(description="Mini turn-based strategy")
+    parser.add_argument("--width", type=int, default=MAP_W)
+    parser.add_argument("--height", type=int, default=MAP_H)
+    parser.add_argument("--army", type=int, default=0, help="units per side (0: the four prototype units)")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--no-fog", action="store_true", help="see the whole map")
+    parser.add_argument("--ai", choices=("greedy", "search"), default="greedy", help="enemy AI")
+    parser.add_argument("--budget", type=float, default=TURN_BUDGET, help="seconds per enemy turn for --ai search")
+    parser.add_argument("--record", metavar="PATH", help="write a replay log of the current battle here (overwritten on restart)")
+    args = parser.parse_args()
+    Game(seed=args.seed, width=args.width, height=args.height, army=args.army, fog=not args.no_fog,
+         ai=args.ai, budget=args.budget, record=args.record).run()
@@ -1,20 +1,56 @@
+import argparse
 import tkinter as tk
 from tkinter import messagebox
 import random
-from collections import deque
-import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from queens_logic import solve_queens, grow_regions, generate_puzzle, grade_puzzle, PlayState, Deducer, LEVEL_NAMES, bits
+from queens_pack import PuzzlePack, GRADES
+
+UNIQUE_TIME_BUDGET = 2.0  # seconds to spend looking for a single-solution board
+POLL_MS = 50              # how often the window checks on a board being generated
+
+_generator = None
+
+def generator():
+    """One worker process for fresh boards, kept across games."""
+    global _generator
+    if _generator is None:
+        # spawn rather than fork: the parent has a Tk window open
+        _generator = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+    return _generator
+
+def fresh_board(size, time_budget=UNIQUE_TIME_BUDGET):
+    """Worker: (queens, regions, unique, level) for a newly generated board."""
+    # Queens first, then regions reshaped until that layout is the only solution
+    try:
+        queens, regions = generate_puzzle(size, time_budget=time_budget)
+        unique = True
+    except TimeoutError:
+        # Big boards can take a while to make unique; hand back one that may not be
+        queens = solve_queens(size)
+        regions = grow_regions(size, sorted(queens))
+        unique = False
+    return queens, regions, unique, grade_puzzle(size, regions)
 
 class QueensGame:
-    def __init__(self, root, size=8):
+    def __init__(self, root, size=8, pack=None, level=None):
         self.root = root
         self.size = size
+        # Prebuilt puzzles (queens_pack.py); boards are generated on the spot when absent
+        self.pack = pack
+        self.level = level
+        self.pack_cursor = {}
         self.root.title(f"Queens Logic Game ({size}x{size})")
         
         # Game State
         self.solution_queens = set() # Set of (r, c) tuples
         self.regions = {} # Map (r, c) -> region_id
-        self.user_queens = set()
+        self.user_queens = set()  # replaced by PlayState's sets in start_new_game()
         self.user_crosses = set()
+        self.state = None
+        self.pending = None  # board being generated in the worker; the window stays live meanwhile
         
         # Config
         self.cell_size = 60
@@ -53,44 +89,76 @@ class QueensGame:
         self.canvas.bind("<Button-3>", self.handle_right_click)
 
     def start_new_game(self):
-        self.user_queens.clear()
-        self.user_crosses.clear()
-        self.status_label.config(text="New game started.", fg="#0056b3")
-        self.generate_board()
+        if self.pending is not None:
+            return
+        if self.pack and self.next_from_pack():
+            self.begin_game()
+            return
+        self.pending = generator().submit(fresh_board, self.size)
+        self.status_label.config(text="Generating a new board...", fg="#0056b3")
+        self.root.after(POLL_MS, self.poll_generator)
+
+    def poll_generator(self):
+        if not self.pending.done():
+            self.root.after(POLL_MS, self.poll_generator)
+            return
+        self.solution_queens, self.regions, self.unique, self.difficulty = self.pending.result()
+        self.pending = None
+        self.begin_game()
+
+    def begin_game(self):
+        random.shuffle(self.colors)
+        self.region_map = {i: self.colors[i % len(self.colors)] for i in range(self.size)}
+        # Constraint state lives in PlayState; these aliases are its live sets
+        self.state = PlayState(self.size, self.regions)
+        self.user_queens = self.state.queens
+        self.user_crosses = self.state.crosses
+        self.solution_col = {r: c for r, c in self.solution_queens}
+        self.solution_row = {c: r for r, c in self.solution_queens}
+        self.solution_in_region = {self.regions[pos]: pos for pos in self.solution_queens}
+        self.deducer = Deducer(self.size, self.regions)
+        if self.unique:
+            self.status_label.config(text=f"New game started. Difficulty: {LEVEL_NAMES[self.difficulty]}.", fg="#0056b3")
+        else:
+            self.status_label.config(text="New game started (this board may have more than one solution).", fg="#0056b3")
         self.draw_board()
 
     # --- HINT LOGIC STARTS HERE ---
     
     def get_region_cells(self, region_id):
-        return [(r, c) for (r, c), rid in self.regions.items() if rid == region_id]
+        return self.state.region_cells[region_id]
 
     def give_smart_hint(self):
+        if self.pending is not None:
+            return
+        state = self.state
         
         # --- Priority 1: Catch User Errors ---
         for (r, c) in list(self.user_queens):
             if (r, c) not in self.solution_queens:
                 
                 # Check ALL rule violations to give the most useful feedback
+                region_id = state.region_of(r, c)
+                sol_r, sol_c = self.solution_in_region[region_id]
                 
                 # Rule 1: No more than one queen per Row/Column/Region
-                sol_q_r = any((r, qc) in self.solution_queens for qc in range(self.size))
-                sol_q_c = any((qr, c) in self.solution_queens for qr in range(self.size))
-                sol_q_reg = any(self.regions[(qr, qc)] == self.regions[(r,c)] for (qr, qc) in self.solution_queens if (qr, qc) != (r, c))
+                sol_q_r = r in self.solution_col
+                sol_q_c = c in self.solution_row
+                sol_q_reg = (sol_r, sol_c) != (r, c)
                 
                 # Rule 2: No touching (King's move)
                 sol_q_touch = any(
-                    (r == qr or c == qc) and (abs(r-qr) <= 1 and abs(c-qc) <= 1) 
-                    for (qr, qc) in self.solution_queens if (qr, qc) != (r,c)
+                    (r == qr or c == qc) and (abs(r-qr) <= 1 and abs(c-qc) <= 1)
+                    for qr, qc in ((r, self.solution_col.get(r, -9)), (self.solution_row.get(c, -9), c))
                 )
 
-                self.user_queens.remove((r, c))
+                state.set_mark(r, c, None)
                 
                 if sol_q_r:
                     reason = f"This Queen must be removed: Row {r+1} already contains the actual Queen."
                 elif sol_q_c:
                     reason = f"This Queen must be removed: Column {c+1} already contains the actual Queen."
                 elif sol_q_reg:
-                    region_id = self.regions[(r, c)]
                     reason = f"This Queen must be removed: Region {region_id+1} already contains the actual Queen."
                 elif sol_q_touch:
                     reason = "This Queen must be removed: It touches the actual Queen (King's move constraint)."
@@ -98,142 +166,68 @@ class QueensGame:
                     reason = "This Queen must be removed: It simply does not match the solution."
 
                 self.status_label.config(text=f"Error corrected at ({r+1}, {c+1}): {reason}", fg="red")
-                self.draw_board()
-                return
-
-        # --- Priority 2: Forced Placement (If only one choice remains) ---
-        empty_cells = set(itertools.product(range(self.size), repeat=2)) - self.user_queens - self.user_crosses
-
-        # Check all Rows, Columns, and Regions for the last available spot
-        
-        for i in range(self.size):
-            # Check Row i
-            row_cells = [(i, c) for c in range(self.size)]
-            queens_in_row = len([(r, c) for r, c in self.user_queens if r == i])
-            empty_in_row = [(r, c) for r, c in empty_cells if r == i]
-            
-            if queens_in_row == 0 and len(empty_in_row) == 1:
-                r, c = empty_in_row[0]
-                self.user_queens.add((r, c))
-                self.status_label.config(text=f"Forced Placement: Queen placed at ({r+1}, {c+1}). It is the only empty spot left in Row {r+1}.", fg="green")
-                self.draw_board()
-                return
-
-            # Check Column i
-            col_cells = [(r, i) for r in range(self.size)]
-            queens_in_col = len([(r, c) for r, c in self.user_queens if c == i])
-            empty_in_col = [(r, c) for r, c in empty_cells if c == i]
-
-            if queens_in_col == 0 and len(empty_in_col) == 1:
-                r, c = empty_in_col[0]
-                self.user_queens.add((r, c))
-                self.status_label.config(text=f"Forced Placement: Queen placed at ({r+1}, {c+1}). It is the only empty spot left in Column {c+1}.", fg="green")
-                self.draw_board()
+                self.draw_cells([(r, c)])
                 return
 
-            # Check Region i
-            region_cells = self.get_region_cells(i)
-            queens_in_region = len([pos for pos in self.user_queens if self.regions.get(pos) == i])
-            empty_in_region = [pos for pos in empty_cells if self.regions.get(pos) == i]
-
-            if queens_in_region == 0 and len(empty_in_region) == 1:
-                r, c = empty_in_region[0]
-                self.user_queens.add((r, c))
-                self.status_label.config(text=f"Forced Placement: Queen placed at ({r+1}, {c+1}). It is the only empty spot left in Region {i+1}.", fg="green")
-                self.draw_board()
-                return
+        # A cross on a solution cell would send the deductions below down a false trail
+        for (r, c) in sorted(self.user_crosses & self.solution_queens):
+            state.set_mark(r, c, None)
+            reason = f"This X must be removed: Region {state.region_of(r, c)+1}'s Queen belongs here."
+            self.status_label.config(text=f"Error corrected at ({r+1}, {c+1}): {reason}", fg="red")
+            self.draw_cells([(r, c)])
+            return
 
+        # --- Priority 2: Next logical deduction (see queens_logic.Deducer) ---
+        n = self.size
+        queens = sum(1 << (r * n + c) for r, c in self.user_queens)
+        empty = 0
+        for mask in state.region_empty:
+            empty |= mask
+        step = self.deducer.next_step(queens, empty)
 
-        # --- Priority 3: Forced Elimination (Mark X) ---
-        
-        # Find all empty spots that are NOT the solution Queen
-        valid_eliminations = [(r, c) for r, c in empty_cells if (r, c) not in self.solution_queens]
-        
-        if not valid_eliminations:
-            self.status_label.config(text="No guaranteed logical eliminations left (board may be complete/correct).", fg="#0056b3")
+        if step is None:
+            self.status_label.config(text="No logical step left from here (board may be complete/correct).", fg="#0056b3")
             return
 
-        # Pick a random spot to eliminate and provide the logical reason
-        r, c = random.choice(valid_eliminations)
-        self.user_crosses.add((r, c))
-        
-        # Determine the logical reason for elimination based on the SOLUTION
-        region_id = self.regions[(r, c)]
-        
-        sol_q_r = next(((qr, qc) for qr, qc in self.solution_queens if qr == r), None)
-        sol_q_c = next(((qr, qc) for qr, qc in self.solution_queens if qc == c), None)
-        sol_q_reg = next(((qr, qc) for qr, qc in self.solution_queens if self.regions[(qr,qc)] == region_id and (qr, qc) != (r,c)), None)
-        
-        
-        if sol_q_r:
-            reason = f"Eliminated: Row {r+1} already contains the actual Queen at Column {sol_q_r[1]+1}."
-        elif sol_q_c:
-            reason = f"Eliminated: Column {c+1} already contains the actual Queen at Row {sol_q_c[0]+1}."
-        elif sol_q_reg:
-            reason = f"Eliminated: Region {region_id+1} already contains the actual Queen at ({sol_q_reg[0]+1}, {sol_q_reg[1]+1})."
+        if step.place is not None:
+            r, c = divmod(step.place, n)
+            state.set_mark(r, c, "queen")
+            self.status_label.config(text=f"Queen placed at ({r+1}, {c+1}): {step.reason}", fg="green")
+            self.draw_cells([(r, c)])
         else:
-            # This should only happen if the cell is eliminated due to a touching constraint from a Queen *not* in the same row/col/region, which is less obvious logic.
-            reason = "Eliminated: This cell conflicts with the actual solution placement due to the 'No Touching' rule."
-            
-        self.status_label.config(text=f"Marked X at ({r+1}, {c+1}): {reason}", fg="blue")
-        self.draw_board()
+            changed = [divmod(i, n) for i in bits(step.eliminate)]
+            for r, c in changed:
+                state.set_mark(r, c, "cross")
+            self.status_label.config(text=f"Marked X ({step.technique}): {step.reason}", fg="blue")
+            self.draw_cells(changed)
 
     # --- HINT LOGIC ENDS HERE ---
 
-    # --- BOARD GENERATION (Unchanged from previous version) ---
+    # --- BOARD GENERATION ---
 
-    def generate_board(self):
-        # Step 1: Place Queens legally (Backtracking)
-        self.solution_queens = set()
-        
-        def is_safe(queens, r, c):
-            for qr, qc in queens:
-                if r == qr or c == qc: return False
-                if abs(r - qr) <= 1 and abs(c - qc) <= 1: return False
-            return True
-
-        def solve(col):
-            if col >= self.size: return True
-            possible_rows = list(range(self.size))
-            random.shuffle(possible_rows)
-            for r in possible_rows:
-                if is_safe(self.solution_queens, r, col):
-                    self.solution_queens.add((r, col))
-                    if solve(col + 1): return True
-                    self.solution_queens.remove((r, col))
+    def next_from_pack(self):
+        levels = [self.level] if self.level is not None else self.pack.levels(self.size)
+        levels = [lv for lv in levels if self.pack.count(self.size, lv)]
+        if not levels:
             return False
-
-        while True:
-            self.solution_queens.clear()
-            if solve(0): break
-        
-        # Step 2: Grow Regions (BFS)
-        self.regions = {}
-        queue = deque()
-        sorted_queens = list(self.solution_queens)
-        
-        for i, (r, c) in enumerate(sorted_queens):
-            self.regions[(r, c)] = i
-            queue.append((r, c))
-            
-        while queue:
-            r, c = queue.popleft()
-            current_region = self.regions[(r, c)]
-            neighbors = [(r+1,c), (r-1,c), (r,c+1), (r,c-1)]
-            random.shuffle(neighbors)
-            for nr, nc in neighbors:
-                if 0 <= nr < self.size and 0 <= nc < self.size:
-                    if (nr, nc) not in self.regions:
-                        self.regions[(nr, nc)] = current_region
-                        queue.append((nr, nc))
-        
-        random.shuffle(self.colors)
-        self.region_map = {i: self.colors[i % len(self.colors)] for i in range(self.size)}
+        level = random.choice(levels)
+        count = self.pack.count(self.size, level)
+        # Walk each section from a random start so a session never repeats a board
+        index = self.pack_cursor.get(level, random.randrange(count))
+        self.pack_cursor[level] = (index + 1) % count
+        self.solution_queens, self.regions = self.pack.get(self.size, level, index)
+        self.difficulty = level
+        self.unique = True
+        return True
 
     # --- DRAWING AND INTERACTION (Minor changes for better display) ---
 
     def draw_board(self):
+        """Build the canvas for a new game; afterwards only draw_cells() touches it."""
         self.canvas.delete("all")
+        half = self.cell_size // 2
+        self.glyph_items = {}
+        self.glyph_shown = {}
         for r in range(self.size):
             for c in range(self.size):
                 x1, y1 = c * self.cell_size, r * self.cell_size
@@ -243,14 +237,27 @@ class QueensGame:
                 region_id = self.regions.get((r, c), 0)
                 color = self.region_map.get(region_id, "white")
                 self.canvas.create_rectangle(x1, y1, x2, y2, fill=color, outline="#d0d0d0")
-                
-                # Icons
-                if (r, c) in self.user_queens:
-                    self.canvas.create_text(x1+30, y1+30, text="♛", font=("Arial", 32), fill="black")
-                elif (r, c) in self.user_crosses:
-                    self.canvas.create_text(x1+30, y1+30, text="✕", font=("Arial", 20), fill="#777")
+
+                # One persistent glyph item per cell, rewritten in place on every change
+                self.glyph_items[(r, c)] = self.canvas.create_text(x1 + half, y1 + half, text="")
+                self.glyph_shown[(r, c)] = None
         
         self.draw_borders()
+        self.draw_cells(self.glyph_items)
+
+    def draw_cells(self, cells):
+        """Repaint just the glyphs of `cells`, skipping any that already show their mark."""
+        for pos in cells:
+            mark = "queen" if pos in self.user_queens else "cross" if pos in self.user_crosses else None
+            if self.glyph_shown[pos] == mark:
+                continue
+            self.glyph_shown[pos] = mark
+            if mark == "queen":
+                self.canvas.itemconfigure(self.glyph_items[pos], text="♛", font=("Arial", 32), fill="black")
+            elif mark == "cross":
+                self.canvas.itemconfigure(self.glyph_items[pos], text="✕", font=("Arial", 20), fill="#777")
+            else:
+                self.canvas.itemconfigure(self.glyph_items[pos], text="")
 
     def draw_borders(self):
         for r in range(self.size):
@@ -277,29 +284,30 @@ class QueensGame:
 
     def toggle_cell(self, event, mode):
         c, r = event.x // self.cell_size, event.y // self.cell_size
-        if not (0 <= r < self.size and 0 <= c < self.size): return
+        if self.pending is not None or not (0 <= r < self.size and 0 <= c < self.size): return
 
-        target_set = self.user_queens if mode == "queen" else self.user_crosses
-        opp_set = self.user_crosses if mode == "queen" else self.user_queens
-        
-        if (r, c) in target_set:
-            target_set.remove((r, c))
-        else:
-            target_set.add((r, c))
-            if (r, c) in opp_set: opp_set.remove((r, c))
+        self.state.toggle(r, c, mode)
 
-        self.draw_board()
+        self.draw_cells([(r, c)])
         
-        if len(self.user_queens) == self.size and self.user_queens == self.solution_queens:
+        if self.state.is_solved():
             messagebox.showinfo("Winner!", "You found all the Queens!")
 
     def check_win(self):
-        if self.user_queens == self.solution_queens:
+        if self.pending is not None:
+            return
+        if self.state.is_solved():
             messagebox.showinfo("Result", "Correct! All constraints satisfied.")
         else:
             messagebox.showwarning("Result", f"Incorrect. Check your Row/Column/Region/Touching rules.")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Queens logic puzzle")
+    parser.add_argument("size", type=int, nargs="?", default=8)
+    parser.add_argument("--pack", help="puzzle pack built with queens_pack.py")
+    parser.add_argument("--level", type=int, choices=GRADES,
+                        help="difficulty to draw from the pack (1=Easy .. 5=Needs guessing)")
+    args = parser.parse_args()
     root = tk.Tk()
-    game = QueensGame(root)
+    game = QueensGame(root, size=args.size, pack=PuzzlePack(args.pack) if args.pack else None, level=args.level)
     root.mainloop()
@@ -0,0 +1,633 @@
+"""
+Queens puzzle logic with no Tk dependency, so it can be used by the GUI, scripts and worker processes.
+
+Boards are square, `size` x `size`. A solution holds one queen per row, column and
+region, and no two queens touch (king's move). Rows/columns are tracked as integer
+bitmasks: bit r set in a column's mask means row r is unavailable there.
+"""
+
+import time
+import random
+from collections import deque
+from functools import lru_cache
+
+
+def _adjacent_rows(r, full):
+    """Mask of rows r-1, r, r+1: the rows a queen in row r blocks in a neighbouring column."""
+    return (0b111 << r >> 1) & full
+
+
+def solve_queens(size, rng=random):
+    """Return a random valid queen layout ignoring regions, as a set of (row, col).
+
+    Backtracks over columns with bitmasks, always filling the column with the fewest
+    legal rows next (MRV). Returns None when no layout exists (sizes 2 and 3).
+    """
+    full = (1 << size) - 1
+    rows = [-1] * size  # rows[c] = row of the queen in column c
+
+    def candidates(c, used):
+        mask = full & ~used
+        if c > 0 and rows[c - 1] >= 0:
+            mask &= ~_adjacent_rows(rows[c - 1], full)
+        if c < size - 1 and rows[c + 1] >= 0:
+            mask &= ~_adjacent_rows(rows[c + 1], full)
+        return mask
+
+    def place(used, placed):
+        if placed == size:
+            return True
+        best_col, best_mask, best_count = -1, 0, size + 1
+        for c in range(size):
+            if rows[c] >= 0:
+                continue
+            mask = candidates(c, used)
+            count = mask.bit_count()
+            if count < best_count:
+                best_col, best_mask, best_count = c, mask, count
+                if count <= 1:
+                    break
+        if best_count == 0:
+            return False
+        choices = [r for r in range(size) if best_mask >> r & 1]
+        rng.shuffle(choices)
+        for r in choices:
+            rows[best_col] = r
+            if place(used | (1 << r), placed + 1):
+                return True
+        rows[best_col] = -1
+        return False
+
+    if not place(0, 0):
+        return None
+    return {(r, c) for c, r in enumerate(rows)}
+
+
+def grow_regions(size, queens, rng=random):
+    """Grow one connected region around each queen by random BFS. Returns {(r, c): region_id}."""
+    regions = {}
+    queue = deque()
+    for i, (r, c) in enumerate(queens):
+        regions[(r, c)] = i
+        queue.append((r, c))
+
+    while queue:
+        r, c = queue.popleft()
+        current_region = regions[(r, c)]
+        neighbors = [(r+1, c), (r-1, c), (r, c+1), (r, c-1)]
+        rng.shuffle(neighbors)
+        for nr, nc in neighbors:
+            if 0 <= nr < size and 0 <= nc < size and (nr, nc) not in regions:
+                regions[(nr, nc)] = current_region
+                queue.append((nr, nc))
+    return regions
+
+
+@lru_cache(maxsize=None)
+def _geometry(size):
+    """Row, column and king-neighbourhood bitboards, which depend only on the size."""
+    n = size
+    row_masks = [((1 << n) - 1) << (r * n) for r in range(n)]
+    col = sum(1 << (r * n) for r in range(n))
+    col_masks = [col << c for c in range(n)]
+    neighbors = []
+    for i in range(n * n):
+        r, c = divmod(i, n)
+        touch = 0
+        for dr in (-1, 0, 1):
+            for dc in (-1, 0, 1):
+                if 0 <= r + dr < n and 0 <= c + dc < n:
+                    touch |= 1 << ((r + dr) * n + c + dc)
+        neighbors.append(touch)
+    # Placing a queen on cell i removes its row, column and king neighbours (region added per board)
+    static_block = [neighbors[i] | row_masks[i // n] | col_masks[i % n] for i in range(n * n)]
+    return row_masks, col_masks, neighbors, static_block
+
+
+class Board:
+    """Bitboards for one board: bit r*size+c stands for cell (r, c).
+
+    Units are numbered rows 0..n-1, columns n..2n-1, regions 2n..3n-1. Cells missing
+    from `regions` (region -1) are unassigned and can never hold a queen.
+    """
+
+    def __init__(self, size, regions):
+        n = self.size = size
+        self.row_masks, self.col_masks, self.neighbors, self.static_block = _geometry(size)
+        self.cell_region = [regions.get((i // n, i % n), -1) for i in range(n * n)]
+        self.region_masks = [0] * n
+        self.assigned = 0
+        for i, reg in enumerate(self.cell_region):
+            if reg >= 0:
+                self.region_masks[reg] |= 1 << i
+                self.assigned |= 1 << i
+
+    def move(self, cell, region):
+        """(Re)assign one cell to a region (-1 to unassign), keeping the masks in step."""
+        i = cell[0] * self.size + cell[1]
+        old = self.cell_region[i]
+        if old >= 0:
+            self.region_masks[old] &= ~(1 << i)
+        if region >= 0:
+            self.region_masks[region] |= 1 << i
+            self.assigned |= 1 << i
+        else:
+            self.assigned &= ~(1 << i)
+        self.cell_region[i] = region
+
+    @property
+    def units(self):
+        return self.row_masks + self.col_masks + self.region_masks
+
+
+class _GiveUp(Exception):
+    pass
+
+
+def count_solutions(size, regions, limit=2, board=None, through=None, node_limit=None, deadline=None):
+    """Count solutions of a regioned board, stopping once `limit` are found.
+
+    Returns (count, solutions) with each solution a set of (row, col). Branches on
+    whichever open row, column or region has the fewest candidate cells left. With
+    `through=(r, c)` only solutions that put a queen on that cell are counted.
+
+    After `node_limit` search nodes it gives up and pessimistically reports `limit`;
+    past `deadline` (a time.monotonic() value) it raises TimeoutError.
+    """
+    board = board or Board(size, regions)
+    n = size
+    units = board.units
+    static_block, region_masks, cell_region = board.static_block, board.region_masks, board.cell_region
+    solutions = []
+    placed = []
+    nodes = [0]
+
+    def search(avail, filled):
+        nodes[0] += 1
+        if node_limit and nodes[0] > node_limit:
+            raise _GiveUp
+        if deadline and not nodes[0] & 1023 and time.monotonic() > deadline:
+            raise TimeoutError("puzzle search ran out of time")
+        if len(placed) == n:
+            solutions.append({divmod(i, n) for i in placed})
+            return len(solutions) >= limit
+        best_mask, best_count = 0, n * n + 1
+        for u, mask in enumerate(units):
+            if filled >> u & 1:
+                continue
+            m = avail & mask
+            if not m:
+                return False  # an open row/column/region has no room left
+            count = m.bit_count()
+            if count < best_count:
+                best_mask, best_count = m, count
+                if count == 1:
+                    break
+        m = best_mask
+        while m:
+            low = m & -m
+            m ^= low
+            i = low.bit_length() - 1
+            reg = cell_region[i]
+            placed.append(i)
+            if search(avail & ~(static_block[i] | region_masks[reg]),
+                      filled | (1 << (i // n)) | (1 << (n + i % n)) | (1 << (2 * n + reg))):
+                return True
+            placed.pop()
+        return False
+
+    try:
+        if through is None:
+            search(board.assigned, 0)
+        else:
+            i = through[0] * n + through[1]
+            reg = cell_region[i]
+            placed.append(i)
+            search(board.assigned & ~(static_block[i] | region_masks[reg]),
+                   (1 << (i // n)) | (1 << (n + i % n)) | (1 << (2 * n + reg)))
+    except _GiveUp:
+        return limit, solutions
+    return len(solutions), solutions
+
+
+def _region_stays_connected(regions, cells, removed):
+    """Would the region made of `cells` stay connected without cell `removed`?"""
+    rest = cells - {removed}
+    if not rest:
+        return False
+    start = next(iter(rest))
+    seen = {start}
+    stack = [start]
+    while stack:
+        r, c = stack.pop()
+        for nb in ((r+1, c), (r-1, c), (r, c+1), (r, c-1)):
+            if nb in rest and nb not in seen:
+                seen.add(nb)
+                stack.append(nb)
+    return len(seen) == len(rest)
+
+
+def _movable_cells(size, regions, queens, cells):
+    """Yield (cell, target_regions) for cells that can join a neighbouring region.
+
+    A cell may move if it is not a queen of the intended solution, borders another
+    region, and its own region stays connected without it.
+    """
+    for r, c in cells:
+        if (r, c) in queens:
+            continue
+        old = regions[(r, c)]
+        targets = {regions[nb] for nb in ((r+1, c), (r-1, c), (r, c+1), (r, c-1))
+                   if nb in regions and regions[nb] != old}
+        if not targets:
+            continue
+        old_cells = {pos for pos, reg in regions.items() if reg == old}
+        if _region_stays_connected(regions, old_cells, (r, c)):
+            yield (r, c), sorted(targets)
+
+
+def make_unique(size, queens, regions, rng=random, max_steps=None, deadline=None):
+    """Reshape regions in place until `queens` is the only solution.
+
+    Each step finds an alternative solution and moves one of its queen cells into a
+    neighbouring region, which leaves that alternative with two queens in one region.
+    When none of its cells can move, a random border cell moves instead to shake the
+    layout loose. Returns False if still ambiguous after `max_steps`.
+    """
+    max_steps = max_steps or size * size * 2
+    board_cells = list(regions)
+    board = Board(size, regions)
+    for _ in range(max_steps):
+        if deadline and time.monotonic() > deadline:
+            raise TimeoutError("no unique board within the time budget")
+        count, solutions = count_solutions(size, regions, limit=2, board=board, deadline=deadline)
+        if count == 1:
+            return True
+        alternative = next(s for s in solutions if s != queens)
+        cells = list(alternative)
+        rng.shuffle(cells)
+        move = next(_movable_cells(size, regions, queens, cells), None)
+        if move is None:
+            rng.shuffle(board_cells)
+            move = next(_movable_cells(size, regions, queens, board_cells), None)
+            if move is None:
+                return False
+        cell, targets = move
+        regions[cell] = rng.choice(targets)
+        board.move(cell, regions[cell])
+    return False
+
+
+GROW_NODE_LIMIT = 2000  # a "through" search this deep is treated as unsafe rather than finished
+
+
+def grow_unique_regions(size, queens, rng=random, deadline=None):
+    """Grow regions around `queens` one cell at a time, keeping `queens` the only solution.
+
+    Unassigned cells can't hold a queen, so a board of single-cell regions has exactly
+    one solution. Any new solution created by adding cell x to a region must put a
+    queen on x, so each addition only needs a search through x. Cells that can't join
+    any neighbouring region safely are attached anyway at the end and returned, for
+    make_unique() to repair. Returns (regions, forced_cells).
+
+    Searches that run past GROW_NODE_LIMIT nodes count as unsafe, which can only add
+    forced cells, never a hidden second solution.
+    """
+    regions = {q: i for i, q in enumerate(sorted(queens))}
+    board = Board(size, regions)
+    rejected = {}  # cell -> regions already shown to create a second solution
+    progress = True
+    while progress:
+        progress = False
+        frontier = [(r, c) for r in range(size) for c in range(size) if (r, c) not in regions]
+        rng.shuffle(frontier)
+        for r, c in frontier:
+            if deadline and time.monotonic() > deadline:
+                raise TimeoutError("no unique board within the time budget")
+            options = [regions[nb] for nb in ((r+1, c), (r-1, c), (r, c+1), (r, c-1)) if nb in regions]
+            options = [reg for reg in dict.fromkeys(options) if reg not in rejected.get((r, c), ())]
+            rng.shuffle(options)
+            for reg in options:
+                board.move((r, c), reg)
+                if count_solutions(size, regions, limit=1, board=board, through=(r, c),
+                                   node_limit=GROW_NODE_LIMIT, deadline=deadline)[0] == 0:
+                    regions[(r, c)] = reg
+                    progress = True
+                    break
+                board.move((r, c), -1)
+                rejected.setdefault((r, c), set()).add(reg)
+
+    forced = []
+    while len(regions) < size * size:
+        for r in range(size):
+            for c in range(size):
+                if (r, c) in regions:
+                    continue
+                options = [regions[nb] for nb in ((r+1, c), (r-1, c), (r, c+1), (r, c-1)) if nb in regions]
+                if options:
+                    regions[(r, c)] = rng.choice(options)
+                    forced.append((r, c))
+    return regions, forced
+
+
+def generate_puzzle(size, rng=random, time_budget=None):
+    """Return (queens, regions) for a board whose only solution is `queens`.
+
+    Raises TimeoutError if `time_budget` seconds pass without a unique board.
+    """
+    deadline = time.monotonic() + time_budget if time_budget else None
+    while True:
+        if deadline and time.monotonic() > deadline:
+            raise TimeoutError("no unique board within the time budget")
+        queens = solve_queens(size, rng)
+        if queens is None:
+            raise ValueError(f"No queen layout exists for a {size}x{size} board")
+        regions, forced = grow_unique_regions(size, queens, rng, deadline)
+        if not forced or make_unique(size, queens, regions, rng, deadline=deadline):
+            return queens, regions
+
+
+class PlayState:
+    """The player's marks plus per-row/column/region counts, updated one cell at a time.
+
+    Rows keep a bitmask of empty columns and columns a bitmask of empty rows; regions
+    keep a bitboard (bit r*size+c) of their empty cells. "Empty" means neither a
+    queen nor a cross, so hints and win checks never rescan the board.
+    """
+
+    def __init__(self, size, regions):
+        n = self.size = size
+        self.cell_region = [regions[(i // n, i % n)] for i in range(n * n)]
+        self.region_cells = [[] for _ in range(n)]
+        for i, reg in enumerate(self.cell_region):
+            self.region_cells[reg].append(divmod(i, n))
+        self.queens = set()
+        self.crosses = set()
+        self.row_queens = [0] * n
+        self.col_queens = [0] * n
+        self.region_queens = [0] * n
+        self.row_empty = [(1 << n) - 1] * n
+        self.col_empty = [(1 << n) - 1] * n
+        self.region_empty = [0] * n
+        for i, reg in enumerate(self.cell_region):
+            self.region_empty[reg] |= 1 << i
+
+    def region_of(self, r, c):
+        return self.cell_region[r * self.size + c]
+
+    def mark(self, r, c):
+        """Return "queen", "cross" or None for a cell."""
+        if (r, c) in self.queens:
+            return "queen"
+        if (r, c) in self.crosses:
+            return "cross"
+        return None
+
+    def set_mark(self, r, c, mark):
+        """Put "queen", "cross" or None on a cell, updating every count and mask it touches."""
+        old = self.mark(r, c)
+        if old == mark:
+            return
+        reg = self.region_of(r, c)
+        bit = 1 << (r * self.size + c)
+        if old == "queen":
+            self.queens.remove((r, c))
+            self.row_queens[r] -= 1
+            self.col_queens[c] -= 1
+            self.region_queens[reg] -= 1
+        elif old == "cross":
+            self.crosses.remove((r, c))
+        if mark is None:
+            self.row_empty[r] |= 1 << c
+            self.col_empty[c] |= 1 << r
+            self.region_empty[reg] |= bit
+            return
+        self.row_empty[r] &= ~(1 << c)
+        self.col_empty[c] &= ~(1 << r)
+        self.region_empty[reg] &= ~bit
+        if mark == "queen":
+            self.queens.add((r, c))
+            self.row_queens[r] += 1
+            self.col_queens[c] += 1
+            self.region_queens[reg] += 1
+        else:
+            self.crosses.add((r, c))
+
+    def toggle(self, r, c, mark):
+        """Click behaviour: the same mark again clears the cell, otherwise replaces it."""
+        self.set_mark(r, c, None if self.mark(r, c) == mark else mark)
+
+    def empty_cells_in_region(self, reg):
+        m = self.region_empty[reg]
+        cells = []
+        while m:
+            low = m & -m
+            m ^= low
+            cells.append(divmod(low.bit_length() - 1, self.size))
+        return cells
+
+    def is_solved(self):
+        """One queen in every row, column and region, none touching. O(size)."""
+        n = self.size
+        if len(self.queens) != n:
+            return False
+        if any(q != 1 for q in self.row_queens) or any(q != 1 for q in self.col_queens) \
+                or any(q != 1 for q in self.region_queens):
+            return False
+        # One per row means only queens in adjacent rows can touch, and only diagonally
+        return not any((r + 1, c - 1) in self.queens or (r + 1, c + 1) in self.queens for r, c in self.queens)
+
+
+# --- Deductive solving and grading ---
+
+TECHNIQUES = ["attack", "single", "confinement", "pigeonhole", "contradiction", "guess"]
+LEVEL_NAMES = ["Trivial", "Easy", "Medium", "Hard", "Expert", "Needs guessing"]
+
+
+class Deduction:
+    """One logical step: place a queen on `place` and/or cross out the cells in `eliminate`."""
+    __slots__ = ("level", "place", "eliminate", "reason")
+
+    def __init__(self, level, reason, place=None, eliminate=0):
+        self.level = level
+        self.place = place
+        self.eliminate = eliminate
+        self.reason = reason
+
+    @property
+    def technique(self):
+        return TECHNIQUES[self.level]
+
+
+def bits(m):
+    """Indices of the set bits of m, lowest first (cells of a bitboard)."""
+    while m:
+        low = m & -m
+        m ^= low
+        yield low.bit_length() - 1
+
+
+class Deducer:
+    """Finds the easiest next deduction on a board, working on bitboards.
+
+    `queens` is a bitboard of placed queens and `cand` a bitboard of empty cells that
+    may still hold one. Levels: attack (cells a queen rules out), single (last cell
+    of a row/column/region), confinement (a region confined to one row/column, or a
+    row/column confined to one region), pigeonhole (k regions confined to k rows or
+    columns), contradiction (a cell whose queen would empty another unit).
+    """
+
+    def __init__(self, size, regions, board=None):
+        self.board = board or Board(size, regions)
+        self.size = size
+
+    def _cell(self, i):
+        r, c = divmod(i, self.size)
+        return f"({r+1}, {c+1})"
+
+    def _unit_name(self, u):
+        n = self.size
+        if u < n:
+            return f"Row {u+1}"
+        if u < 2 * n:
+            return f"Column {u-n+1}"
+        return f"Region {u-2*n+1}"
+
+    def _block(self, i):
+        b = self.board
+        return b.static_block[i] | b.region_masks[b.cell_region[i]]
+
+    def next_step(self, queens, cand):
+        """Return the easiest Deduction available, or None if logic alone is stuck."""
+        for finder in (self._attack, self._single, self._confinement, self._pigeonhole, self._contradiction):
+            step = finder(queens, cand)
+            if step is not None:
+                return step
+        return None
+
+    def _attack(self, queens, cand):
+        for q in bits(queens):
+            hit = cand & self._block(q)
+            if hit:
+                return Deduction(0, f"The queen at {self._cell(q)} rules out its row, column, region and neighbours.",
+                                 eliminate=hit)
+        return None
+
+    def _open_units(self, queens):
+        return [(u, mask) for u, mask in enumerate(self.board.units) if not mask & queens]
+
+    def _single(self, queens, cand):
+        for u, mask in self._open_units(queens):
+            m = cand & mask
+            if m and not m & (m - 1):
+                i = m.bit_length() - 1
+                return Deduction(1, f"{self._unit_name(u)} has only one place left for its queen: {self._cell(i)}.", place=i)
+        return None
+
+    def _lines_of(self, m, line_masks):
+        """Bitmask of which rows (or columns) the bitboard m touches."""
+        out = 0
+        for k, line in enumerate(line_masks):
+            if m & line:
+                out |= 1 << k
+        return out
+
+    def _confinement(self, queens, cand):
+        b = self.board
+        for kind, line_masks in (("Row", b.row_masks), ("Column", b.col_masks)):
+            for reg, rmask in enumerate(b.region_masks):
+                if rmask & queens:
+                    continue
+                m = cand & rmask
+                lines = self._lines_of(m, line_masks)
+                if m and not lines & (lines - 1):
+                    k = lines.bit_length() - 1
+                    hit = cand & line_masks[k] & ~rmask
+                    if hit:
+                        return Deduction(2, f"Region {reg+1} can only place its queen in {kind} {k+1}, "
+                                            f"so the rest of {kind} {k+1} is ruled out.", eliminate=hit)
+            for k, line in enumerate(line_masks):
+                if line & queens:
+                    continue
+                m = cand & line
+                regs = {b.cell_region[i] for i in bits(m)}
+                if len(regs) == 1:
+                    reg = regs.pop()
+                    hit = cand & b.region_masks[reg] & ~line
+                    if hit:
+                        return Deduction(2, f"{kind} {k+1} can only place its queen in Region {reg+1}, "
+                                            f"so the rest of Region {reg+1} is ruled out.", eliminate=hit)
+        return None
+
+    def _pigeonhole(self, queens, cand):
+        b = self.board
+        for kind, line_masks in (("rows", b.row_masks), ("columns", b.col_masks)):
+            spans = {}
+            for reg, rmask in enumerate(b.region_masks):
+                if not rmask & queens and cand & rmask:
+                    spans[reg] = self._lines_of(cand & rmask, line_masks)
+            # Candidate line sets: each region's span, and each pair of spans combined
+            span_list = list(spans.values())
+            tried = set()
+            for i, s1 in enumerate(span_list):
+                for s2 in span_list[i:]:
+                    lines = s1 | s2
+                    if lines in tried:
+                        continue
+                    tried.add(lines)
+                    k = lines.bit_count()
+                    inside = [reg for reg, span in spans.items() if span & ~lines == 0]
+                    if k < 2 or len(inside) != k:
+                        continue
+                    area = 0
+                    for line in bits(lines):
+                        area |= line_masks[line]
+                    keep = 0
+                    for reg in inside:
+                        keep |= b.region_masks[reg]
+                    hit = cand & area & ~keep
+                    if hit:
+                        names = ", ".join(str(reg + 1) for reg in sorted(inside))
+                        nums = ", ".join(str(line + 1) for line in bits(lines))
+                        return Deduction(3, f"Regions {names} fit only in {kind} {nums}, so those {kind} "
+                                            f"have no room for any other region's queen.", eliminate=hit)
+        return None
+
+    def _contradiction(self, queens, cand):
+        open_units = self._open_units(queens)
+        for i in bits(cand):
+            after = cand & ~self._block(i)
+            bit = 1 << i
+            for u, mask in open_units:
+                if mask & bit:
+                    continue
+                if not after & mask:
+                    return Deduction(4, f"A queen at {self._cell(i)} would leave {self._unit_name(u)} "
+                                        f"with nowhere to put its queen.", eliminate=bit)
+        return None
+
+    def apply(self, step, queens, cand):
+        """Return (queens, cand) after a deduction."""
+        if step.place is not None:
+            queens |= 1 << step.place
+            cand &= ~(1 << step.place)
+        return queens, cand & ~step.eliminate
+
+    def grade(self):
+        """Solve by logic alone. Returns the level of the hardest technique needed (5 = stuck)."""
+        queens, cand = 0, self.board.assigned
+        hardest = 0
+        for _ in range(self.size * self.size * 2):
+            if queens.bit_count() == self.size:
+                return hardest
+            step = self.next_step(queens, cand)
+            if step is None:
+                return len(TECHNIQUES) - 1
+            hardest = max(hardest, step.level)
+            queens, cand = self.apply(step, queens, cand)
+        return len(TECHNIQUES) - 1
+
+
+def grade_puzzle(size, regions):
+    """Difficulty level (index into LEVEL_NAMES) of the hardest deduction the board needs."""
+    return Deducer(size, regions).grade()
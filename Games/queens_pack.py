@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+queens_pack.py — build and read Queens puzzle packs without Tk
+
+    python queens_pack.py build puzzles.qpk --sizes 8 9 10 --count 200
+    python queens_pack.py info puzzles.qpk
+    python queens_game.py 10 --pack puzzles.qpk --level 3
+
+Every puzzle is solved, reshaped until its solution is unique, graded by the hardest
+deduction it needs (see queens_logic), and stored with its regions and solution.
+Generation runs in a process pool.
+
+Pack layout (little-endian):
+    b"QPK1", u32 section count
+    section table: (u8 size, u8 level, u32 count, u64 offset) per section
+    records: size*size region bytes (row-major) + size bytes solution column per row
+Sections are indexed by (size, level), and records are read straight out of an mmap,
+so opening a pack of any size costs only the section table.
+"""
+
+import os
+import sys
+import mmap
+import time
+import random
+import struct
+import argparse
+from multiprocessing import Pool
+
+from queens_logic import generate_puzzle, grade_puzzle, LEVEL_NAMES
+
+MAGIC = b"QPK1"
+HEADER = struct.Struct("<4sI")
+SECTION = struct.Struct("<BBIQ")
+GRADES = range(1, len(LEVEL_NAMES))  # every solve places a queen, so nothing grades below Easy
+IDLE_BATCHES = 20                    # batches in a row without a keeper before build gives up
+
+
+def encode_puzzle(size, queens, regions):
+    region_bytes = bytes(regions[(r, c)] for r in range(size) for c in range(size))
+    cols = dict(queens)
+    return region_bytes + bytes(cols[r] for r in range(size))
+
+
+def decode_puzzle(size, record):
+    regions = {(i // size, i % size): record[i] for i in range(size * size)}
+    queens = {(r, record[size * size + r]) for r in range(size)}
+    return queens, regions
+
+
+def record_size(size):
+    return size * size + size
+
+
+def build_one(task):
+    """Worker: one (size, seed) -> (size, level, record bytes)."""
+    size, seed = task
+    queens, regions = generate_puzzle(size, random.Random(seed))
+    return size, grade_puzzle(size, regions), encode_puzzle(size, queens, regions)
+
+
+def write_pack(path, sections):
+    """sections: {(size, level): [record bytes]} -> pack file (written atomically)."""
+    keys = sorted(sections)
+    offset = HEADER.size + SECTION.size * len(keys)
+    table = []
+    for size, level in keys:
+        table.append(SECTION.pack(size, level, len(sections[(size, level)]), offset))
+        offset += record_size(size) * len(sections[(size, level)])
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(keys)))
+        f.write(b"".join(table))
+        for key in keys:
+            f.write(b"".join(sections[key]))
+    os.replace(tmp, path)
+
+
+class PuzzlePack:
+    """Read-only view of a pack; records are decoded on demand from an mmap."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a Queens puzzle pack")
+        self.sections = {}  # (size, level) -> (count, offset)
+        for k in range(count):
+            size, level, n, offset = SECTION.unpack_from(self._map, HEADER.size + k * SECTION.size)
+            self.sections[(size, level)] = (n, offset)
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def count(self, size, level=None):
+        return sum(n for (s, lv), (n, _) in self.sections.items() if s == size and level in (None, lv))
+
+    def levels(self, size):
+        return sorted(lv for s, lv in self.sections if s == size)
+
+    def get(self, size, level, index):
+        """Return (queens, regions) for puzzle `index` of the (size, level) section."""
+        n, offset = self.sections[(size, level)]
+        if not 0 <= index < n:
+            raise IndexError(index)
+        start = offset + index * record_size(size)
+        return decode_puzzle(size, self._map[start:start + record_size(size)])
+
+
+def build(args):
+    levels = set(args.levels) if args.levels else None
+    sections = {}
+    wanted = {size: args.count for size in args.sizes}
+    seed = args.seed
+    started = time.monotonic()
+    made = 0
+    idle = 0
+    with Pool(args.workers) as pool:
+        while any(wanted.values()):
+            if idle >= IDLE_BATCHES:
+                missing = ", ".join(f"{left} of size {size}" for size, left in wanted.items() if left)
+                sys.exit(f"Gave up after {made} boards: still missing {missing} at levels "
+                         f"{', '.join(LEVEL_NAMES[lv] for lv in sorted(levels))}")
+            # Oversubscribe a little when filtering by level, most boards get thrown away
+            batch = []
+            kept = False
+            for size, left in wanted.items():
+                batch.extend((size, seed + k) for k in range(left * (1 if levels is None else 4)))
+                seed += left * 4
+            for size, level, record in pool.imap_unordered(build_one, batch, chunksize=4):
+                made += 1
+                if wanted[size] and (levels is None or level in levels):
+                    sections.setdefault((size, level), []).append(record)
+                    wanted[size] -= 1
+                    kept = True
+            idle = 0 if kept else idle + 1
+    write_pack(args.pack, sections)
+    elapsed = time.monotonic() - started
+    print(f"Generated {made} boards in {elapsed:.1f}s ({made / elapsed:.1f}/s), kept "
+          f"{sum(len(v) for v in sections.values())} in {args.pack}")
+    info(argparse.Namespace(pack=args.pack))
+
+
+def info(args):
+    pack = PuzzlePack(args.pack)
+    for (size, level), (n, _) in sorted(pack.sections.items()):
+        print(f"{size:>3}x{size:<3} {LEVEL_NAMES[level]:<15} {n:>7} puzzles")
+    pack.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or inspect Queens puzzle packs")
+    sub = parser.add_subparsers(dest="command", required=True)
+    b = sub.add_parser("build", help="generate a pack")
+    b.add_argument("pack")
+    b.add_argument("--sizes", type=int, nargs="+", default=[8])
+    b.add_argument("--count", type=int, default=100, help="puzzles per size")
+    b.add_argument("--levels", type=int, nargs="+", choices=GRADES,
+                   help="keep only these difficulty levels (1=Easy .. 5=Needs guessing)")
+    b.add_argument("--workers", type=int, default=os.cpu_count())
+    b.add_argument("--seed", type=int, default=1)
+    b.set_defaults(func=build)
+    i = sub.add_parser("info", help="list a pack's sections")
+    i.add_argument("pack")
+    i.set_defaults(func=info)
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
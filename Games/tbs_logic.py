@@ -0,0 +1,601 @@
+"""
+tbs_logic.py — rules, state and turn engine for mini_tbs, with no pygame dependency
+
+    battle = Battle(seed=42)
+    winner, turns = battle.play()      # AI vs AI until one side is wiped out
+    Battle(seed=42, width=256, height=256, army=200)   # large map, 200 units a side
+
+Everything random goes through Battle.rng, so a seed reproduces a battle exactly.
+mini_tbs.py draws a Battle and feeds it the player's clicks; tbs_sim.py runs
+thousands of them headless.
+"""
+
+import zlib
+import random
+import heapq
+import struct
+from array import array
+from collections import deque
+
+MAP_W, MAP_H = 10, 8
+OBSTACLE_DENSITY = 0.08
+MAX_TURNS = 200  # a headless battle that lasts this long is a draw
+
+# (name, hp, atk, mov) templates for generated armies
+ROSTER = {
+    "player": [("Thorn", 14, 5, 4), ("Caterina", 12, 4, 5)],
+    "enemy": [("Goblin", 10, 3, 3), ("Squire", 12, 4, 3)],
+}
+
+SIGHT = 6  # default sight radius, in tiles
+TEAMS = ("player", "enemy")
+
+# Battle.snapshot() layout: header, terrain cost bytes, units, then last-seen memory per team
+_SNAP_HEADER = struct.Struct("<IBH")   # turn number, side to move, unit count
+_SNAP_UNIT = struct.Struct("<HHhBB")   # x, y, hp, has_moved, has_acted
+_SNAP_COUNT = struct.Struct("<H")
+_SNAP_SEEN = struct.Struct("<HHH")     # unit index, x, y
+
+FAR = 1 << 30  # distance_field value for tiles no path reaches
+
+# -----------------------------
+# Simple Data Classes
+# -----------------------------
+class Unit:
+    __slots__ = ("x", "y", "team", "name", "max_hp", "hp", "atk", "mov", "range", "sight", "has_moved", "has_acted")
+
+    def __init__(self, x, y, team, name="Soldier", hp=10, atk=4, mov=3, range_=1, sight=SIGHT):
+        self.x = x
+        self.y = y
+        self.team = team  # "player" or "enemy"
+        self.name = name
+        self.max_hp = hp
+        self.hp = hp
+        self.atk = atk
+        self.mov = mov
+        self.range = range_
+        self.sight = sight
+        self.has_moved = False
+        self.has_acted = False
+
+    def pos(self):
+        return (self.x, self.y)
+
+    def alive(self):
+        return self.hp > 0
+
+# -----------------------------
+# Utility functions
+# -----------------------------
+def manhattan(a, b):
+    return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+class Board:
+    """Terrain as a flat cost array plus an occupancy grid that follows the units.
+
+    The grid carries a one-tile wall border, so cell (x, y) is index
+    (y + 1) * stride + x + 1 and the four neighbours of i are i + step for step in
+    self.steps, with no bounds checks. cost[i] is 0 for impassable tiles (and the
+    border). Reachability results are cached until something on the board changes
+    (see changed()).
+    """
+
+    def __init__(self, w, h):
+        self.w = w
+        self.h = h
+        self.stride = w + 2
+        size = self.stride * (h + 2)
+        self.cost = array("B", bytes(size))
+        for y in range(h):
+            start = self.index(0, y)
+            self.cost[start:start + w] = array("B", [1]) * w
+        self.occupant = [None] * size
+        self.steps = (1, -1, self.stride, -self.stride)
+        self.terrain_version = 0  # bumped whenever passability changes (invalidates sight)
+        self._reach = {}
+
+    def index(self, x, y):
+        return (y + 1) * self.stride + x + 1
+
+    def pos(self, i):
+        return (i % self.stride - 1, i // self.stride - 1)
+
+    def in_bounds(self, x, y):
+        return 0 <= x < self.w and 0 <= y < self.h
+
+    def changed(self):
+        self._reach.clear()
+
+    def passable(self, x, y):
+        return self.cost[self.index(x, y)] != 0
+
+    def set_passable(self, x, y, passable, cost=1):
+        self.cost[self.index(x, y)] = cost if passable else 0
+        self.terrain_version += 1
+        self.changed()
+
+    def unit_at(self, x, y):
+        return self.occupant[self.index(x, y)] if self.in_bounds(x, y) else None
+
+    def place(self, unit):
+        self.occupant[self.index(unit.x, unit.y)] = unit
+        self.changed()
+
+    def remove(self, unit):
+        i = self.index(unit.x, unit.y)
+        if self.occupant[i] is unit:
+            self.occupant[i] = None
+            self.changed()
+
+    def move(self, unit, x, y):
+        self.occupant[self.index(unit.x, unit.y)] = None
+        unit.x, unit.y = x, y
+        self.occupant[self.index(x, y)] = unit
+        self.changed()
+
+    def target_in_range(self, unit, seen=None):
+        """Nearest (then weakest) living opponent within unit.range, by scanning the grid.
+
+        seen: optional per-cell visibility counts; opponents on unseen cells are skipped.
+        """
+        best = None
+        r = unit.range
+        for dy in range(-r, r + 1):
+            span = r - abs(dy)
+            for dx in range(-span, span + 1):
+                other = self.unit_at(unit.x + dx, unit.y + dy)
+                if other is not None and other.team != unit.team \
+                        and (seen is None or seen[self.index(other.x, other.y)]):
+                    key = (abs(dx) + abs(dy), other.hp)
+                    if best is None or key < best[0]:
+                        best = (key, other)
+        return best[1] if best else None
+
+    def distance_field(self, sources):
+        """Multi-source Dijkstra: movement cost from each tile to a tile next to a source.
+
+        Units other than the sources don't block the field (they move during a phase);
+        impassable tiles are FAR.
+        """
+        dist = [FAR] * len(self.cost)
+        heap = []
+        for pos in sources:
+            i = self.index(*pos)
+            dist[i] = 0
+            heap.append((0, i))
+        heapq.heapify(heap)
+        source = set(i for _, i in heap)
+        cost, steps = self.cost, self.steps
+        while heap:
+            d, i = heapq.heappop(heap)
+            if d > dist[i]:
+                continue
+            # stepping onto i costs cost[i]; a source tile itself is never entered
+            nd = d + (0 if i in source else cost[i])
+            for step in steps:
+                j = i + step
+                if cost[j] and nd < dist[j]:
+                    dist[j] = nd
+                    heapq.heappush(heap, (nd, j))
+        return dist
+
+    def reachable(self, unit, mov, turn):
+        """compute_reachable() for a unit, memoized per (unit, position, turn)."""
+        key = (unit, unit.pos(), mov, turn)
+        reach = self._reach.get(key)
+        if reach is None:
+            reach = self._reach[key] = compute_reachable(unit.pos(), self, mov)
+        return reach
+
+# Dijkstra over the flat cost array: every tile whose cheapest path from start costs <= mov
+def compute_reachable(start, board, mov):
+    s = board.index(*start)
+    best = {s: 0}
+    heap = [(0, s)]
+    cost, occupant, steps = board.cost, board.occupant, board.steps
+    while heap:
+        d, i = heapq.heappop(heap)
+        if d > best[i]:
+            continue
+        for step in steps:
+            j = i + step
+            c = cost[j]
+            # Impassable, or occupied (only the start tile may hold a unit)
+            if not c or occupant[j] is not None:
+                continue
+            nd = d + c
+            if nd <= mov and nd < best.get(j, mov + 1):
+                best[j] = nd
+                heapq.heappush(heap, (nd, j))
+    return {board.pos(i) for i in best}
+
+# Simple path finder (BFS) returns path as list of coords from start->target inclusive
+def find_path(start, target, board):
+    s = board.index(*start)
+    t = board.index(*target)
+    q = deque([s])
+    came_from = {s: None}
+    while q:
+        i = q.popleft()
+        if i == t:
+            break
+        for step in board.steps:
+            j = i + step
+            if not board.cost[j] or board.occupant[j] is not None:
+                continue
+            if j not in came_from:
+                came_from[j] = i
+                q.append(j)
+    if t not in came_from:
+        return None  # no path
+    # reconstruct
+    path = []
+    cur = t
+    while cur is not None:
+        path.append(board.pos(cur))
+        cur = came_from[cur]
+    path.reverse()
+    return path
+
+# -----------------------------
+# Line of sight and fog of war
+# -----------------------------
+# (xx, xy, yx, yy) transforms mapping octant 0 onto each of the eight octants
+_OCTANTS = ((1, 0, 0, 1), (0, 1, 1, 0), (0, -1, 1, 0), (-1, 0, 0, 1),
+            (-1, 0, 0, -1), (0, -1, -1, 0), (0, 1, -1, 0), (1, 0, 0, -1))
+
+def shadowcast(board, ox, oy, radius):
+    """Recursive shadowcasting: board indices visible from (ox, oy). Walls block sight but are seen."""
+    seen = {board.index(ox, oy)}
+    for octant in _OCTANTS:
+        _cast_light(board, ox, oy, radius, 1, 1.0, 0.0, octant, seen)
+    return seen
+
+def _cast_light(board, ox, oy, radius, row, start, end, octant, seen):
+    if start < end:
+        return
+    xx, xy, yx, yy = octant
+    r2 = radius * radius
+    w, h, stride, cost = board.w, board.h, board.stride, board.cost
+    for j in range(row, radius + 1):
+        dx, dy = -j - 1, -j
+        blocked = False
+        new_start = start
+        while dx <= 0:
+            dx += 1
+            l_slope, r_slope = (dx - 0.5) / (dy + 0.5), (dx + 0.5) / (dy - 0.5)
+            if start < r_slope:
+                continue
+            if end > l_slope:
+                break
+            x, y = ox + dx * xx + dy * xy, oy + dx * yx + dy * yy
+            if 0 <= x < w and 0 <= y < h:
+                i = (y + 1) * stride + x + 1
+                if dx * dx + dy * dy <= r2:
+                    seen.add(i)
+                opaque = not cost[i]
+            else:
+                opaque = True
+            if blocked:
+                if opaque:
+                    new_start = r_slope
+                else:
+                    blocked = False
+                    start = new_start
+            elif opaque and j < radius:
+                blocked = True
+                _cast_light(board, ox, oy, radius, j + 1, start, l_slope, octant, seen)
+                new_start = r_slope
+        if blocked:
+            break
+
+class Visibility:
+    """Per-team visibility maps: how many of the team's units see each board cell.
+
+    Each unit's field of view is cached with the position and terrain version it was
+    cast from; update() recasts only units that moved (or all of them after a terrain
+    change) and adds/subtracts the difference into the team's counts.
+    """
+
+    def __init__(self, board):
+        self.board = board
+        self.counts = {}  # team -> array of per-cell viewer counts
+        self.fov = {}     # unit -> (pos, terrain_version, visible cells)
+
+    def update(self, units):
+        board = self.board
+        for u in units:
+            cached = self.fov.get(u)
+            if u.alive():
+                key = (u.pos(), board.terrain_version)
+                if cached is not None and cached[:2] == key:
+                    continue
+                cells = shadowcast(board, u.x, u.y, u.sight)
+                self.fov[u] = key + (cells,)
+            elif cached is not None:
+                cells = ()
+                del self.fov[u]
+            else:
+                continue
+            counts = self.counts.get(u.team)
+            if counts is None:
+                counts = self.counts[u.team] = array("H", [0]) * len(board.cost)
+            for i in cells:
+                counts[i] += 1
+            if cached is not None:
+                for i in cached[2]:
+                    counts[i] -= 1
+
+# -----------------------------
+# Battle: state + turn engine
+# -----------------------------
+class Battle:
+    def __init__(self, seed=None, width=MAP_W, height=MAP_H, army=0, fog=True):
+        """army=0 fields the four named prototype units; army=N spawns N per side.
+
+        With fog, each side (and its AI) only sees what its units can see.
+        """
+        self.seed = random.randrange(1 << 32) if seed is None else seed
+        self.rng = random.Random(self.seed)
+        self.options = {"width": width, "height": height, "army": army, "fog": fog}
+        # optional tbs_replay.Recorder; every state change below is reported to it
+        self.recorder = None
+
+        # create map: simple open map with some obstacles
+        self.board = Board(width, height)
+        # randomly add some obstacles for variety
+        for _ in range(int(width * height * OBSTACLE_DENSITY)):
+            rx = self.rng.randrange(width)
+            ry = self.rng.randrange(height)
+            self.board.set_passable(rx, ry, False)
+
+        # units
+        self.units = []
+        if army:
+            self.spawn_army("player", army, range(0, max(2, width // 5)))
+            self.spawn_army("enemy", army, range(width - max(2, width // 5), width))
+        else:
+            # player units (left side)
+            self.units.append(Unit(1, 1, "player", name="Thorn", hp=14, atk=5, mov=4, range_=1))
+            self.units.append(Unit(1, 3, "player", name="Caterina", hp=12, atk=4, mov=5, range_=1))
+            # enemy units (right side)
+            self.units.append(Unit(width-2, 2, "enemy", name="Goblin", hp=10, atk=3, mov=3, range_=1))
+            self.units.append(Unit(width-2, 5, "enemy", name="Squire", hp=12, atk=4, mov=3, range_=1))
+        for u in self.units:
+            self.board.place(u)
+        self.unit_index = {u: i for i, u in enumerate(self.units)}
+
+        # fog of war, plus where each side last saw the other side's units
+        self.fog = Visibility(self.board) if fog else None
+        self.last_seen = {"player": {}, "enemy": {}}
+
+        # turn management
+        self.turn = "player"  # or "enemy"
+        self.turn_number = 0
+        self.message = ""
+
+    def spawn_army(self, team, count, columns):
+        """Scatter count units from the team's roster over free tiles in the given columns."""
+        board = self.board
+        free = [(x, y) for x in columns for y in range(board.h) if board.passable(x, y)]
+        if len(free) < count:
+            raise ValueError(f"only {len(free)} free tiles for {count} {team} units")
+        for k, (x, y) in enumerate(self.rng.sample(free, count)):
+            name, hp, atk, mov = ROSTER[team][k % len(ROSTER[team])]
+            self.units.append(Unit(x, y, team, name=f"{name}{k}", hp=hp, atk=atk, mov=mov))
+
+    def __getstate__(self):
+        # a recorder holds open files; copies sent to AI workers don't need it
+        state = self.__dict__.copy()
+        state["recorder"] = None
+        return state
+
+    # -----------------------------
+    # Snapshots: the complete mutable state as bytes
+    # -----------------------------
+    def snapshot(self):
+        parts = [_SNAP_HEADER.pack(self.turn_number, TEAMS.index(self.turn), len(self.units)),
+                 self.board.cost.tobytes()]
+        parts.extend(_SNAP_UNIT.pack(u.x, u.y, u.hp, u.has_moved, u.has_acted) for u in self.units)
+        for team in TEAMS:
+            memory = self.last_seen[team]
+            parts.append(_SNAP_COUNT.pack(len(memory)))
+            parts.extend(_SNAP_SEEN.pack(self.unit_index[u], x, y) for u, (x, y) in memory.items())
+        return b"".join(parts)
+
+    def restore(self, blob):
+        """Load a snapshot() taken from a battle with the same seed and options."""
+        self.turn_number, turn, n = _SNAP_HEADER.unpack_from(blob, 0)
+        self.turn = TEAMS[turn]
+        offset = _SNAP_HEADER.size
+        board = self.board
+        board.cost = array("B", blob[offset:offset + len(board.cost)])
+        board.terrain_version += 1
+        offset += len(board.cost)
+        board.occupant = [None] * len(board.cost)
+        for u in self.units[:n]:
+            u.x, u.y, u.hp, moved, acted = _SNAP_UNIT.unpack_from(blob, offset)
+            u.has_moved, u.has_acted = bool(moved), bool(acted)
+            offset += _SNAP_UNIT.size
+            if u.alive():
+                board.occupant[board.index(u.x, u.y)] = u
+        board.changed()
+        for team in TEAMS:
+            (count,) = _SNAP_COUNT.unpack_from(blob, offset)
+            offset += _SNAP_COUNT.size
+            memory = self.last_seen[team] = {}
+            for _ in range(count):
+                i, x, y = _SNAP_SEEN.unpack_from(blob, offset)
+                offset += _SNAP_SEEN.size
+                memory[self.units[i]] = (x, y)
+        if self.fog is not None:
+            self.fog = Visibility(board)
+
+    def state_hash(self):
+        return zlib.crc32(self.snapshot())
+
+    def get_unit_at(self, x, y):
+        return self.board.unit_at(x, y)
+
+    def team(self, team):
+        return [u for u in self.units if u.team == team and u.alive()]
+
+    def winner(self):
+        """"player" or "enemy" once the other side is wiped out, else None."""
+        if not self.team("enemy"):
+            return "player"
+        if not self.team("player"):
+            return "enemy"
+        return None
+
+    def visibility(self, team):
+        """Per-cell viewer counts for team (index with board.index), or None without fog."""
+        if self.fog is None:
+            return None
+        self.fog.update(self.units)
+        return self.fog.counts.get(team) or array("H", [0]) * len(self.board.cost)
+
+    def sees(self, team, unit):
+        seen = self.visibility(team)
+        return seen is None or seen[self.board.index(unit.x, unit.y)] > 0
+
+    def visible_opponents(self, team):
+        """Living opponents team can see; also refreshes team's last-seen memory."""
+        seen = self.visibility(team)
+        theirs = [u for u in self.units if u.team != team and u.alive()
+                  and (seen is None or seen[self.board.index(u.x, u.y)])]
+        memory = self.last_seen[team]
+        for u in list(memory):
+            # forget the dead, and anyone whose remembered tile is in view but empty now
+            if not u.alive() or (seen is not None and seen[self.board.index(*memory[u])]):
+                del memory[u]
+        for u in theirs:
+            memory[u] = u.pos()
+        if self.recorder:
+            self.recorder.observe(team)
+        return theirs
+
+    def reachable(self, unit):
+        return self.board.reachable(unit, unit.mov if not unit.has_moved else 0, self.turn_number)
+
+    def damage(self, target, amount):
+        target.hp -= amount
+        if target.hp <= 0:
+            target.hp = 0
+            self.board.remove(target)
+
+    # Every move and hit goes through these two, so a recorder sees each one
+    def relocate(self, unit, x, y):
+        self.board.move(unit, x, y)
+        if self.recorder:
+            self.recorder.move(self.unit_index[unit], x, y)
+
+    def hit(self, unit, target):
+        self.damage(target, unit.atk)
+        if self.recorder:
+            self.recorder.attack(self.unit_index[unit], self.unit_index[target])
+
+    def move(self, unit, x, y):
+        """Move unit to a reachable tile; returns False if the move isn't legal."""
+        # reachable() is a Dijkstra over the live board, so anything in it has a path
+        if unit.team != self.turn or (x, y) not in self.reachable(unit):
+            return False
+        self.relocate(unit, x, y)
+        unit.has_moved = True
+        self.message = f"{unit.name} moved to {x},{y}."
+        return True
+
+    def attack(self, unit, target):
+        """Attack an opposing unit in range; returns False (with a reason in message) if not."""
+        if manhattan(unit.pos(), target.pos()) > unit.range:
+            self.message = "Target out of range."
+            return False
+        if not self.sees(unit.team, target):
+            self.message = "Can't see that target."
+            return False
+        self.hit(unit, target)
+        unit.has_acted = True
+        self.message = f"{unit.name} attacked {target.name} for {unit.atk} dmg!"
+        if target.hp <= 0:
+            self.message += f" {target.name} falls!"
+        return True
+
+    def end_turn(self):
+        for u in self.units:
+            u.has_moved = False
+            u.has_acted = False
+        self.turn = "enemy" if self.turn == "player" else "player"
+        self.turn_number += 1
+        if self.recorder:
+            self.recorder.end_turn(self)
+
+    def strike(self, unit, target, moved=False):
+        """AI attack (range already checked), with the HUD message."""
+        self.hit(unit, target)
+        self.message = f"{unit.name} {'moved and attacked' if moved else 'attacked'} {target.name} for {unit.atk}!"
+        if target.hp <= 0:
+            self.message += f" {target.name} falls!"
+
+    def apply_plan(self, plan):
+        """Play a planned turn: (unit index, destination, target index or None) per unit, then end it.
+
+        Each step is checked against the real board like a player's click; a step whose
+        unit can't legally reach its destination is skipped, attack and all.
+        """
+        for ui, dest, ti in plan:
+            unit = self.units[ui]
+            if not unit.alive() or unit.team != self.turn:
+                continue
+            moved = tuple(dest) != unit.pos()
+            if moved and not self.move(unit, *dest):
+                continue
+            if ti is not None:
+                target = self.units[ti]
+                if (target.alive() and target.team != unit.team and self.sees(unit.team, target)
+                        and manhattan(unit.pos(), target.pos()) <= unit.range):
+                    self.strike(unit, target, moved)
+        self.end_turn()
+
+    # AI for the side to move: walk the shared flow field toward the other side, attack if possible
+    def ai_turn(self):
+        if self.recorder:
+            self.recorder.ai_turn()
+        mine = self.team(self.turn)
+        theirs = self.visible_opponents(self.turn)
+        if mine and self.winner() is None:
+            # One distance field from every opponent in sight (else where they were last
+            # seen, else the far side of the map), shared by all of this side's units
+            if theirs:
+                goals = [u.pos() for u in theirs]
+            elif self.last_seen[self.turn]:
+                goals = list(self.last_seen[self.turn].values())
+            else:
+                goals = [(self.board.w - 1 if self.turn == "player" else 0, self.board.h // 2)]
+            field = self.board.distance_field(goals)
+            seen = self.visibility(self.turn)
+            for u in mine:
+                target = self.board.target_in_range(u, seen)
+                moved = False
+                if target is None:
+                    # walk to the reachable tile closest to any opponent, around walls and units
+                    here = field[self.board.index(u.x, u.y)]
+                    best = min(self.reachable(u), key=lambda pos: field[self.board.index(*pos)])
+                    if field[self.board.index(*best)] < here:
+                        self.relocate(u, *best)
+                        moved = True
+                    seen = self.visibility(self.turn)
+                    target = self.board.target_in_range(u, seen)
+                if target is not None:
+                    self.strike(u, target, moved)
+        self.end_turn()
+
+    def play(self, max_turns=MAX_TURNS, ai=None):
+        """Run AI against AI; returns (winner or None for a draw, turns played).
+
+        ai maps a team to a function taking the Battle and playing that side's turn
+        (e.g. tbs_search.take_turn); teams not in it use ai_turn().
+        """
+        ai = ai or {}
+        while self.winner() is None and self.turn_number < max_turns:
+            ai.get(self.turn, Battle.ai_turn)(self)
+        return self.winner(), self.turn_number
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+tbs_replay.py — record, replay and verify mini_tbs battles
+
+    python tbs_replay.py record battle.tbsl --seed 7 --army 30 --width 64 --height 48
+    python tbs_replay.py verify battle.tbsl                  # replay, check every turn's state
+    python tbs_replay.py verify battle.tbsl --resimulate     # also re-run greedy AI turns, timed
+    python tbs_replay.py verify battle.tbsl --from-turn 120  # start at the nearest snapshot
+
+mini_tbs.py --record PATH records the battle being played.
+
+The log is append-only, little-endian: a header (magic, seed, battle options,
+snapshot interval), then one opcode byte plus fields per state change:
+    MOVE unit x y | ATTACK unit target | OBSERVE team | AI_TURN | END_TURN turn crc32
+END_TURN carries the CRC-32 of Battle.snapshot() after the turn. Every
+snapshot_every turns the whole snapshot goes to <log>.snap together with the log
+offset it belongs to, so a replay can start at any turn without re-simulating
+from turn 0.
+"""
+
+import os
+import sys
+import time
+import struct
+import argparse
+
+from tbs_logic import Battle, TEAMS, MAP_W, MAP_H, MAX_TURNS
+
+MAGIC = b"TBSL"
+HEADER = struct.Struct("<4sQHHHBH")  # magic, seed, width, height, army, fog, snapshot interval
+SNAP_HEADER = struct.Struct("<IQI")   # turn number, log offset, snapshot length
+SNAPSHOT_EVERY = 10
+
+MOVE, ATTACK, OBSERVE, AI_TURN, END_TURN = range(1, 6)
+RECORDS = {
+    MOVE: struct.Struct("<HHH"),
+    ATTACK: struct.Struct("<HH"),
+    OBSERVE: struct.Struct("<B"),
+    AI_TURN: struct.Struct("<"),
+    END_TURN: struct.Struct("<II"),
+}
+
+
+class Recorder:
+    """Battle.recorder that appends every state change to a log, flushed once per turn."""
+
+    def __init__(self, path, battle, snapshot_every=SNAPSHOT_EVERY):
+        self.path = path
+        self.snapshot_every = snapshot_every
+        self.log = open(path, "wb")
+        self.snaps = open(path + ".snap", "wb")
+        o = battle.options
+        self.log.write(HEADER.pack(MAGIC, battle.seed, o["width"], o["height"], o["army"], o["fog"], snapshot_every))
+        self._snapshot(battle)
+        self.log.flush()
+        battle.recorder = self
+
+    def _write(self, op, *fields):
+        self.log.write(bytes((op,)) + RECORDS[op].pack(*fields))
+
+    def _snapshot(self, battle):
+        blob = battle.snapshot()
+        self.snaps.write(SNAP_HEADER.pack(battle.turn_number, self.log.tell(), len(blob)) + blob)
+        self.snaps.flush()
+
+    def move(self, unit, x, y):
+        self._write(MOVE, unit, x, y)
+
+    def attack(self, unit, target):
+        self._write(ATTACK, unit, target)
+
+    def observe(self, team):
+        self._write(OBSERVE, TEAMS.index(team))
+
+    def ai_turn(self):
+        self._write(AI_TURN)
+
+    def end_turn(self, battle):
+        self._write(END_TURN, battle.turn_number, battle.state_hash())
+        if battle.turn_number % self.snapshot_every == 0:
+            self._snapshot(battle)
+        self.log.flush()
+
+    def close(self):
+        self.log.close()
+        self.snaps.close()
+
+
+def open_log(path):
+    """Return (log file positioned after the header, Battle(seed, options) at turn 0)."""
+    f = open(path, "rb")
+    magic, seed, width, height, army, fog, _ = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a mini_tbs replay log")
+    return f, Battle(seed, width=width, height=height, army=army, fog=bool(fog))
+
+
+def snapshots(path):
+    """[(turn number, log offset, snapshot file offset, length)] from <log>.snap."""
+    index = []
+    try:
+        with open(path + ".snap", "rb") as f:
+            while True:
+                head = f.read(SNAP_HEADER.size)
+                if len(head) < SNAP_HEADER.size:
+                    break
+                turn, log_offset, length = SNAP_HEADER.unpack(head)
+                index.append((turn, log_offset, f.tell(), length))
+                f.seek(length, os.SEEK_CUR)
+    except FileNotFoundError:
+        pass
+    return index
+
+
+def records(f):
+    """Yield (op, fields) until the end of the log (a torn last record is ignored)."""
+    while True:
+        op = f.read(1)
+        if not op:
+            return
+        rec = RECORDS[op[0]]
+        data = f.read(rec.size)
+        if len(data) < rec.size:
+            return
+        yield op[0], rec.unpack(data)
+
+
+def seek_turn(path, f, battle, turn):
+    """Restore the latest snapshot at or before turn and position f to continue from it."""
+    best = None
+    for snap in snapshots(path):
+        if snap[0] <= turn and (best is None or snap[0] > best[0]):
+            best = snap
+    if best is None:
+        return
+    _, log_offset, snap_offset, length = best
+    with open(path + ".snap", "rb") as s:
+        s.seek(snap_offset)
+        battle.restore(s.read(length))
+    f.seek(log_offset)
+
+
+def verify(path, from_turn=0, resimulate=False):
+    """Replay a log; returns (turns checked, first mismatching turn or None, [(turn, seconds)])."""
+    f, battle = open_log(path)
+    if from_turn:
+        seek_turn(path, f, battle, from_turn)
+    timings = []
+    checked = 0
+    skipping = False  # inside a resimulated AI turn: its logged actions are already done
+    t0 = time.perf_counter()
+    with f:
+        for op, fields in records(f):
+            if op == END_TURN:
+                turn, crc = fields
+                if not skipping:
+                    battle.end_turn()
+                skipping = False
+                timings.append((turn, time.perf_counter() - t0))
+                if battle.turn_number != turn or battle.state_hash() != crc:
+                    return checked, turn, timings
+                checked += 1
+                t0 = time.perf_counter()
+            elif skipping:
+                continue
+            elif op == MOVE:
+                unit, x, y = fields
+                battle.relocate(battle.units[unit], x, y)
+            elif op == ATTACK:
+                unit, target = fields
+                battle.hit(battle.units[unit], battle.units[target])
+            elif op == OBSERVE:
+                battle.visible_opponents(TEAMS[fields[0]])
+            elif op == AI_TURN and resimulate:
+                battle.ai_turn()
+                skipping = True
+    return checked, None, timings
+
+
+def record(args):
+    from tbs_search import take_turn
+    battle = Battle(args.seed, width=args.width, height=args.height, army=args.army, fog=not args.no_fog)
+    recorder = Recorder(args.log, battle, args.snapshot_every)
+    ai = {team: lambda b: take_turn(b, args.budget)
+          for team, name in (("player", args.player_ai), ("enemy", args.enemy_ai)) if name == "search"}
+    started = time.perf_counter()
+    winner, turns = battle.play(args.max_turns, ai)
+    recorder.close()
+    print(f"seed {battle.seed}: {winner or 'draw'} after {turns} turns in {time.perf_counter() - started:.2f}s "
+          f"-> {args.log} ({os.path.getsize(args.log)} bytes, {os.path.getsize(args.log + '.snap')} bytes of snapshots)")
+
+
+def verify_cmd(args):
+    checked, bad, timings = verify(args.log, args.from_turn, args.resimulate)
+    if timings:
+        times = sorted(t for _, t in timings)
+        slowest = sorted(timings, key=lambda t: t[1], reverse=True)[:5]
+        print(f"{len(times)} turns: mean {sum(times) / len(times) * 1000:.2f} ms, "
+              f"median {times[len(times) // 2] * 1000:.2f} ms, max {times[-1] * 1000:.2f} ms")
+        print("slowest turns: " + ", ".join(f"{turn} ({t * 1000:.1f} ms)" for turn, t in slowest))
+    if bad is not None:
+        print(f"MISMATCH at turn {bad} after {checked} matching turns")
+        return 1
+    print(f"OK: {checked} turns reproduce the recorded state")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record and verify mini_tbs replays")
+    sub = parser.add_subparsers(dest="command", required=True)
+    r = sub.add_parser("record", help="play an AI-vs-AI battle headless and record it")
+    r.add_argument("log")
+    r.add_argument("--seed", type=int)
+    r.add_argument("--width", type=int, default=MAP_W)
+    r.add_argument("--height", type=int, default=MAP_H)
+    r.add_argument("--army", type=int, default=0)
+    r.add_argument("--no-fog", action="store_true")
+    r.add_argument("--player-ai", choices=("greedy", "search"), default="greedy")
+    r.add_argument("--enemy-ai", choices=("greedy", "search"), default="greedy")
+    r.add_argument("--budget", type=float, default=0.2, help="seconds per turn for the search AI")
+    r.add_argument("--max-turns", type=int, default=MAX_TURNS)
+    r.add_argument("--snapshot-every", type=int, default=SNAPSHOT_EVERY)
+    r.set_defaults(func=record)
+    v = sub.add_parser("verify", help="replay a log and check every turn's state")
+    v.add_argument("log")
+    v.add_argument("--from-turn", type=int, default=0, help="start from the nearest snapshot at or before this turn")
+    v.add_argument("--resimulate", action="store_true", help="re-run greedy AI turns instead of applying their logged actions")
+    v.set_defaults(func=verify_cmd)
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,316 @@
+"""
+tbs_search.py — time-budgeted alpha-beta AI for mini_tbs
+
+    from tbs_search import take_turn
+    take_turn(battle, budget=1.0)      # plan and play the side to move's whole turn
+
+The search runs on SearchState, a compact copy of a Battle: per-unit stats in
+parallel lists, an occupancy dict and an incrementally updated Zobrist hash, with
+make/unmake instead of copying per node. One ply is one unit's action (move, then
+optionally attack); a side's units act in index order, then the other side moves.
+
+Iterative-deepening negamax with alpha-beta and a transposition table picks each
+unit's action. The turn budget is shared among the units still to act, and a unit
+plays the best action from the deepest search that finished in time.
+"""
+
+import time
+import heapq
+
+from tbs_logic import TEAMS
+
+TURN_BUDGET = 1.0       # seconds per side turn
+MAX_DEPTH = 16          # plies (unit actions)
+MOVE_CANDIDATES = 3     # non-attacking destinations tried per unit, best by distance field
+ATTACK_TILES = 2        # tiles to attack each target from
+APPROACH_WEIGHT = 0.2   # eval bonus per tile closer to the enemy (capped at APPROACH_CAP)
+APPROACH_CAP = 30
+TT_MAX = 500_000        # transposition table entries before it is cleared
+WIN = 1_000_000
+
+EXACT, LOWER, UPPER = 0, 1, 2
+MASK64 = (1 << 64) - 1
+
+
+def _zobrist(n):
+    """splitmix64: Zobrist keys computed on demand instead of a units x cells table."""
+    z = (n + 0x9E3779B97F4A7C15) & MASK64
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK64
+    return z ^ (z >> 31)
+
+
+class _Timeout(Exception):
+    pass
+
+
+class SearchState:
+    """Mutable search position built from a Battle. Units keep their Battle indices."""
+
+    def __init__(self, battle):
+        board = self.board = battle.board
+        units = battle.units
+        self.n = len(units)
+        self.cells = len(board.cost)
+        self.team = [TEAMS.index(u.team) for u in units]
+        self.atk = [u.atk for u in units]
+        self.mov = [u.mov for u in units]
+        self.reach = [u.range for u in units]
+        # under fog, opponents the side to move can't see take no part in the search,
+        # but their tiles stay blocked: the real move would fail there
+        visible = set(battle.visible_opponents(battle.turn)) | set(battle.team(battle.turn))
+        self.hp = [u.hp if u in visible else 0 for u in units]
+        self.pos = [board.index(u.x, u.y) for u in units]
+        self.occ = {self.pos[i]: i for i in range(self.n) if self.hp[i] > 0}
+        self.blocked = frozenset(self.pos[i] for i, u in enumerate(units) if u.alive() and u not in visible)
+        self.alive = [sum(1 for i in range(self.n) if self.hp[i] > 0 and self.team[i] == t) for t in (0, 1)]
+        self.order = [[i for i in range(self.n) if self.team[i] == t] for t in (0, 1)]
+        self.side = TEAMS.index(battle.turn)
+        self.k = 0
+        self._skip_dead()
+        # Static per-side distance fields toward the opponents' starting positions
+        self.field = [board.distance_field([board.pos(self.pos[i]) for i in self.occ.values() if self.team[i] != t])
+                      for t in (0, 1)]
+        self.hash = self._turn_key()
+        for i in range(self.n):
+            self.hash ^= self._hp_key(i, self.hp[i])
+            if self.hp[i] > 0:
+                self.hash ^= self._pos_key(i, self.pos[i])
+
+    def _pos_key(self, i, cell):
+        return _zobrist(3 * (i * self.cells + cell))
+
+    def _hp_key(self, i, hp):
+        return _zobrist(3 * (i * 1024 + max(hp, 0)) + 1)
+
+    def _turn_key(self):
+        return _zobrist(3 * (self.side * self.n + self.k) + 2)
+
+    def _skip_dead(self):
+        """Advance (side, k) to the next living unit to act, switching sides at the end of a turn."""
+        for _ in range(2):
+            order = self.order[self.side]
+            while self.k < len(order) and self.hp[order[self.k]] <= 0:
+                self.k += 1
+            if self.k < len(order):
+                return
+            self.side ^= 1
+            self.k = 0
+
+    def over(self):
+        return not self.alive[0] or not self.alive[1]
+
+    def actor(self):
+        return self.order[self.side][self.k]
+
+    # -----------------------------
+    # make / unmake
+    # -----------------------------
+    def make(self, action):
+        i, dest, target = action
+        undo = (action, self.pos[i], self.hp[target] if target >= 0 else 0, self.side, self.k, self.hash)
+        if dest != self.pos[i]:
+            del self.occ[self.pos[i]]
+            self.occ[dest] = i
+            self.hash ^= self._pos_key(i, self.pos[i]) ^ self._pos_key(i, dest)
+            self.pos[i] = dest
+        if target >= 0:
+            old = self.hp[target]
+            new = max(0, old - self.atk[i])
+            self.hp[target] = new
+            self.hash ^= self._hp_key(target, old) ^ self._hp_key(target, new)
+            if new == 0:
+                del self.occ[self.pos[target]]
+                self.hash ^= self._pos_key(target, self.pos[target])
+                self.alive[self.team[target]] -= 1
+        self.hash ^= self._turn_key()
+        self.k += 1
+        if not self.over():
+            self._skip_dead()
+        self.hash ^= self._turn_key()
+        return undo
+
+    def unmake(self, undo):
+        (i, dest, target), old_pos, old_hp, self.side, self.k, self.hash = undo
+        if target >= 0:
+            if self.hp[target] == 0:
+                self.occ[self.pos[target]] = target
+                self.alive[self.team[target]] += 1
+            self.hp[target] = old_hp
+        if dest != old_pos:
+            del self.occ[dest]
+            self.occ[old_pos] = i
+            self.pos[i] = old_pos
+
+    # -----------------------------
+    # move generation and evaluation
+    # -----------------------------
+    def _reachable(self, i):
+        """Dijkstra from unit i over the board cost array, blocked by other units (seen or not)."""
+        cost, steps, occ, blocked, mov = self.board.cost, self.board.steps, self.occ, self.blocked, self.mov[i]
+        s = self.pos[i]
+        best = {s: 0}
+        heap = [(0, s)]
+        while heap:
+            d, c = heapq.heappop(heap)
+            if d > best[c]:
+                continue
+            for step in steps:
+                j = c + step
+                nd = d + cost[j]
+                if cost[j] and j not in occ and j not in blocked and nd <= mov and nd < best.get(j, mov + 1):
+                    best[j] = nd
+                    heapq.heappush(heap, (nd, j))
+        return best
+
+    def _targets_from(self, i, cell):
+        board, r = self.board, self.reach[i]
+        x, y = board.pos(cell)
+        for dy in range(-r, r + 1):
+            span = r - abs(dy)
+            for dx in range(-span, span + 1):
+                if board.in_bounds(x + dx, y + dy):
+                    t = self.occ.get(board.index(x + dx, y + dy))
+                    if t is not None and self.team[t] != self.team[i]:
+                        yield t
+
+    def actions(self, first=None):
+        """Ordered candidate actions for the unit to act: kills, other attacks, then moves."""
+        i = self.actor()
+        field = self.field[self.team[i]]
+        cells = sorted(self._reachable(i), key=lambda c: (c != self.pos[i], field[c]))
+        attacks = {}
+        for cell in cells:
+            for t in self._targets_from(i, cell):
+                froms = attacks.setdefault(t, [])
+                if len(froms) < ATTACK_TILES:
+                    froms.append(cell)
+        scored = []
+        for t, froms in attacks.items():
+            kill = self.hp[t] <= self.atk[i]
+            for cell in froms:
+                scored.append(((0 if kill else 1, -self.atk[t], self.hp[t]), (i, cell, t)))
+        scored.sort()
+        ordered = [a for _, a in scored]
+        moves = sorted(cells, key=lambda c: field[c])[:MOVE_CANDIDATES]
+        if self.pos[i] not in moves:
+            moves.append(self.pos[i])
+        ordered.extend((i, cell, -1) for cell in moves)
+        if first in ordered:
+            ordered.remove(first)
+            ordered.insert(0, first)
+        return ordered
+
+    def evaluate(self):
+        """Score for the side to act: hp weighted by attack power, plus closing distance."""
+        score = [0.0, 0.0]
+        for i in self.occ.values():
+            t = self.team[i]
+            score[t] += (self.hp[i] + 4) * self.atk[i]
+            score[t] -= APPROACH_WEIGHT * min(self.field[t][self.pos[i]], APPROACH_CAP)
+        return score[self.side] - score[self.side ^ 1]
+
+
+class Search:
+    """Alpha-beta over a SearchState with a transposition table kept for the whole turn."""
+
+    def __init__(self, battle):
+        self.state = SearchState(battle)
+        self.tt = {}
+        self.nodes = 0
+        self.deadline = 0.0
+
+    def best_action(self, deadline):
+        """Best action for the unit to act, from the deepest search finished by deadline."""
+        state = self.state
+        self.deadline = deadline
+        best = state.actions()[0]  # move ordering's pick, if not even depth 1 finishes
+        for depth in range(1, MAX_DEPTH + 1):
+            try:
+                _, move = self._negamax(depth, -WIN - 1, WIN + 1, 0)
+            except _Timeout:
+                break
+            if move is not None:
+                best = move
+            if time.perf_counter() >= deadline:
+                break
+        return best
+
+    def _negamax(self, depth, alpha, beta, ply):
+        self.nodes += 1
+        if not self.nodes & 255 and time.perf_counter() > self.deadline:
+            raise _Timeout
+        state = self.state
+        if state.over():
+            # the side to act is whoever still has units; sooner wins score higher
+            return WIN - ply, None
+        entry = self.tt.get(state.hash)
+        tt_move = None
+        if entry is not None:
+            e_depth, e_value, e_flag, tt_move = entry
+            if e_depth >= depth and ply:
+                if e_flag == EXACT:
+                    return e_value, tt_move
+                if e_flag == LOWER and e_value >= beta:
+                    return e_value, tt_move
+                if e_flag == UPPER and e_value <= alpha:
+                    return e_value, tt_move
+        if depth == 0:
+            return state.evaluate(), None
+
+        orig_alpha = alpha
+        best_value, best_move = -WIN - 1, None
+        side = state.side
+        for action in state.actions(tt_move):
+            undo = state.make(action)
+            try:
+                # consecutive units of one side don't flip the sign (a finished game keeps
+                # the winner to act)
+                if state.side == side:
+                    value, _ = self._negamax(depth - 1, alpha, beta, ply + 1)
+                else:
+                    value, _ = self._negamax(depth - 1, -beta, -alpha, ply + 1)
+                    value = -value
+            finally:
+                state.unmake(undo)
+            if value > best_value:
+                best_value, best_move = value, action
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+
+        if len(self.tt) >= TT_MAX:
+            self.tt.clear()
+        flag = UPPER if best_value <= orig_alpha else LOWER if best_value >= beta else EXACT
+        self.tt[state.hash] = (depth, best_value, flag, best_move)
+        return best_value, best_move
+
+
+def plan_turn(battle, budget=TURN_BUDGET):
+    """Search every unit of the side to move; returns a plan for Battle.apply_plan().
+
+    Returns None when no opponent is in sight (nothing to search against; the greedy
+    AI explores instead). Takes and returns plain data, so it can run in a worker process.
+    """
+    search = Search(battle)
+    state = search.state
+    if state.over():
+        return None
+    side = state.side
+    deadline = time.perf_counter() + budget
+    plan = []
+    while not state.over() and state.side == side:
+        left = sum(1 for i in state.order[side][state.k:] if state.hp[i] > 0)
+        now = time.perf_counter()
+        i, cell, target = search.best_action(now + max(0.0, deadline - now) / left)
+        plan.append((i, state.board.pos(cell), target if target >= 0 else None))
+        state.make((i, cell, target))
+    return plan
+
+
+def take_turn(battle, budget=TURN_BUDGET):
+    plan = plan_turn(battle, budget)
+    if plan is None:
+        battle.ai_turn()
+    else:
+        battle.apply_plan(plan)
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+tbs_sim.py — run mini_tbs battles headless, AI against AI, for balancing and AI testing
+
+    python tbs_sim.py --battles 10000
+    python tbs_sim.py --battles 500 --seed 1000 --workers 1
+    python tbs_sim.py --battles 8 --width 256 --height 256 --army 200 --chunk 1
+    python tbs_sim.py --battles 200 --enemy-ai search --budget 0.2 --chunk 5
+
+Battle i uses seed (--seed + i), so any single battle can be replayed with
+tbs_logic.Battle(seed).play().
+"""
+
+import os
+import sys
+import time
+import argparse
+import functools
+from collections import Counter
+from multiprocessing import Pool
+
+from tbs_logic import Battle, MAX_TURNS, MAP_W, MAP_H
+from tbs_search import take_turn, TURN_BUDGET
+
+CHUNK = 200  # battles per worker task; results come back already tallied
+AIS = ("greedy", "search")  # Battle.ai_turn, tbs_search.take_turn
+
+
+def run_chunk(task):
+    """Worker: play seeds [start, stop) and return (wins Counter, turn counts)."""
+    start, stop, max_turns, map_args, ai_args = task
+    wins = Counter()
+    turns = []
+    ai = {team: functools.partial(take_turn, budget=ai_args["budget"])
+          for team in ("player", "enemy") if ai_args[team] == "search"}
+    for seed in range(start, stop):
+        winner, played = Battle(seed, **map_args).play(max_turns, ai)
+        wins[winner or "draw"] += 1
+        turns.append(played)
+    return wins, turns
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch AI-vs-AI battles for mini_tbs")
+    parser.add_argument("--battles", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first battle")
+    parser.add_argument("--max-turns", type=int, default=MAX_TURNS, help="turns before a battle is a draw")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--width", type=int, default=MAP_W)
+    parser.add_argument("--height", type=int, default=MAP_H)
+    parser.add_argument("--army", type=int, default=0, help="units per side (0: the four prototype units)")
+    parser.add_argument("--no-fog", action="store_true", help="both sides see the whole map")
+    parser.add_argument("--chunk", type=int, default=CHUNK, help="battles per worker task")
+    parser.add_argument("--player-ai", choices=AIS, default="greedy")
+    parser.add_argument("--enemy-ai", choices=AIS, default="greedy")
+    parser.add_argument("--budget", type=float, default=TURN_BUDGET, help="seconds per turn for the search AI")
+    args = parser.parse_args()
+
+    map_args = {"width": args.width, "height": args.height, "army": args.army, "fog": not args.no_fog}
+    ai_args = {"player": args.player_ai, "enemy": args.enemy_ai, "budget": args.budget}
+    tasks = [(s, min(s + args.chunk, args.seed + args.battles), args.max_turns, map_args, ai_args)
+             for s in range(args.seed, args.seed + args.battles, args.chunk)]
+    wins = Counter()
+    turns = []
+    started = time.monotonic()
+    with Pool(args.workers) as pool:
+        for chunk_wins, chunk_turns in pool.imap_unordered(run_chunk, tasks):
+            wins.update(chunk_wins)
+            turns.extend(chunk_turns)
+    elapsed = time.monotonic() - started
+
+    turns.sort()
+    print(f"{args.battles} battles in {elapsed:.2f}s ({args.battles / elapsed:.0f} battles/s, {args.workers} workers)")
+    for outcome in ("player", "enemy", "draw"):
+        print(f"  {outcome:<7} {wins[outcome]:>7}  {wins[outcome] / args.battles:6.1%}")
+    print(f"  turns   mean {sum(turns) / len(turns):.1f}  median {turns[len(turns) // 2]}  max {turns[-1]}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
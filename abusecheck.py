@@ -0,0 +1,295 @@
+"""
+Rate-limited AbuseIPDB lookups for the monitors: riskiest first, within quota.
+
+    checker = AbuseChecker(API_KEY, check_per_day=1000, block_per_day=100)
+    checker.submit("203.0.113.7", risk=3)       # as often as you like, from the scan loop
+    for ip, blacklisted, score in checker.run():  # once per cycle: spends only what the quota allows
+        ...
+
+Every endpoint has a token bucket refilled at the plan's daily rate, with a small
+burst on top, so a scan that turns up hundreds of new remotes drains at a steady,
+known pace instead of burning the day's quota (and hitting 429s) in one go.
+Pending addresses wait in a priority queue ordered by risk; an address seen again
+gains the new risk on top. When several queued IPv4 addresses share a /24, one
+check-block call answers for all of them. Only globally routed addresses are sent
+at all.
+
+A 429 pauses that endpoint for its Retry-After (or an exponential backoff) and puts
+the address back in line. Other failures are retried with backoff up to
+MAX_ATTEMPTS; after that the score is reported as None ("unknown"), never as 0.
+"""
+
+import time
+import heapq
+import logging
+import ipaddress
+
+import requests
+
+API = "https://api.abuseipdb.com/api/v2"
+BLACKLIST_SCORE = 50     # abuseConfidenceScore above this counts as blacklisted
+MAX_AGE_DAYS = 30
+BURST = 20               # requests allowed on top of the steady daily rate
+BLOCK_MIN_IPS = 3        # queued addresses in one /24 before it gets a check-block call
+CACHE_TTL = 6 * 3600     # seconds a score is reused instead of asked for again
+MAX_PENDING = 10_000
+MAX_ATTEMPTS = 4
+BACKOFF = 30.0           # seconds before the first retry; doubles per attempt
+BACKOFF_MAX = 3600.0
+TIMEOUT = 10.0
+
+
+class TokenBucket:
+    """rate tokens per second up to capacity; pause() stops it outright for a while."""
+
+    def __init__(self, per_day, burst=BURST, clock=time.monotonic):
+        if per_day <= 0:
+            raise ValueError(f"a token bucket needs a positive daily rate, not {per_day}")
+        self.rate = per_day / 86400
+        self.capacity = burst + 1
+        self.tokens = float(self.capacity)
+        self.clock = clock
+        self.updated = clock()
+        self.paused_until = 0.0
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return now
+
+    def take(self):
+        if self._refill() < self.paused_until or self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def ready(self):
+        return self._refill() >= self.paused_until and self.tokens >= 1
+
+    def wait_time(self):
+        """Seconds until take() can succeed."""
+        now = self._refill()
+        return max(self.paused_until - now, (1 - self.tokens) / self.rate if self.tokens < 1 else 0.0)
+
+    def pause(self, seconds):
+        self.paused_until = max(self.paused_until, self.clock() + seconds)
+
+    def sync(self, remaining):
+        """Never believe in more tokens than the server says are left today."""
+        self._refill()
+        self.tokens = min(self.tokens, float(remaining))
+
+
+class _Pending:
+    __slots__ = ("ip", "risk", "attempts", "not_before")
+
+    def __init__(self, ip, risk):
+        self.ip = ip
+        self.risk = risk
+        self.attempts = 0
+        self.not_before = 0.0
+
+
+class RateLimited(Exception):
+    def __init__(self, retry_after):
+        super().__init__(f"rate limited, retry after {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class AbuseChecker:
+    """Queue of addresses to look up, drained by run() within the plan's quota."""
+
+    def __init__(self, api_key, check_per_day=1000, block_per_day=100, burst=BURST,
+                 session=None, clock=time.monotonic):
+        self.api_key = api_key
+        self.session = session or requests.Session()
+        self.clock = clock
+        self.buckets = {"check": TokenBucket(check_per_day, burst, clock),
+                        "check-block": TokenBucket(block_per_day, max(1, burst // 10), clock)}
+        self.heap = []       # (-risk, seq, ip); stale entries are skipped
+        self.pending = {}    # ip -> _Pending
+        self.networks = {}   # IPv4 /24 -> set of pending ips in it
+        self.cache = {}      # ip -> (score, time)
+        self.seq = 0
+        self.requests = {"check": 0, "check-block": 0}
+        self.limited = {"check": 0, "check-block": 0}  # 429s in a row, for the backoff
+
+    def __len__(self):
+        return len(self.pending)
+
+    # -----------------------------
+    # queue
+    # -----------------------------
+    def submit(self, ip, risk=1):
+        """Queue ip for a lookup; returns a cached (blacklisted, score) instead if there is one.
+
+        Returns None once queued, or False if the queue is full and ip was left out.
+        """
+        cached = self.cache.get(ip)
+        if cached and self.clock() - cached[1] < CACHE_TTL:
+            return cached[0] > BLACKLIST_SCORE, cached[0]
+        item = self.pending.get(ip)
+        if item is None:
+            if len(self.pending) >= MAX_PENDING:
+                logging.warning(f"AbuseIPDB queue full, not checking {ip}")
+                return False
+            item = self.pending[ip] = _Pending(ip, 0)
+            net = _network(ip)
+            if net:
+                self.networks.setdefault(net, set()).add(ip)
+        item.risk += risk
+        self._push(item)
+        return None
+
+    def _push(self, item):
+        self.seq += 1
+        heapq.heappush(self.heap, (-item.risk, self.seq, item.ip))
+
+    def _resolve(self, ip, score, results):
+        item = self.pending.pop(ip, None)
+        if item is None:
+            return
+        net = _network(ip)
+        if net:
+            members = self.networks[net]
+            members.discard(ip)
+            if not members:
+                del self.networks[net]
+        if score is not None:
+            self.cache[ip] = (score, self.clock())
+        results.append((ip, score is not None and score > BLACKLIST_SCORE, score))
+
+    # -----------------------------
+    # draining
+    # -----------------------------
+    def run(self):
+        """Look up queued addresses, riskiest first, while the buckets allow.
+
+        Never sleeps: what the quota doesn't cover now stays queued for the next call.
+        Returns [(ip, blacklisted, score)], score None when AbuseIPDB couldn't say.
+        """
+        results = []
+        deferred = []
+        now = self.clock()
+        while self.heap:
+            neg_risk, seq, ip = self.heap[0]
+            item = self.pending.get(ip)
+            if item is None or -neg_risk != item.risk:
+                heapq.heappop(self.heap)  # answered already, or re-queued with more risk
+                continue
+            if item.not_before > now:
+                deferred.append(heapq.heappop(self.heap))
+                continue
+            if not _is_public(ip):
+                heapq.heappop(self.heap)
+                self._resolve(ip, 0, results)
+                continue
+            net = _network(ip)
+            members = self.networks.get(net, ())
+            if len(members) >= BLOCK_MIN_IPS and self.buckets["check-block"].ready():
+                endpoint = "check-block"
+            elif self.buckets["check"].ready():
+                endpoint = "check"
+            else:
+                break  # the top of the queue has to wait; don't let lower risks jump it
+            heapq.heappop(self.heap)
+            self.buckets[endpoint].take()
+            try:
+                if endpoint == "check-block":
+                    scores = self._check_block(net)
+                    for member in list(members):
+                        self._resolve(member, scores.get(member, 0), results)
+                else:
+                    self._resolve(ip, self._check(ip), results)
+            except RateLimited as exc:
+                logging.warning(f"AbuseIPDB {endpoint}: {exc}")
+                self.buckets[endpoint].pause(exc.retry_after)
+                self._push(item)
+            except (requests.RequestException, ValueError, KeyError) as exc:
+                item.attempts += 1
+                if item.attempts >= MAX_ATTEMPTS:
+                    logging.error(f"AbuseIPDB error for {ip}, giving up after {item.attempts} attempts: {exc}")
+                    self._resolve(ip, None, results)
+                else:
+                    logging.error(f"AbuseIPDB error for {ip} (attempt {item.attempts}): {exc}")
+                    item.not_before = now + _backoff(item.attempts)
+                    self._push(item)
+        for entry in deferred:
+            heapq.heappush(self.heap, entry)
+        return results
+
+    def wait_time(self):
+        """Seconds until the next plain check can go out (0 if nothing is queued)."""
+        return self.buckets["check"].wait_time() if self.pending else 0.0
+
+    # -----------------------------
+    # AbuseIPDB
+    # -----------------------------
+    def _get(self, endpoint, params):
+        self.requests[endpoint] += 1
+        response = self.session.get(
+            f"{API}/{endpoint}",
+            headers={"Key": self.api_key, "Accept": "application/json"},
+            params=dict(params, maxAgeInDays=MAX_AGE_DAYS),
+            timeout=TIMEOUT,
+        )
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        if remaining is not None and remaining.isdigit():
+            self.buckets[endpoint].sync(int(remaining))
+        if response.status_code == 429:
+            self.limited[endpoint] += 1
+            retry = response.headers.get("Retry-After", "")
+            raise RateLimited(float(retry) if retry.isdigit() else _backoff(self.limited[endpoint]))
+        self.limited[endpoint] = 0
+        response.raise_for_status()
+        return response.json()["data"]
+
+    def _check(self, ip):
+        return self._get("check", {"ipAddress": ip})["abuseConfidenceScore"]
+
+    def _check_block(self, net):
+        """{ip: score} for the addresses in net reported lately (the rest are clean)."""
+        data = self._get("check-block", {"network": net})
+        return {r["ipAddress"]: r["abuseConfidenceScore"] for r in data.get("reportedAddress", ())}
+
+    def check_now(self, ip):
+        """One blocking lookup outside the queue, still paced by the check bucket: (blacklisted, score)."""
+        cached = self.cache.get(ip)
+        if cached and self.clock() - cached[1] < CACHE_TTL:
+            return cached[0] > BLACKLIST_SCORE, cached[0]
+        if not _is_public(ip):
+            return False, 0
+        bucket = self.buckets["check"]
+        while not bucket.take():
+            time.sleep(bucket.wait_time())
+        try:
+            score = self._check(ip)
+        except RateLimited as exc:
+            logging.warning(f"AbuseIPDB check: {exc}")
+            bucket.pause(exc.retry_after)
+            return False, None
+        except (requests.RequestException, ValueError, KeyError) as exc:
+            logging.error(f"AbuseIPDB error for {ip}: {exc}")
+            return False, None
+        self.cache[ip] = (score, self.clock())
+        return score > BLACKLIST_SCORE, score
+
+
+def _backoff(attempt):
+    return min(BACKOFF * 2 ** (attempt - 1), BACKOFF_MAX)
+
+
+def _is_public(ip):
+    try:
+        return ipaddress.ip_address(ip).is_global
+    except ValueError:
+        return False
+
+
+def _network(ip):
+    """The /24 an IPv4 address sits in ("198.51.100.0/24"), or None."""
+    if ":" in ip:
+        return None
+    head, _, _ = ip.rpartition(".")
+    return f"{head}.0/24" if head else None
@@ -2,12 +2,23 @@ import psutil
 
 cpu_limit = 80.0
 
-for proc in psutil.process_iter(['pid', 'name', 'cpu_percent']):
-    try:
-        cpu = proc.cpu_percent(interval=0.1)
-        if cpu > cpu_limit:
-            print(f"Killing {proc.info['name']} (PID {proc.pid}) using {cpu:.2f}% CPU")
-            proc.kill()
-    except (psutil.NoSuchProcess, psutil.AccessDenied):
-        continue
 
+def kill_cpu_hogs(cpu_limit=cpu_limit, interval=0.1, dry_run=False):
+    """Kill every process above cpu_limit percent. Returns [(pid, name, cpu)] of the offenders."""
+    offenders = []
+    for proc in psutil.process_iter(['pid', 'name', 'cpu_percent']):
+        try:
+            cpu = proc.cpu_percent(interval=interval)
+            if cpu > cpu_limit:
+                action = "Would kill" if dry_run else "Killing"
+                print(f"{action} {proc.info['name']} (PID {proc.pid}) using {cpu:.2f}% CPU")
+                offenders.append((proc.pid, proc.info['name'], cpu))
+                if not dry_run:
+                    proc.kill()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+    return offenders
+
+
+if __name__ == "__main__":
+    kill_cpu_hogs()
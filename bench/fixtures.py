@@ -0,0 +1,173 @@
+"""
+Synthetic /proc, hwmon, mountinfo and file-tree generators for the ops script benchmarks.
+
+Every generator writes into a directory and drops a `.params` marker, so a second
+run with the same parameters reuses the tree instead of rebuilding it (building a
+million-file tree takes a while).
+"""
+
+import os
+import json
+import random
+import shutil
+
+BOOT_TIME = 1700000000
+CLK_TCK = 100
+
+
+def _fresh(path, params):
+    """Return True if `path` must be (re)built for `params`; clears stale content."""
+    marker = os.path.join(path, ".params")
+    try:
+        with open(marker) as f:
+            if json.load(f) == params:
+                return False
+    except (OSError, ValueError):
+        pass
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+    return True
+
+
+def _done(path, params):
+    with open(os.path.join(path, ".params"), "w") as f:
+        json.dump(params, f)
+
+
+def _write(path, text):
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def _proc_stat_line(pid, name, ppid, utime, stime):
+    # Fields 3..52 of /proc/<pid>/stat; psutil reads state, ppid, utime, stime,
+    # children times, starttime (field 22) and a few others by position.
+    fields = ["S", str(ppid)] + ["0"] * 48
+    fields[11] = str(utime)   # field 14 utime
+    fields[12] = str(stime)   # field 15 stime
+    fields[19] = "1"          # field 22 starttime, in clock ticks since boot
+    return f"{pid} ({name}) " + " ".join(fields) + "\n"
+
+
+def _sock_row(slot, local_port, remote_ip, remote_port, state, inode):
+    remote = "".join(f"{int(b):02X}" for b in reversed(remote_ip.split(".")))
+    return (
+        f"{slot:4d}: 0100007F:{local_port:04X} {remote}:{remote_port:04X} {state} "
+        f"00000000:00000000 00:00000000 00000000  1000        0 {inode} 1 0000000000000000 100 0 0 10 0\n"
+    )
+
+
+def make_proc_tree(path, processes=5000, sockets=20000, listen_ratio=0.05, seed=1):
+    """Build a fake procfs with `processes` pids and `sockets` TCP sockets spread over them.
+
+    Point psutil at it with `psutil.PROCFS_PATH = path`.
+    """
+    params = {"kind": "proc", "processes": processes, "sockets": sockets, "listen_ratio": listen_ratio, "seed": seed,
+              "layout": 2}  # bump when the generated tree changes, so cached fixtures are rebuilt
+    if not _fresh(path, params):
+        return path
+    rng = random.Random(seed)
+
+    _write(os.path.join(path, "stat"),
+           "cpu  1000 0 1000 100000 0 0 0 0 0 0\ncpu0 1000 0 1000 100000 0 0 0 0 0 0\n"
+           f"btime {BOOT_TIME}\nprocesses {processes}\nprocs_running 1\nprocs_blocked 0\n")
+    _write(os.path.join(path, "uptime"), "100000.00 90000.00\n")
+    _write(os.path.join(path, "meminfo"),
+           "MemTotal:       16384000 kB\nMemFree:         8192000 kB\nMemAvailable:   12288000 kB\n"
+           "Buffers:          102400 kB\nCached:          2048000 kB\nShmem:             10240 kB\n"
+           "SReclaimable:     204800 kB\nActive:          4096000 kB\nInactive:        2048000 kB\n"
+           "SwapTotal:             0 kB\nSwapFree:              0 kB\n")
+
+    # only the last pid is falcon-sensor, so looking it up scans the whole table
+    names = ["bash", "sshd", "python3", "nginx", "postgres", "java", "node"]
+    pids = list(range(100, 100 + processes))
+    for pid in pids:
+        name = names[pid % len(names)] if pid != pids[-1] else "falcon-sensor"
+        proc_dir = os.path.join(path, str(pid))
+        os.makedirs(os.path.join(proc_dir, "fd"))
+        _write(os.path.join(proc_dir, "stat"), _proc_stat_line(pid, name, 1, rng.randrange(10000), rng.randrange(1000)))
+        _write(os.path.join(proc_dir, "status"),
+               f"Name:\t{name}\nState:\tS (sleeping)\nPid:\t{pid}\nPPid:\t1\n"
+               "Uid:\t1000\t1000\t1000\t1000\nGid:\t1000\t1000\t1000\t1000\n")
+        _write(os.path.join(proc_dir, "statm"), f"{rng.randrange(1000, 100000)} {rng.randrange(100, 10000)} 100 10 0 100 0\n")
+        _write(os.path.join(proc_dir, "cmdline"), f"{name}\0")
+
+    rows = ["  sl  local_address rem_address   st tx_queue rx_queue tr tm->when retrnsmt   uid  timeout inode\n"]
+    for slot in range(sockets):
+        inode = 100000 + slot
+        if rng.random() < listen_ratio:
+            rows.append(_sock_row(slot, 1024 + slot % 60000, "0.0.0.0", 0, "0A", inode))
+        else:
+            rows.append(_sock_row(slot, 1024 + slot % 60000, f"10.0.{slot // 256 % 256}.{slot % 256}", 443, "01", inode))
+        os.symlink(f"socket:[{inode}]", os.path.join(path, str(rng.choice(pids)), "fd", str(slot)))
+    os.makedirs(os.path.join(path, "net"))
+    _write(os.path.join(path, "net", "tcp"), "".join(rows))
+    for kind in ("tcp6", "udp", "udp6"):
+        _write(os.path.join(path, "net", kind), rows[0])
+
+    _done(path, params)
+    return path
+
+
+def make_hwmon_tree(path, chips=16, sensors_per_chip=32, packages=2):
+    """Build a fake /sys/class/hwmon with one coretemp chip holding `packages` package sensors."""
+    params = {"kind": "hwmon", "chips": chips, "sensors_per_chip": sensors_per_chip, "packages": packages}
+    if not _fresh(path, params):
+        return path
+    for chip in range(chips):
+        chip_dir = os.path.join(path, f"hwmon{chip}")
+        os.makedirs(chip_dir)
+        coretemp = chip == chips // 2
+        _write(os.path.join(chip_dir, "name"), "coretemp\n" if coretemp else f"acpi_sensor{chip}\n")
+        for i in range(1, sensors_per_chip + 1):
+            label = f"Package id {i - 1}" if coretemp and i <= packages else f"Core {i}"
+            _write(os.path.join(chip_dir, f"temp{i}_label"), label + "\n")
+            _write(os.path.join(chip_dir, f"temp{i}_input"), f"{40000 + i * 100}\n")
+            _write(os.path.join(chip_dir, f"temp{i}_max"), "100000\n")
+            _write(os.path.join(chip_dir, f"temp{i}_crit"), "105000\n")
+    _done(path, params)
+    return path
+
+
+def make_file_tree(path, files=1000000, fanout=100, large_every=10000, large_mb=200, seed=1):
+    """Build a directory tree with `files` empty files, `fanout` entries per directory.
+
+    Every `large_every`-th file is a sparse `large_mb` MB file, so size scans find
+    hits without the tree using real disk space.
+    """
+    params = {"kind": "files", "files": files, "fanout": fanout, "large_every": large_every, "large_mb": large_mb, "seed": seed}
+    if not _fresh(path, params):
+        return path
+    dirs = max(1, files // fanout)
+    for i in range(files):
+        d = i % dirs
+        dir_path = os.path.join(path, f"d{d // fanout:04d}", f"d{d % fanout:04d}")
+        if i < dirs:
+            os.makedirs(dir_path)
+        with open(os.path.join(dir_path, f"f{i}.log"), "w") as f:
+            if large_every and i % large_every == 0:
+                f.truncate(large_mb * 1024 * 1024)
+    _done(path, params)
+    return path
+
+
+def make_mountinfo(path, mounts=2000, pseudo_ratio=0.3, seed=1):
+    """Write a mountinfo file with `mounts` entries, a share of them pseudo filesystems.
+
+    Every mount point is a real directory next to the file ("mnt/vol N"), so probing
+    them runs statvfs instead of failing with ENOENT.
+    """
+    rng = random.Random(seed)
+    root = os.path.join(os.path.dirname(os.path.abspath(path)), "mnt")
+    escaped = "".join(f"\\{ord(ch):03o}" if ch in " \t\n\\" else ch for ch in root)
+    lines = []
+    for i in range(mounts):
+        if rng.random() < pseudo_ratio:
+            fstype, source = rng.choice([("proc", "proc"), ("tmpfs", "tmpfs"), ("cgroup2", "cgroup2"), ("overlay", "overlay")])
+        else:
+            fstype, source = rng.choice([("ext4", f"/dev/sd{i}"), ("xfs", f"/dev/nvme{i}n1"), ("nfs4", f"fs{i}:/export")])
+        os.makedirs(os.path.join(root, f"vol {i}"), exist_ok=True)
+        lines.append(f"{i + 30} 1 0:{i + 100} / {escaped}/vol\\040{i} rw,relatime shared:{i} - {fstype} {source} rw\n")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    _write(path, "".join(lines))
+    return path
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Timed scan-path scenarios for the ops scripts, run against synthetic fixtures.
+
+    python bench/run.py                          # small scale, print + write results JSON
+    python bench/run.py --scale full             # thousands of pids, 50k sockets, 1M files
+    python bench/run.py --baseline old.json      # compare, exit 1 on regression
+    python bench/run.py --only netstat --strace  # also count every syscall (needs strace)
+
+Each scenario runs in a fresh child process so peak RSS belongs to that scenario
+alone. Per scenario we record wall time of the scan (best of --repeat), read/write
+syscall counts from /proc/self/io, peak RSS, and with --strace the total syscall
+count of the child.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))  # the ops scripts live in the repo root
+
+import fixtures  # noqa: E402
+
+SCALES = {
+    "small": {"processes": 500, "sockets": 2000, "files": 20000, "chips": 16, "mounts": 500, "probes": 50},
+    "full": {"processes": 5000, "sockets": 50000, "files": 1000000, "chips": 64, "mounts": 5000, "probes": 500},
+}
+
+METRICS = ("wall_s", "syscalls_rw", "peak_rss_kb", "syscalls_total")
+MIN_WALL_DELTA = 0.005  # seconds; sub-ms scans are all noise
+
+
+# -----------------------------
+# Scenarios: setup(fixture_dir, scale) -> zero-arg callable timing just the scan
+# -----------------------------
+def _use_procfs(fixture_dir, scale):
+    import psutil
+    psutil.PROCFS_PATH = fixtures.make_proc_tree(
+        os.path.join(fixture_dir, "proc"), processes=scale["processes"], sockets=scale["sockets"])
+    return psutil
+
+
+def setup_findlargefiles(fixture_dir, scale):
+    import findlargefiles
+    tree = fixtures.make_file_tree(os.path.join(fixture_dir, "files"), files=scale["files"])
+    return lambda: list(findlargefiles.find_large_files(tree, findlargefiles.size_limit_mb))
+
+
+def setup_netstat(fixture_dir, scale):
+    _use_procfs(fixture_dir, scale)
+    import netstat
+    return netstat.listening_sockets
+
+
+def setup_autokillhighcpu(fixture_dir, scale):
+    _use_procfs(fixture_dir, scale)
+    import autokillhighcpu
+    # interval=None measures the scan itself rather than 0.1s of sleep per process
+    return lambda: autokillhighcpu.kill_cpu_hogs(cpu_limit=1000.0, interval=None, dry_run=True)
+
+
+def setup_falcon_sensor(fixture_dir, scale):
+    _use_procfs(fixture_dir, scale)
+    import Falcon_sensor
+    return Falcon_sensor.get_falconsensor_pid
+
+
+def setup_partitions(fixture_dir, scale):
+    import partitions
+    mountinfo = fixtures.make_mountinfo(os.path.join(fixture_dir, "mountinfo"), mounts=scale["mounts"])
+
+    def scan():
+        mounts = partitions.read_mounts(mountinfo)
+        return partitions.probe_mounts([mp for mp, _, _ in mounts[:scale["probes"]]])
+    return scan
+
+
+def setup_cputemp(fixture_dir, scale):
+    import CPUtemp
+    hwmon = fixtures.make_hwmon_tree(os.path.join(fixture_dir, "hwmon"), chips=scale["chips"])
+    return lambda: CPUtemp.read_package_temps(hwmon)
+
+
+SCENARIOS = {
+    "findlargefiles": setup_findlargefiles,
+    "netstat": setup_netstat,
+    "autokillhighcpu": setup_autokillhighcpu,
+    "Falcon_sensor": setup_falcon_sensor,
+    "partitions": setup_partitions,
+    "CPUtemp": setup_cputemp,
+}
+
+
+# -----------------------------
+# Child side
+# -----------------------------
+def _io_counters():
+    counters = {}
+    try:
+        with open("/proc/self/io") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                counters[key] = int(value)
+    except OSError:
+        pass
+    return counters.get("syscr", 0) + counters.get("syscw", 0)
+
+
+def run_child(name, fixture_dir, scale, prepare_only=False):
+    scan = SCENARIOS[name](fixture_dir, SCALES[scale])
+    if prepare_only:
+        return
+    io_before = _io_counters()
+    t0 = time.perf_counter()
+    scan()
+    wall = time.perf_counter() - t0
+    result = {
+        "wall_s": wall,
+        "syscalls_rw": _io_counters() - io_before,
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+    print(json.dumps(result))
+
+
+# -----------------------------
+# Parent side
+# -----------------------------
+def _strace_total(path):
+    """Sum the calls column of an `strace -c` summary."""
+    total = 0
+    with open(path) as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 5 and re.match(r"^\d+\.\d+$", parts[0]) and parts[-1] != "total":
+                total += int(parts[3])
+    return total
+
+
+def run_scenario(name, fixtures_root, scale, repeat, use_strace):
+    cmd = [sys.executable, os.path.abspath(__file__), "--child", name, "--fixtures", fixtures_root, "--scale", scale]
+    best = None
+    for _ in range(repeat):
+        out = subprocess.run(cmd, capture_output=True, text=True)
+        if out.returncode != 0:
+            return {"error": out.stderr.strip().splitlines()[-1] if out.stderr.strip() else f"exit {out.returncode}"}
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        if best is None:
+            best = result
+        else:
+            best["wall_s"] = min(best["wall_s"], result["wall_s"])
+            best["peak_rss_kb"] = max(best["peak_rss_kb"], result["peak_rss_kb"])
+    if use_strace:
+        with tempfile.NamedTemporaryFile(suffix=".strace") as tmp:
+            subprocess.run(["strace", "-f", "-c", "-o", tmp.name] + cmd, capture_output=True)
+            best["syscalls_total"] = _strace_total(tmp.name)
+    return best
+
+
+def compare(results, baseline, tolerance):
+    """Print a comparison table; return the list of (scenario, metric) regressions."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base or "error" in result or "error" in base:
+            continue
+        for metric in METRICS:
+            if metric not in result or not base.get(metric):
+                continue
+            ratio = result[metric] / base[metric]
+            flag = ""
+            if metric == "wall_s" and result[metric] - base[metric] < MIN_WALL_DELTA:
+                pass
+            elif ratio > 1 + tolerance:
+                flag = "  <-- REGRESSION"
+                regressions.append((name, metric))
+            print(f"{name:16s} {metric:15s} {base[metric]:>14.4g} -> {result[metric]:<14.4g} x{ratio:.2f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--only", nargs="+", choices=sorted(SCENARIOS), help="run just these scenarios")
+    parser.add_argument("--fixtures", default=os.path.join(tempfile.gettempdir(), "ops-bench-fixtures"))
+    parser.add_argument("--repeat", type=int, default=3, help="runs per scenario, best wall time wins")
+    parser.add_argument("--out", help="results JSON path (default: bench-<scale>-<timestamp>.json)")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown ratio before flagging")
+    parser.add_argument("--strace", action="store_true", help="also count all syscalls with strace -c")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--prepare", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, os.path.join(args.fixtures, args.scale), args.scale, args.prepare)
+        return 0
+
+    results = {}
+    for name in args.only or SCENARIOS:
+        # Build fixtures up front so generation time never lands in a measurement
+        subprocess.run([sys.executable, os.path.abspath(__file__), "--child", name, "--prepare",
+                        "--fixtures", args.fixtures, "--scale", args.scale], capture_output=True)
+        results[name] = run_scenario(name, args.fixtures, args.scale, args.repeat, args.strace)
+        r = results[name]
+        if "error" in r:
+            print(f"{name:16s} ERROR {r['error']}")
+        else:
+            print(f"{name:16s} {r['wall_s'] * 1000:10.1f} ms  {r['syscalls_rw']:>9d} rw syscalls  {r['peak_rss_kb']:>8d} KB peak RSS")
+
+    report = {
+        "scale": args.scale,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "host": platform.node(),
+        "scenarios": results,
+    }
+    out = args.out or f"bench-{args.scale}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {out}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+import os
+import re
+import sys
+import time
+import select
+import signal
+import logging
+import subprocess
+
+# Define mount points to check (customize as needed)
+MOUNT_POINTS = [
+    "/mnt/data",
+    "/mnt/backup",
+]
+
+PROBE_TIMEOUT = 5  # seconds a statvfs may take before the mount is reported as hung
+REMOUNT_TIMEOUT = 30  # seconds each individual `mount` gets
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# Killed probe workers not reaped yet (pid -> mount point). A worker stuck in
+# D-state only dies once the kernel gives up on the syscall, so later calls keep
+# reaping these and don't fork another probe for the same mount in the meantime.
+_stuck_workers = {}
+
+
+def mounted_points(mountinfo="/proc/self/mountinfo"):
+    """Mount points the kernel knows about. Reading mountinfo never touches the filesystems."""
+    points = set()
+    with open(mountinfo) as f:
+        for line in f:
+            field = line.split()[4]
+            points.add(re.sub(r"\\([0-7]{3})", lambda m: chr(int(m.group(1), 8)), field))
+    return points
+
+
+def _reap_stuck_workers():
+    for pid in list(_stuck_workers):
+        try:
+            done, _ = os.waitpid(pid, os.WNOHANG)
+        except ChildProcessError:
+            done = pid
+        if done:
+            del _stuck_workers[pid]
+
+
+def probe_mounts(mount_points, timeout=PROBE_TIMEOUT):
+    """statvfs every mount point concurrently, each in its own forked worker.
+
+    Returns {mount_point: (state, value)} where state is "ok" (value is an
+    os.statvfs_result), "error" (value is the error text) or "hung" (the worker
+    missed the deadline and was killed, or an earlier probe of that mount is
+    still stuck). Always returns within roughly `timeout`.
+    """
+    _reap_stuck_workers()
+    still_stuck = set(_stuck_workers.values())
+    results = {mp: ("hung", None) for mp in mount_points if mp in still_stuck}
+    workers = {}  # read fd -> (pid, mount_point, chunks)
+    for mount_point in mount_points:
+        if mount_point in still_stuck:
+            continue
+        r, w = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(r)
+            try:
+                payload = "ok " + ",".join(str(v) for v in os.statvfs(mount_point))
+            except OSError as e:
+                payload = f"error {e}"
+            os.write(w, payload.encode())
+            os._exit(0)
+        os.close(w)
+        workers[r] = (pid, mount_point, [])
+
+    deadline = time.monotonic() + timeout
+    while workers:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        ready, _, _ = select.select(list(workers), [], [], remaining)
+        for fd in ready:
+            pid, mount_point, chunks = workers[fd]
+            data = os.read(fd, 4096)
+            if data:
+                chunks.append(data)
+                continue
+            # EOF: the worker finished
+            os.close(fd)
+            os.waitpid(pid, 0)
+            del workers[fd]
+            state, _, value = b"".join(chunks).decode().partition(" ")
+            if state == "ok":
+                results[mount_point] = ("ok", os.statvfs_result([int(v) for v in value.split(",")]))
+            else:
+                results[mount_point] = ("error", value or "worker died")
+
+    # Anything left is stuck in the kernel (typically an unreachable NFS server).
+    # SIGKILL is delivered once the syscall gives up; we don't wait around for that,
+    # later calls reap it.
+    for fd, (pid, mount_point, _) in workers.items():
+        os.close(fd)
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        _stuck_workers[pid] = mount_point
+        results[mount_point] = ("hung", None)
+    _reap_stuck_workers()
+    return results
+
+
+def remount(mount_points, timeout=REMOUNT_TIMEOUT):
+    """Run `mount <point>` for each point in parallel. Returns {mount_point: ok}."""
+    procs = {
+        mp: subprocess.Popen(["/bin/mount", mp], stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        for mp in mount_points
+    }
+    deadline = time.monotonic() + timeout
+    results = {}
+    for mp, proc in procs.items():
+        try:
+            _, err = proc.communicate(timeout=max(0, deadline - time.monotonic()))
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            try:
+                proc.communicate(timeout=1)
+            except subprocess.TimeoutExpired:
+                pass  # stuck in the kernel; subprocess reaps it on a later Popen
+            logging.error(f"mount {mp} timed out after {timeout}s")
+            results[mp] = False
+            continue
+        if proc.returncode != 0:
+            logging.error(f"mount {mp} failed: {err.decode().strip()}")
+        results[mp] = proc.returncode == 0
+    return results
+
+
+def check_mounts(mount_points=MOUNT_POINTS):
+    """Return True when every mount point is mounted and responsive."""
+    mounted = mounted_points()
+    missing = [mp for mp in mount_points if mp not in mounted]
+    healthy = True
+
+    for mount_point, (state, value) in probe_mounts([mp for mp in mount_points if mp in mounted]).items():
+        if state == "hung":
+            logging.error(f"Mount point {mount_point} is hung (statvfs exceeded {PROBE_TIMEOUT}s).")
+            healthy = False
+        elif state == "error":
+            logging.error(f"Mount point {mount_point} is unhealthy: {value}")
+            healthy = False
+
+    for mount_point in missing:
+        logging.warning(f"Mount point {mount_point} is not mounted.")
+    if missing:
+        logging.info(f"Remounting {', '.join(missing)}...")
+        for mount_point, ok in remount(missing).items():
+            if ok:
+                logging.info(f"Remounted {mount_point}.")
+            else:
+                healthy = False
+    return healthy
+
+
+if __name__ == "__main__":
+    sys.exit(0 if check_mounts(sys.argv[1:] or MOUNT_POINTS) else 1)
@@ -3,13 +3,20 @@ import os
 directory = "/var/log"
 size_limit_mb = 100
 
-for root, _, files in os.walk(directory):
-    for f in files:
-        path = os.path.join(root, f)
-        try:
-            size = os.path.getsize(path) / (1024 * 1024)
-            if size > size_limit_mb:
-                print(f"{path} - {size:.2f} MB")
-        except:
-            pass
 
+def find_large_files(directory=directory, size_limit_mb=size_limit_mb):
+    """Yield (path, size_mb) for every file under directory larger than size_limit_mb."""
+    for root, _, files in os.walk(directory):
+        for f in files:
+            path = os.path.join(root, f)
+            try:
+                size = os.path.getsize(path) / (1024 * 1024)
+                if size > size_limit_mb:
+                    yield path, size
+            except:
+                pass
+
+
+if __name__ == "__main__":
+    for path, size in find_large_files():
+        print(f"{path} - {size:.2f} MB")
@@ -0,0 +1,245 @@
+"""
+Self-overhead instrumentation for the long-running monitor loops.
+
+    stats = LoopStats("sentinel")
+    stats.install_signals()
+    while True:
+        with stats.cycle():
+            with stats.stage("scan"):
+                ...
+
+Stage and cycle timings go into log2-bucketed histograms (one list index bump per
+sample), alongside the process's own CPU time and RSS for every cycle.
+
+    kill -USR1 <pid>   dump the histograms as JSON to dump_path
+    kill -USR2 <pid>   cProfile the next profile_cycles cycles, then write a .prof next to dump_path
+
+dump_path defaults to <name>.loopstats.json in a private (0700) directory:
+$XDG_RUNTIME_DIR/<name>, /run/<name> for root, else <tmpdir>/<name>-<uid>. Files are
+written 0600 through an O_EXCL|O_NOFOLLOW temp file and renamed into place, so a
+daemon running as root can't be tricked into following a planted symlink.
+"""
+
+import os
+import json
+import stat
+import time
+import marshal
+import tempfile
+import signal
+import logging
+import cProfile
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+class Histogram:
+    """Power-of-two bucketed histogram of integer samples (microseconds, bytes...)."""
+    __slots__ = ("buckets", "count", "total", "max")
+
+    def __init__(self):
+        self.buckets = [0] * 64
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def add(self, value):
+        self.buckets[value.bit_length()] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, p):
+        """Upper bound of the bucket holding the p-th percentile sample."""
+        if not self.count:
+            return 0
+        rank = p / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank:
+                return min((1 << i) - 1, self.max) if i else 0
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+
+class _Stage:
+    __slots__ = ("hist", "start")
+
+    def __init__(self, hist):
+        self.hist = hist
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.hist.add((time.perf_counter_ns() - self.start) // 1000)
+        return False
+
+
+class _Cycle:
+    __slots__ = ("stats", "wall", "cpu")
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def __enter__(self):
+        self.stats._start_profile_if_requested()
+        self.wall = time.perf_counter_ns()
+        self.cpu = time.process_time_ns()
+        return self
+
+    def __exit__(self, *exc):
+        stats = self.stats
+        stats.cycle_wall.add((time.perf_counter_ns() - self.wall) // 1000)
+        cpu_us = (time.process_time_ns() - self.cpu) // 1000
+        stats.cycle_cpu.add(cpu_us)
+        stats.last_cpu_us = cpu_us
+        stats.last_rss = _rss_bytes()
+        stats.cycle_rss.add(stats.last_rss)
+        stats.cycles += 1
+        stats._stop_profile_if_done()
+        return False
+
+
+def private_dir(name):
+    """A directory only this user can use, for a daemon's dumps."""
+    if os.environ.get("XDG_RUNTIME_DIR"):
+        path = os.path.join(os.environ["XDG_RUNTIME_DIR"], name)
+    elif os.geteuid() == 0:
+        path = os.path.join("/run", name)
+    else:
+        path = os.path.join(tempfile.gettempdir(), f"{name}-{os.getuid()}")
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.geteuid() or st.st_mode & 0o077:
+        raise PermissionError(f"{path} is not a private directory owned by us")
+    return path
+
+
+def write_private(path, data):
+    """Write bytes to path as 0600, never following a symlink planted at either name."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL | os.O_NOFOLLOW, 0o600)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+class LoopStats:
+    def __init__(self, name, dump_path=None, profile_cycles=5):
+        self.name = name
+        self.dump_path = dump_path
+        self.profile_cycles = profile_cycles
+        self.stages = {}
+        self.cycle_wall = Histogram()
+        self.cycle_cpu = Histogram()
+        self.cycle_rss = Histogram()
+        self.cycles = 0
+        self.last_cpu_us = 0
+        self.last_rss = 0
+        self.started = time.time()
+        self._profile_requested = 0
+        self._profiler = None
+        self._profile_left = 0
+        self._cycle = _Cycle(self)
+
+    def stage(self, name):
+        """Context manager timing one pass through a named stage."""
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = self.stages[name] = _Stage(Histogram())
+        return stage
+
+    def cycle(self):
+        """Context manager wrapping one iteration of the monitor loop."""
+        return self._cycle
+
+    def profile(self, cycles=None):
+        """Capture cProfile data for the next `cycles` loop iterations."""
+        self._profile_requested = cycles or self.profile_cycles
+
+    def snapshot(self):
+        return {
+            "name": self.name,
+            "pid": os.getpid(),
+            "uptime_s": round(time.time() - self.started, 1),
+            "cycles": self.cycles,
+            "process_cpu_s": round(time.process_time(), 3),
+            "last_cycle_cpu_us": self.last_cpu_us,
+            "last_rss_bytes": self.last_rss,
+            "cycle_wall_us": self.cycle_wall.summary(),
+            "cycle_cpu_us": self.cycle_cpu.summary(),
+            "cycle_rss_bytes": self.cycle_rss.summary(),
+            "stages_us": {name: stage.hist.summary() for name, stage in self.stages.items()},
+        }
+
+    def _dump_path(self):
+        if self.dump_path is None:
+            self.dump_path = os.path.join(private_dir(self.name), f"{self.name}.loopstats.json")
+        return self.dump_path
+
+    def dump(self, path=None):
+        try:
+            path = path or self._dump_path()
+            write_private(path, json.dumps(self.snapshot(), indent=2).encode())
+        except OSError as e:
+            logging.error(f"[{self.name}] could not write loop stats to {path or 'the private dir'}: {e}")
+            return
+        logging.info(f"[{self.name}] loop stats written to {path}")
+
+    def install_signals(self, dump_signal=signal.SIGUSR1, profile_signal=signal.SIGUSR2):
+        signal.signal(dump_signal, lambda signum, frame: self.dump())
+        signal.signal(profile_signal, lambda signum, frame: self.profile())
+
+    def _start_profile_if_requested(self):
+        if self._profile_requested and self._profiler is None:
+            self._profile_left = self._profile_requested
+            self._profile_requested = 0
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def _stop_profile_if_done(self):
+        if self._profiler is None:
+            return
+        self._profile_left -= 1
+        if self._profile_left > 0:
+            return
+        profiler, self._profiler = self._profiler, None
+        profiler.disable()
+        profiler.create_stats()
+        path = None
+        try:
+            path = f"{os.path.splitext(self._dump_path())[0]}.{time.strftime('%Y%m%d-%H%M%S')}.prof"
+            write_private(path, marshal.dumps(profiler.stats))  # what Profile.dump_stats() writes
+        except OSError as e:
+            logging.error(f"[{self.name}] could not write cProfile capture to {path or 'the private dir'}: {e}")
+            return
+        logging.info(f"[{self.name}] cProfile capture written to {path}")
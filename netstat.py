@@ -1,6 +1,11 @@
 import psutil
 
-for conn in psutil.net_connections(kind='inet'):
-    if conn.status == 'LISTEN':
-        print(f"PID {conn.pid} listening on {conn.laddr}")
 
+def listening_sockets():
+    """Return (pid, laddr) for every listening inet socket."""
+    return [(conn.pid, conn.laddr) for conn in psutil.net_connections(kind='inet') if conn.status == 'LISTEN']
+
+
+if __name__ == "__main__":
+    for pid, laddr in listening_sockets():
+        print(f"PID {pid} listening on {laddr}")
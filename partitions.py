@@ -1,12 +1,129 @@
-import shutil
+import re
+import time
+import argparse
 import logging
+from collections import deque
 
-threshold = 90  # percent
-mount_point = "/"  # root partition
+from check_mounts import probe_mounts
 
-total, used, free = shutil.disk_usage(mount_point)
-percent_used = used / total * 100
+threshold = 90  # percent, blocks or inodes
+forecast_horizon = 2 * 3600  # page when a mount is forecast to fill within this many seconds
+check_interval = 60  # seconds between samples
+samples_kept = 30  # ring buffer length per mount used for the forecast
 
-if percent_used > threshold:
-    logging.warning(f"Disk usage exceeded: {percent_used:.2f}% used on {mount_point}")
+# Filesystems that never fill up in a way we care about (or are always 100% by design)
+PSEUDO_FS = {
+    "proc", "sysfs", "devtmpfs", "devpts", "cgroup", "cgroup2", "securityfs",
+    "debugfs", "tracefs", "pstore", "bpf", "mqueue", "hugetlbfs", "configfs",
+    "fusectl", "autofs", "binfmt_misc", "rpc_pipefs", "nsfs", "efivarfs",
+    "selinuxfs", "squashfs", "iso9660", "ramfs", "fuse.gvfsd-fuse", "fuse.portal",
+}
 
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+
+def _unescape(field):
+    """mountinfo escapes space, tab, newline and backslash as octal (e.g. \\040)."""
+    return re.sub(r"\\([0-7]{3})", lambda m: chr(int(m.group(1), 8)), field)
+
+
+def read_mounts(mountinfo="/proc/self/mountinfo"):
+    """Return [(mount_point, fstype, source)] for real filesystems, one per device."""
+    mounts = []
+    seen_devices = set()
+    with open(mountinfo) as f:
+        for line in f:
+            fields = line.split()
+            sep = fields.index("-")
+            device, mount_point = fields[2], _unescape(fields[4])
+            fstype, source = fields[sep + 1], fields[sep + 2]
+            if fstype in PSEUDO_FS or device in seen_devices:
+                continue  # pseudo filesystem, or a bind mount of something already listed
+            seen_devices.add(device)
+            mounts.append((mount_point, fstype, source))
+    return mounts
+
+
+def usage(st):
+    """Return (blocks_used, blocks_total, inodes_used, inodes_total) from a statvfs result."""
+    blocks_total = st.f_blocks * st.f_frsize
+    # f_bavail is what unprivileged writers see, so count reserved blocks as used
+    blocks_used = blocks_total - st.f_bavail * st.f_frsize
+    inodes_used = st.f_files - st.f_favail
+    return blocks_used, blocks_total, inodes_used, st.f_files
+
+
+def seconds_to_full(samples, total):
+    """Least-squares fill rate over (timestamp, used) samples -> seconds until used == total.
+
+    Returns None when there are too few samples or usage is flat/shrinking.
+    """
+    if len(samples) < 3 or not total:
+        return None
+    n = len(samples)
+    mean_t = sum(t for t, _ in samples) / n
+    mean_u = sum(u for _, u in samples) / n
+    var_t = sum((t - mean_t) ** 2 for t, _ in samples)
+    if not var_t:
+        return None
+    rate = sum((t - mean_t) * (u - mean_u) for t, u in samples) / var_t
+    if rate <= 0:
+        return None
+    return max(0.0, (total - samples[-1][1]) / rate)
+
+
+def _fmt_duration(seconds):
+    hours, rem = divmod(int(seconds), 3600)
+    return f"{hours}h{rem // 60:02d}m"
+
+
+class CapacityChecker:
+    def __init__(self):
+        self.mounts = read_mounts()
+        self.block_samples = {mp: deque(maxlen=samples_kept) for mp, _, _ in self.mounts}
+        self.inode_samples = {mp: deque(maxlen=samples_kept) for mp, _, _ in self.mounts}
+
+    def check(self):
+        now = time.monotonic()
+        # statvfs on a dead NFS server blocks forever, so probe in killable workers
+        probes = probe_mounts([mp for mp, _, _ in self.mounts])
+        for mount_point, fstype, source in self.mounts:
+            state, value = probes[mount_point]
+            if state == "hung":
+                logging.error(f"statvfs hung on {mount_point} ({source}), skipping")
+                continue
+            if state == "error":
+                logging.error(f"statvfs failed on {mount_point} ({source}): {value}")
+                continue
+            blocks_used, blocks_total, inodes_used, inodes_total = usage(value)
+            self.block_samples[mount_point].append((now, blocks_used))
+            self.inode_samples[mount_point].append((now, inodes_used))
+
+            for kind, used, total, samples in (
+                ("Disk", blocks_used, blocks_total, self.block_samples[mount_point]),
+                ("Inode", inodes_used, inodes_total, self.inode_samples[mount_point]),
+            ):
+                if not total:
+                    continue  # e.g. btrfs reports no inode limit
+                percent_used = used / total * 100
+                if percent_used > threshold:
+                    logging.warning(f"{kind} usage exceeded: {percent_used:.2f}% used on {mount_point} ({fstype})")
+                eta = seconds_to_full(samples, total)
+                if eta is not None and eta < forecast_horizon:
+                    logging.warning(
+                        f"{kind} usage on {mount_point} ({fstype}) at {percent_used:.2f}%, "
+                        f"forecast full in {_fmt_duration(eta)}"
+                    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check capacity and inode usage on every real mount")
+    parser.add_argument("--interval", type=float, nargs="?", const=check_interval, default=0,
+                        help=f"keep checking every INTERVAL seconds (default {check_interval}), which also "
+                             "enables the time-to-full forecast; without it, check once and exit")
+    args = parser.parse_args()
+    checker = CapacityChecker()
+    checker.check()
+    while args.interval:
+        time.sleep(args.interval)
+        checker.check()
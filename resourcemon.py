@@ -1,9 +1,156 @@
-import psutil, time
+import os, sys, time, argparse, resource
+import psutil
 
-while True:
-    print("CPU:", psutil.cpu_percent(), "%")
-    print("RAM:", psutil.virtual_memory().percent, "%")
-    print("Disk:", psutil.disk_usage('/').percent, "%")
+from loopstats import LoopStats
+
+CGROUP_ROOT = "/sys/fs/cgroup"  # cgroup v2 unified hierarchy
+CGROUP_FILES = ("cpu.stat", "memory.current", "memory.stat", "io.stat")
+RESCAN_EVERY = 30  # ticks between walks of the hierarchy for new/removed cgroups
+
+
+class Cgroup:
+    """Open handles to one cgroup's stat files, kept across ticks so sampling is just pread()."""
+
+    def __init__(self, path):
+        self.path = path
+        self.fds = {}
+        for name in CGROUP_FILES:
+            try:
+                self.fds[name] = os.open(os.path.join(path, name), os.O_RDONLY)
+            except OSError:
+                pass  # controller not enabled for this cgroup
+        self.prev = None
+
+    def close(self):
+        for fd in self.fds.values():
+            os.close(fd)
+        self.fds.clear()
+
+    def _read(self, name):
+        fd = self.fds.get(name)
+        return os.pread(fd, 65536, 0).decode() if fd is not None else ""
+
+    def read(self):
+        """Return the raw counters: cpu usec, memory bytes, anon/file bytes, io bytes."""
+        sample = {"cpu_usec": 0, "mem": 0, "anon": 0, "file": 0, "rbytes": 0, "wbytes": 0}
+        for line in self._read("cpu.stat").splitlines():
+            key, _, value = line.partition(" ")
+            if key == "usage_usec":
+                sample["cpu_usec"] = int(value)
+                break
+        mem = self._read("memory.current").strip()
+        sample["mem"] = int(mem) if mem else 0
+        for line in self._read("memory.stat").splitlines():
+            key, _, value = line.partition(" ")
+            if key in ("anon", "file"):
+                sample[key] = int(value)
+        for line in self._read("io.stat").splitlines():
+            for field in line.split()[1:]:
+                key, _, value = field.partition("=")
+                if key in ("rbytes", "wbytes"):
+                    sample[key] += int(value)
+        return sample
+
+
+class CgroupSampler:
+    def __init__(self, root=CGROUP_ROOT, leaves_only=True):
+        self.root = root
+        self.leaves_only = leaves_only
+        self.cgroups = {}
+        self.ticks = 0
+        # four descriptors per cgroup adds up quickly on busy container hosts
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if soft < hard:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+    def rescan(self):
+        found = set()
+        for dirpath, dirnames, _ in os.walk(self.root):
+            if self.leaves_only and dirnames:
+                continue  # parents only aggregate their children
+            found.add(dirpath)
+        for path in set(self.cgroups) - found:
+            self.cgroups.pop(path).close()
+        for path in found - set(self.cgroups):
+            self.cgroups[path] = Cgroup(path)
+
+    def sample(self):
+        """Return [(path, rates)] for every cgroup that has a previous sample to diff against."""
+        if self.ticks % RESCAN_EVERY == 0:
+            self.rescan()
+        self.ticks += 1
+        now = time.monotonic()
+        rows = []
+        for path, cg in list(self.cgroups.items()):
+            try:
+                cur = cg.read()
+            except OSError:
+                # ENODEV: the cgroup was removed between rescans
+                self.cgroups.pop(path).close()
+                continue
+            if cg.prev is not None:
+                then, prev = cg.prev
+                dt = now - then
+                rows.append((path, {
+                    "cpu_pct": (cur["cpu_usec"] - prev["cpu_usec"]) / (dt * 1e6) * 100,
+                    "mem": cur["mem"],
+                    "anon": cur["anon"],
+                    "file": cur["file"],
+                    "read_bps": (cur["rbytes"] - prev["rbytes"]) / dt,
+                    "write_bps": (cur["wbytes"] - prev["wbytes"]) / dt,
+                }))
+            cg.prev = (now, cur)
+        return rows
+
+
+def _mb(n):
+    return n / (1024 * 1024)
+
+
+def print_top(rows, root, top):
+    print(f"{'CPU%':>7} {'MEM MB':>9} {'ANON MB':>9} {'FILE MB':>9} {'READ MB/s':>10} {'WRITE MB/s':>11}  CGROUP")
+    for path, r in sorted(rows, key=lambda row: row[1]["cpu_pct"], reverse=True)[:top]:
+        name = os.path.relpath(path, root) if path != root else "/"
+        print(f"{r['cpu_pct']:7.1f} {_mb(r['mem']):9.1f} {_mb(r['anon']):9.1f} {_mb(r['file']):9.1f} "
+              f"{_mb(r['read_bps']):10.2f} {_mb(r['write_bps']):11.2f}  {name}")
     print("-" * 30)
-    time.sleep(10)
 
+
+def main():
+    parser = argparse.ArgumentParser(description="Host or per-cgroup resource monitor")
+    parser.add_argument("--cgroups", action="store_true", help="report top cgroups instead of host totals")
+    parser.add_argument("--top", type=int, default=10, help="cgroups to show per tick")
+    parser.add_argument("--interval", type=float, default=None, help="seconds between ticks (10 host, 1 cgroups)")
+    parser.add_argument("--all-levels", action="store_true", help="include parent cgroups, not just leaves")
+    args = parser.parse_args()
+    interval = args.interval or (1 if args.cgroups else 10)
+
+    # kill -USR1 dumps per-stage timings, kill -USR2 profiles a few cycles
+    stats = LoopStats("resourcemon")
+    stats.install_signals()
+
+    sampler = CgroupSampler(leaves_only=not args.all_levels) if args.cgroups else None
+    while True:
+        with stats.cycle():
+            if sampler:
+                with stats.stage("sample"):
+                    rows = sampler.sample()
+                with stats.stage("print"):
+                    if rows:
+                        print_top(rows, sampler.root, args.top)
+            else:
+                with stats.stage("sample"):
+                    cpu = psutil.cpu_percent()
+                    ram = psutil.virtual_memory().percent
+                    disk = psutil.disk_usage('/').percent
+                with stats.stage("print"):
+                    print("CPU:", cpu, "%")
+                    print("RAM:", ram, "%")
+                    print("Disk:", disk, "%")
+                    print("-" * 30)
+        sys.stdout.flush()
+        time.sleep(interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,12 +8,16 @@ import time
 import socket
 import logging
 import subprocess
-import requests
+
+from loopstats import LoopStats
+from abusecheck import AbuseChecker
 
 # === CONFIG ===
 LOG_FILE = "/var/log/network_monitor.log"
 CHECK_INTERVAL = 10
 ABUSEIPDB_API_KEY = "YOUR_ABUSEIPDB_API_KEY"
+ABUSEIPDB_CHECKS_PER_DAY = 1000      # plan quota for /check (free plan: 1000)
+ABUSEIPDB_BLOCK_CHECKS_PER_DAY = 100  # plan quota for /check-block (free plan: 100)
 WHITELISTED_PROCESSES = {"firefox", "chrome", "sshd"}
 SUSPICIOUS_PORT_THRESHOLD = 49152
 
@@ -28,19 +32,12 @@ def log_event(message):
     print(message)
     logging.warning(message)
 
+# Lookups are queued and paced to the plan's quota, riskiest connections first
+abuse_checker = AbuseChecker(ABUSEIPDB_API_KEY, ABUSEIPDB_CHECKS_PER_DAY, ABUSEIPDB_BLOCK_CHECKS_PER_DAY)
+
 def is_ip_blacklisted(ip):
-    try:
-        response = requests.get(
-            f"https://api.abuseipdb.com/api/v2/check",
-            headers={"Key": ABUSEIPDB_API_KEY, "Accept": "application/json"},
-            params={"ipAddress": ip, "maxAgeInDays": 30}
-        )
-        data = response.json()
-        score = data["data"]["abuseConfidenceScore"]
-        return score > 50, score
-    except Exception as e:
-        logging.error(f"AbuseIPDB error: {e}")
-        return False, 0
+    """(blacklisted, score) right away; score is None when AbuseIPDB couldn't be asked."""
+    return abuse_checker.check_now(ip)
 
 def geoip_lookup(ip):
     try:
@@ -56,54 +53,83 @@ def block_ip(ip):
     except subprocess.CalledProcessError as e:
         logging.error(f"Failed to block IP {ip}: {e}")
 
-def is_suspicious_connection(conn, proc_name):
+def connection_risk(conn, proc_name):
+    """0 for an unremarkable connection; the higher, the sooner its remote gets checked."""
     if conn.status != psutil.CONN_ESTABLISHED or not conn.raddr:
-        return False
-    rport = conn.raddr.port
-    rhost = conn.raddr.ip
+        return 0
+    risk = 0
     if proc_name not in WHITELISTED_PROCESSES:
-        return True
-    if rport >= SUSPICIOUS_PORT_THRESHOLD:
-        return True
-    if not rhost.startswith(("192.", "10.", "172.")):
-        return True
-    return False
+        risk += 2
+    if conn.raddr.port >= SUSPICIOUS_PORT_THRESHOLD:
+        risk += 1
+    if not conn.raddr.ip.startswith(("192.", "10.", "172.")):
+        risk += 1
+    return risk
+
+def report_abuse_score(ip, blacklisted, score):
+    if score is None:
+        log_event(f"[? Unchecked IP] {ip} - AbuseIPDB gave no answer")
+    elif blacklisted:
+        log_event(f"[⚠️ BLACKLISTED] {ip} - Abuse Score: {score}")
+        block_ip(ip)
+    else:
+        log_event(f"[Clean IP] {ip} - Abuse Score: {score}")
 
 def monitor_network():
     logging.info("Started enhanced network monitor.")
     seen = set()
+    # kill -USR1 dumps per-stage timings, kill -USR2 profiles a few cycles
+    stats = LoopStats("sentinel")
+    stats.install_signals()
 
     while True:
-        for conn in psutil.net_connections(kind="inet"):
-            pid = conn.pid
-            if not pid or not conn.raddr:
-                continue
-            try:
-                proc = psutil.Process(pid)
-                proc_name = proc.name()
-                remote_ip = conn.raddr.ip
-                unique_id = (proc_name, remote_ip, conn.raddr.port)
-
-                if unique_id in seen:
+        with stats.cycle():
+            with stats.stage("scan"):
+                connections = psutil.net_connections(kind="inet")
+            for conn in connections:
+                pid = conn.pid
+                if not pid or not conn.raddr:
+                    continue
+                try:
+                    with stats.stage("classify"):
+                        proc = psutil.Process(pid)
+                        proc_name = proc.name()
+                        remote_ip = conn.raddr.ip
+                        unique_id = (proc_name, remote_ip, conn.raddr.port)
+
+                        if unique_id in seen:
+                            continue
+                        risk = connection_risk(conn, proc_name)
+                    if risk:
+                        with stats.stage("log"):
+                            log_event(f"[!] Suspicious connection: {proc_name} ({pid}) -> {remote_ip}:{conn.raddr.port}")
+
+                        with stats.stage("enrich"):
+                            # GeoIP lookup
+                            geo = geoip_lookup(remote_ip)
+                            # IP Blacklist check: queued, answered below (now or in a later cycle)
+                            cached = abuse_checker.submit(remote_ip, risk)
+
+                        with stats.stage("log"):
+                            log_event(f"[GeoIP] {remote_ip} = {geo}")
+                        if cached is False:
+                            continue  # queue full: not marked seen, so it is submitted again next cycle
+                        if cached:
+                            with stats.stage("block"):
+                                report_abuse_score(remote_ip, *cached)
+
+                        seen.add(unique_id)
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
                     continue
-                if is_suspicious_connection(conn, proc_name):
-                    log_event(f"[!] Suspicious connection: {proc_name} ({pid}) -> {remote_ip}:{conn.raddr.port}")
-
-                    # GeoIP lookup
-                    geo = geoip_lookup(remote_ip)
-                    log_event(f"[GeoIP] {remote_ip} = {geo}")
-
-                    # IP Blacklist check
-                    blacklisted, score = is_ip_blacklisted(remote_ip)
-                    if blacklisted:
-                        log_event(f"[⚠️ BLACKLISTED] {remote_ip} - Abuse Score: {score}")
-                        block_ip(remote_ip)
-                    else:
-                        log_event(f"[Clean IP] {remote_ip} - Abuse Score: {score}")
-
-                    seen.add(unique_id)
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                continue
+
+            # Spend this cycle's share of the AbuseIPDB quota on the riskiest remotes
+            with stats.stage("enrich"):
+                verdicts = abuse_checker.run()
+            with stats.stage("block"):
+                for ip, blacklisted, score in verdicts:
+                    report_abuse_score(ip, blacklisted, score)
+            if len(abuse_checker):
+                logging.info(f"{len(abuse_checker)} IPs waiting for AbuseIPDB quota")
         time.sleep(CHECK_INTERVAL)
 
 if __name__ == "__main__":